@@ -6,13 +6,28 @@ Enterprise Supply Chain Dashboard
 • USA State Map
 • Single Screen Layout
 • Optimized BigQuery Usage
+• BigQuery or local DuckDB warehouse (WAREHOUSE_BACKEND)
 """
 
 import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait
 import streamlit as st
-import pandas as pd
+import numpy as np
+import pyarrow.compute as pc
 import plotly.express as px
-from google.cloud import bigquery
+import plotly.graph_objects as go
+
+# Repo root on the path so `streamlit run dashboard/app.py` can import src
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+from src.warehouse.backends import get_backend
+from src.utils.columnar import compact_table
+from dashboard.sales_cube import SalesCube
 
 
 # =====================================================
@@ -118,302 +133,276 @@ st.markdown("""
 
 
 # =====================================================
-# BIGQUERY CLIENT
+# WAREHOUSE BACKEND
 # =====================================================
 @st.cache_resource
-def get_client():
-    return bigquery.Client(project=os.getenv("GCP_PROJECT_ID"))
+def get_warehouse():
+    return get_backend()
 
-client = get_client()
+warehouse = get_warehouse()
 
 # =====================================================
 # LOAD DATA
 # =====================================================
-@st.cache_data(ttl=600)
-def load_sales():
+# One pre-aggregated query per data refresh; every filter combination is
+# then answered from the in-memory cube (shared across sessions).
+# Results stay Arrow tables (dictionary-encoded strings, downcast numbers)
+# and are shared rather than copied per session: Arrow data is immutable.
+# pandas only appears at the plotting boundary.
+
+@st.cache_resource(ttl=600)
+def load_cube():
     query = """
     SELECT year,
            month,
            region,
            category,
-           total_sales,
-           total_profit,
-           total_quantity
-    FROM `supply-chain-dw.supply_chain_dw.vw_sales_mart`
-    """
-    return client.query(query).to_dataframe()
-
-# =====================================================
-# LOAD GEO SALES (FOR MAP)
-# =====================================================
-@st.cache_data(ttl=600)
-def load_geo_sales():
-    query = """
-    SELECT year,
-           month,
-           country,
-           region,
            state,
-           city,
            total_sales,
            total_profit,
-           total_quantity
-    FROM `supply-chain-dw.supply_chain_dw.vw_geo_sales`
+           total_quantity,
+           total_lead_time,
+           order_lines
+    FROM `{dataset}.vw_sales_cube`
     """
-    return client.query(query).to_dataframe()
+    return SalesCube.from_arrow(compact_table(warehouse.query_arrow(query)))
 
-@st.cache_data(ttl=600)
+@st.cache_resource(ttl=600)
 def load_vendor():
     query = """
     SELECT vendor_name, total_sales, avg_lead_time
-    FROM `supply-chain-dw.supply_chain_dw.vw_vendor_performance`
+    FROM `{dataset}.vw_vendor_performance`
+    ORDER BY total_sales
     """
-    return client.query(query).to_dataframe()
+    # Load time in the schema metadata keys the vendor figure cache
+    table = compact_table(warehouse.query_arrow(query))
+    return table.replace_schema_metadata({"loaded_at": str(time.time_ns())})
 
-@st.cache_data(ttl=600)
-def load_lead_time():
+@st.cache_resource(ttl=600)
+def load_vendor_trend():
     query = """
-    SELECT year,
-           region,
-           category,
-           avg_lead_time
-    FROM `supply-chain-dw.supply_chain_dw.vw_lead_time_mart`
+    SELECT vendor_name,
+           month_start,
+           year,
+           orders_3m,
+           avg_lead_time_3m,
+           on_time_rate_3m
+    FROM `{dataset}.vw_vendor_monthly`
+    ORDER BY vendor_name, month_start
     """
-    return client.query(query).to_dataframe()
-
-df_sales = load_sales()
-df_vendor = load_vendor()
-df_geo = load_geo_sales()
-df_lead = load_lead_time()
+    table = compact_table(warehouse.query_arrow(query))
+    return table.replace_schema_metadata({"loaded_at": str(time.time_ns())})
 
 # =====================================================
-# FILTER BAR
+# COLD START: CONCURRENT FETCHES
 # =====================================================
-f1, f2, f3, f4 = st.columns(4)
-
-with f1:
-    selected_year = st.selectbox("Year", sorted(df_sales.year.unique()))
+# All warehouse round trips are issued at once, so the first page view
+# waits for the slowest query instead of their sum. The page layout is
+# drawn with placeholders first and each section is filled in as soon as
+# the dataset it needs has arrived (see PROGRESSIVE RENDERING below).
 
-with f2:
-    metric_choice = st.selectbox("Metric", ["Sales", "Profit"])
-
-with f3:
-    selected_region = st.selectbox(
-        "Region",
-        ["All"] + sorted(df_sales.region.unique())
-    )
+@st.cache_resource
+def get_loader_pool():
+    return ThreadPoolExecutor(max_workers=4, thread_name_prefix="dashboard-load")
+
+def timed_load(loader, ctx):
+    # Cached loaders need the session's script context in worker threads
+    add_script_run_ctx(threading.current_thread(), ctx)
+    start = time.perf_counter()
+    result = loader()
+    return result, time.perf_counter() - start
+
+ctx = get_script_run_ctx()
+pool = get_loader_pool()
+
+futures = {
+    "vw_sales_cube": pool.submit(timed_load, load_cube, ctx),
+    "vw_vendor_performance": pool.submit(timed_load, load_vendor, ctx),
+    "vw_vendor_monthly": pool.submit(timed_load, load_vendor_trend, ctx),
+}
+load_timings = {}
 
-with f4:
-    selected_category = st.selectbox(
-        "Category",
-        ["All"] + sorted(df_sales.category.unique())
-    )
+def wait_for(name):
+    result, load_timings[name] = futures[name].result()
+    return result
 
-metric_column = "total_sales" if metric_choice == "Sales" else "total_profit"
+# Skeletons only while a query is still running; reruns served from the
+# cache are back within the short wait and go straight to the filled page
+cold_start = bool(wait(futures.values(), timeout=0.05).not_done)
 
 # =====================================================
-# FILTER DATA
+# FILTER BAR + KPI SECTION
 # =====================================================
-# For - Monthly Sales Trend
-df = df_sales[df_sales.year == selected_year]
-
-if selected_region != "All":
-    df = df[df.region == selected_region]
+filter_bar = st.empty()
+kpi_row = st.empty()
 
-if selected_category != "All":
-    df = df[df.category == selected_category]
+if cold_start:
+    with filter_bar.container():
+        for column, label in zip(st.columns(4), ["Year", "Metric", "Region", "Category"]):
+            column.selectbox(label, ["Loading..."], disabled=True)
 
-# FOR : Geo filtering plot(MAP)
+def render_filter_bar(cube):
+    with filter_bar.container():
+        f1, f2, f3, f4 = st.columns(4)
 
-df_geo_filtered = df_geo[df_geo.year == selected_year]
+        with f1:
+            selected_year = st.selectbox("Year", cube.years.tolist())
 
-if selected_region != "All":
-    df_geo_filtered = df_geo_filtered[
-        df_geo_filtered.region == selected_region
-    ]
+        with f2:
+            metric_choice = st.selectbox("Metric", ["Sales", "Profit"])
 
-geo_metric = "total_sales" if metric_choice == "Sales" else "total_profit"
+        with f3:
+            selected_region = st.selectbox(
+                "Region",
+                ["All"] + cube.axes["region"].tolist()
+            )
 
-df_state = (
-    df_geo_filtered
-    .groupby("state")[geo_metric]
-    .sum()
-    .reset_index()
-)
-
-# For: Lead_time_Days gauge
-df_lead_filtered = df_lead[df_lead.year == selected_year]
+        with f4:
+            selected_category = st.selectbox(
+                "Category",
+                ["All"] + cube.axes["category"].tolist()
+            )
 
-if selected_region != "All":
-    df_lead_filtered = df_lead_filtered[
-        df_lead_filtered.region == selected_region
-    ]
+    return selected_year, metric_choice, selected_region, selected_category
 
-if selected_category != "All":
-    df_lead_filtered = df_lead_filtered[
-        df_lead_filtered.category == selected_category
-    ]
-
-# =====================================================
-# KPI SECTION
-# =====================================================
-total_sales = df.total_sales.sum()
-total_profit = df.total_profit.sum()
-total_quantity = df.total_quantity.sum()
-profit_margin = (total_profit / total_sales * 100) if total_sales else 0
+def render_kpis(cube, selected_year, selected_region, selected_category):
+    selection = cube.slice(year=selected_year, region=selected_region, category=selected_category)
 
-k1, k2, k3, k4 = st.columns(4)
+    total_sales = selection.total("total_sales")
+    total_profit = selection.total("total_profit")
+    total_quantity = selection.total("total_quantity")
+    profit_margin = (total_profit / total_sales * 100) if total_sales else 0
 
-k1.metric("Total Sales", f"${total_sales:,.0f}")
-k2.metric("Total Profit", f"${total_profit:,.0f}")
-k3.metric("Quantity", f"{int(total_quantity):,}")
-k4.metric("Profit Margin", f"{profit_margin:.2f}%")
+    with kpi_row.container():
+        k1, k2, k3, k4 = st.columns(4)
 
-# st.divider()
+        k1.metric("Total Sales", f"${total_sales:,.0f}")
+        k2.metric("Total Profit", f"${total_profit:,.0f}")
+        k3.metric("Quantity", f"{int(total_quantity):,}")
+        k4.metric("Profit Margin", f"{profit_margin:.2f}%")
 
 st.markdown("<div style='height:30px'></div>", unsafe_allow_html=True)
 
 # =====================================================
-# CHART 1: MONTHLY TREND (YoY Comparison)
+# FIGURE CACHE
 # =====================================================
+# Every chart's data prep + figure build is memoized on exactly the
+# inputs it depends on (and the cube version), so e.g. switching Metric
+# rebuilds the four metric charts while the gauge and the vendor chart
+# come from cache. Cached figures are shared: never mutate them.
+FIGURE_CACHE_ENTRIES = 256
 
-import plotly.graph_objects as go
-
-# Current Year Data
-df_current = df_sales[df_sales.year == selected_year]
+def cached_figure(build):
+    return st.cache_resource(ttl=600, max_entries=FIGURE_CACHE_ENTRIES, show_spinner=False)(build)
 
-if selected_region != "All":
-    df_current = df_current[df_current.region == selected_region]
-
-if selected_category != "All":
-    df_current = df_current[df_current.category == selected_category]
-
-df_current["date"] = pd.to_datetime(
-    df_current["year"].astype(str) + "-" +
-    df_current["month"].astype(str) + "-01"
-)
-
-df_current_monthly = (
-    df_current.groupby("date")[metric_column]
-    .sum()
-    .reset_index()
-)
-
-# Previous Year Data
-previous_year = selected_year - 1
-df_previous = df_sales[df_sales.year == previous_year]
-
-if selected_region != "All":
-    df_previous = df_previous[df_previous.region == selected_region]
-
-if selected_category != "All":
-    df_previous = df_previous[df_previous.category == selected_category]
-
-df_previous["date"] = pd.to_datetime(
-    df_previous["year"].astype(str) + "-" +
-    df_previous["month"].astype(str) + "-01"
-)
-
-df_previous_monthly = (
-    df_previous.groupby("date")[metric_column]
-    .sum()
-    .reset_index()
-)
+# =====================================================
+# CHART 1: MONTHLY TREND (YoY Comparison)
+# =====================================================
+@cached_figure
+def build_trend_chart(_cube, cube_version, year, region, category, metric_column):
+    previous_year = year - 1
 
-# Align previous year months to current year for overlay
-df_previous_monthly["date"] = df_previous_monthly["date"].apply(
-    lambda x: x.replace(year=selected_year)
-)
+    # Month starts of the selected year; previous year is overlaid on them
+    month_dates = np.datetime64(f"{year}-01", "M") + np.arange(12)
 
-# Create Figure
-fig_trend = go.Figure()
-
-# Current Year Line
-fig_trend.add_trace(go.Scatter(
-    x=df_current_monthly["date"],
-    y=df_current_monthly[metric_column],
-    mode="lines+markers",
-    name=f"{selected_year}",
-    line=dict(shape="spline", width=3, color="#00f5ff"),
-    fill="tozeroy",
-    opacity=0.5,
-    hovertemplate="<b>Date:</b> %{x|%b %Y}<br><b>Value:</b> %{y:$,.0f}"
-))
+    # Current Year Data
+    current_months, current_values = (
+        _cube.slice(year=year, region=region, category=category).by("month", metric_column)
+    )
 
-# Previous Year Line
-fig_trend.add_trace(go.Scatter(
-    x=df_previous_monthly["date"],
-    y=df_previous_monthly[metric_column],
-    mode="lines+markers",
-    name=f"{previous_year}",
-    line=dict(shape="spline", width=2, dash="dash", color="#00ff88"),
-    hovertemplate="<b>Date:</b> %{x|%b %Y}<br><b>Value:</b> %{y:$,.0f}"
-))
+    # Previous Year Data
+    previous_months, previous_values = (
+        _cube.slice(year=previous_year, region=region, category=category).by("month", metric_column)
+    )
 
-fig_trend.update_layout(
-    template="plotly_dark",
-    height=220,
-    margin=dict(l=5, r=5, t=30, b=5),
-    hovermode="x unified",
-    transition_duration=600,
-    legend=dict(
-        orientation="h",
-        yanchor="bottom",
-        y=1.02,
-        xanchor="right",
-        x=1
+    # Create Figure
+    fig_trend = go.Figure()
+
+    # Current Year Line
+    fig_trend.add_trace(go.Scatter(
+        x=month_dates[current_months - 1],
+        y=current_values,
+        mode="lines+markers",
+        name=f"{year}",
+        line=dict(shape="spline", width=3, color="#00f5ff"),
+        fill="tozeroy",
+        opacity=0.5,
+        hovertemplate="<b>Date:</b> %{x|%b %Y}<br><b>Value:</b> %{y:$,.0f}"
+    ))
+
+    # Previous Year Line
+    fig_trend.add_trace(go.Scatter(
+        x=month_dates[previous_months - 1],
+        y=previous_values,
+        mode="lines+markers",
+        name=f"{previous_year}",
+        line=dict(shape="spline", width=2, dash="dash", color="#00ff88"),
+        hovertemplate="<b>Date:</b> %{x|%b %Y}<br><b>Value:</b> %{y:$,.0f}"
+    ))
+
+    fig_trend.update_layout(
+        template="plotly_dark",
+        height=220,
+        margin=dict(l=5, r=5, t=30, b=5),
+        hovermode="x unified",
+        transition_duration=600,
+        legend=dict(
+            orientation="h",
+            yanchor="bottom",
+            y=1.02,
+            xanchor="right",
+            x=1
+        )
     )
-)
+    return fig_trend
 
 # =====================================================
 # CHART 2: CATEGORY DISTRIBUTION 
 # =====================================================
+@cached_figure
+def build_category_chart(_cube, cube_version, year, region, category, metric_column):
+    # Aggregate Category Data
+    categories, category_values = (
+        _cube.slice(year=year, region=region, category=category).by("category", metric_column)
+    )
 
-import plotly.graph_objects as go
-
-# Aggregate Category Data
-df_cat = (
-    df.groupby("category")[metric_column]
-    .sum()
-    .reset_index()
-)
-
-total_value = df_cat[metric_column].sum()
-
-fig_donut = go.Figure()
-
-fig_donut.add_trace(go.Pie(
-    labels=df_cat["category"],
-    values=df_cat[metric_column],
-    hole=0.6,
-    pull=[0.03]*len(df_cat),
-    textinfo="percent",
-    textfont=dict(size=13),
-    hovertemplate="<b>%{label}</b><br>Value: %{value:$,.0f}<br>Share: %{percent}",
-))
-
-# Add Center Metric
-fig_donut.add_annotation(
-    text=f"${total_value:,.0f}",
-    x=0.5, y=0.5,
-    font=dict(size=18, color="white"),
-    showarrow=False
-)
+    total_value = category_values.sum()
+
+    fig_donut = go.Figure()
+
+    fig_donut.add_trace(go.Pie(
+        labels=categories,
+        values=category_values,
+        hole=0.6,
+        pull=[0.03]*len(categories),
+        textinfo="percent",
+        textfont=dict(size=13),
+        hovertemplate="<b>%{label}</b><br>Value: %{value:$,.0f}<br>Share: %{percent}",
+    ))
+
+    # Add Center Metric
+    fig_donut.add_annotation(
+        text=f"${total_value:,.0f}",
+        x=0.5, y=0.5,
+        font=dict(size=18, color="white"),
+        showarrow=False
+    )
 
-fig_donut.update_layout(
-    template="plotly_dark",
-    height=220,
-    margin=dict(l=5, r=5, t=30, b=5),
-    showlegend=True,
-    legend=dict(
-        orientation="v",
-        yanchor="middle",
-        y=0.5,
-        xanchor="left",
-        x=1.02
-    ),
-    transition_duration=600
-)
+    fig_donut.update_layout(
+        template="plotly_dark",
+        height=220,
+        margin=dict(l=5, r=5, t=30, b=5),
+        showlegend=True,
+        legend=dict(
+            orientation="v",
+            yanchor="middle",
+            y=0.5,
+            xanchor="left",
+            x=1.02
+        ),
+        transition_duration=600
+    )
+    return fig_donut
 
 # =====================================================
 # CHART 3: USA STATE MAP
@@ -426,126 +415,212 @@ us_state_abbrev = {
     # Add all states here
 }
 
-df_state["state_code"] = df_state["state"].map(us_state_abbrev)
-
-fig_map = px.choropleth(
-    df_state,
-    locations="state_code",
-    locationmode="USA-states",
-    color=geo_metric,
-    scope="usa",
-    template="plotly_dark"
-)
+@cached_figure
+def build_map_chart(_cube, cube_version, year, region, geo_metric):
+    # Not filtered by category
+    states, state_values = _cube.slice(year=year, region=region).by("state", geo_metric)
+    state_codes = [us_state_abbrev.get(state) for state in states]
+
+    fig_map = px.choropleth(
+        locations=state_codes,
+        locationmode="USA-states",
+        color=state_values,
+        labels={"color": geo_metric},
+        scope="usa",
+        template="plotly_dark"
+    )
 
-fig_map.update_layout(
-    height=230,
-    margin=dict(l=5,r=5,t=30,b=5),
-    geo = dict(
-        bgcolor = "rgba(0,0,0,0)",
-        showlakes = True,
-        lakecolor = 'rgb(20,20,30)'
-    ),
-    transition_duration = 600
-)
-fig_map.update_traces(
-    hovertemplate="<b>State:</b> %{location}<br><b>Value:</b> %{z:$,.0f}"
-)
+    fig_map.update_layout(
+        height=230,
+        margin=dict(l=5,r=5,t=30,b=5),
+        geo = dict(
+            bgcolor = "rgba(0,0,0,0)",
+            showlakes = True,
+            lakecolor = 'rgb(20,20,30)'
+        ),
+        transition_duration = 600
+    )
+    fig_map.update_traces(
+        hovertemplate="<b>State:</b> %{location}<br><b>Value:</b> %{z:$,.0f}"
+    )
+    return fig_map
 
 
 # =====================================================
 # CHART 4: REGION
 # =====================================================
+@cached_figure
+def build_region_chart(_cube, cube_version, year, region, category, metric_column, metric_label):
+    regions, region_values = (
+        _cube.slice(year=year, region=region, category=category).by("region", metric_column)
+    )
+    order = np.argsort(-region_values)
+
+    fig_region = px.bar(
+        x=regions[order],
+        y=region_values[order],
+        text=region_values[order],
+        color=region_values[order],
+        labels={"color": metric_column},
+        color_continuous_scale="Blues"
+    )
 
-df_region = (
-    df.groupby("region")[metric_column]
-    .sum()
-    .reset_index()
-    .sort_values(metric_column, ascending=False)
-)
-
-fig_region = px.bar(
-    df_region,
-    x="region",
-    y=metric_column,
-    text=metric_column,
-    color=metric_column,
-    color_continuous_scale="Blues"
-)
-
-fig_region.update_traces(
-    texttemplate="%{text:$,.0f}",
-    textposition="outside",
-    marker_line_color="white",
-    marker_line_width=1.5
-)
+    fig_region.update_traces(
+        texttemplate="%{text:$,.0f}",
+        textposition="outside",
+        marker_line_color="white",
+        marker_line_width=1.5
+    )
 
-fig_region.update_layout(
-    template="plotly_dark",
-    height=230,
-    margin=dict(l=5, r=5, t=30, b=5),
-    showlegend=False,
-    yaxis_title=metric_choice,
-    xaxis_title="Region",
-    transition_duration=600
-)
+    fig_region.update_layout(
+        template="plotly_dark",
+        height=230,
+        margin=dict(l=5, r=5, t=30, b=5),
+        showlegend=False,
+        yaxis_title=metric_label,
+        xaxis_title="Region",
+        transition_duration=600
+    )
+    return fig_region
 
 # =====================================================
 # CHART 5: VENDOR SALES
 # =====================================================
-fig_vendor_sales = px.bar(
-    df_vendor.sort_values("total_sales", ascending=True),
-    x="total_sales",
-    y="vendor_name",
-    orientation="h",
-    template="plotly_dark",
-    color="total_sales",
-    color_continuous_scale="blues"
-)
+# Built once the vendor query has arrived (see the grid below)
+@cached_figure
+def build_vendor_chart(_vendor_table, loaded_at):
+    fig_vendor_sales = px.bar(
+        # Sorted in the warehouse; pandas only for plotting
+        _vendor_table.to_pandas(),
+        x="total_sales",
+        y="vendor_name",
+        orientation="h",
+        template="plotly_dark",
+        color="total_sales",
+        color_continuous_scale="blues"
+    )
 
-fig_vendor_sales.update_layout(
-    height=230,
-    margin=dict(l=5,r=5,t=30,b=5),
-    hovermode = "y unified",
-    transition_duration = 600
-)
+    fig_vendor_sales.update_layout(
+        height=230,
+        margin=dict(l=5,r=5,t=30,b=5),
+        hovermode = "y unified",
+        transition_duration = 600
+    )
+
+    fig_vendor_sales.update_traces(opacity=0.9)
+    return fig_vendor_sales
+
+
+# Rolling 3-month vendor trend over the selected year
+VENDOR_TRENDS = {
+    "On-Time Trend": "on_time_rate_3m",
+    "Lead Time Trend": "avg_lead_time_3m",
+}
+
+@cached_figure
+def build_vendor_trend_chart(_vendor_trend, loaded_at, year, measure):
+    rows = _vendor_trend.filter(pc.equal(_vendor_trend["year"], year))
+
+    fig_vendor_trend = px.line(
+        rows.to_pandas(),
+        x="month_start",
+        y=measure,
+        color="vendor_name",
+        markers=True,
+        template="plotly_dark",
+        hover_data=["orders_3m"]
+    )
+
+    fig_vendor_trend.update_layout(
+        height=230,
+        margin=dict(l=5,r=5,t=30,b=5),
+        hovermode="x unified",
+        legend_title_text="",
+        xaxis_title="",
+        yaxis_title="",
+        transition_duration=600
+    )
 
-fig_vendor_sales.update_traces(opacity=0.9)
+    if measure == "on_time_rate_3m":
+        fig_vendor_trend.update_yaxes(tickformat=".0%")
+    return fig_vendor_trend
 
 
 # =====================================================
 # CHART 6: VENDOR LEAD TIME
 # =====================================================
-import plotly.graph_objects as go
+@cached_figure
+def build_lead_time_chart(_cube, cube_version, year, region, category):
+    # Mean of the per region / category averages, as in vw_lead_time_mart
+    avg_lead = (
+        _cube.slice(year=year, region=region, category=category)
+        .group_average("total_lead_time", groups=("region", "category"))
+    )
 
-avg_lead = df_lead_filtered["avg_lead_time"].mean()
-
-fig_vendor_lead = go.Figure(go.Indicator(
-    mode="gauge+number",
-    value=avg_lead,
-    number={'suffix': " days"},
-    # title={'text': "Avg Vendor Lead Time"},
-    gauge={
-        'axis': {'range': [0, 10]},
-        'bar': {'color': "#00f5ff"},
-        'steps': [
-            {'range': [0, 4], 'color': "#00ff88"},
-            {'range': [4, 7], 'color': "#ffcc00"},
-            {'range': [7, 10], 'color': "#ff4d4d"}
-        ],
-        'threshold': {
-            'line': {'color': "white", 'width': 4},
-            'thickness': 0.75,
-            'value': 5
+    fig_vendor_lead = go.Figure(go.Indicator(
+        mode="gauge+number",
+        value=avg_lead,
+        number={'suffix': " days"},
+        # title={'text': "Avg Vendor Lead Time"},
+        gauge={
+            'axis': {'range': [0, 10]},
+            'bar': {'color': "#00f5ff"},
+            'steps': [
+                {'range': [0, 4], 'color': "#00ff88"},
+                {'range': [4, 7], 'color': "#ffcc00"},
+                {'range': [7, 10], 'color': "#ff4d4d"}
+            ],
+            'threshold': {
+                'line': {'color': "white", 'width': 4},
+                'thickness': 0.75,
+                'value': 5
+            }
         }
-    }
-))
+    ))
 
-fig_vendor_lead.update_layout(
-    template="plotly_dark",
-    height=220,
-    margin=dict(l=5,r=5,t=30,b=5),
-    # transition_duration = 800
-)
+    fig_vendor_lead.update_layout(
+        template="plotly_dark",
+        height=220,
+        margin=dict(l=5,r=5,t=30,b=5),
+        # transition_duration = 800
+    )
+    return fig_vendor_lead
+
+# =====================================================
+# CHART SECTIONS
+# =====================================================
+# Each section is a fragment, so it can rerun on its own without
+# re-executing the rest of the page.
+
+def section_header(title):
+    st.markdown(f'<div class="section-title">{title}</div>', unsafe_allow_html=True)
+    st.markdown('<div class="section-divider"></div>', unsafe_allow_html=True)
+
+@st.fragment
+def chart_section(title, build, *inputs):
+    section_header(title)
+    st.plotly_chart(build(cube, cube.version, *inputs), use_container_width=True)
+
+def vendor_ranking(vendor_table, key=None):
+    loaded_at = vendor_table.schema.metadata[b"loaded_at"]
+    st.plotly_chart(build_vendor_chart(vendor_table, loaded_at), use_container_width=True, key=key)
+
+@st.fragment
+def vendor_section(year):
+    section_header("🏢 Vendor Performance")
+    view = st.radio("Vendor view", ["Sales Ranking"] + list(VENDOR_TRENDS),
+                    horizontal=True, label_visibility="collapsed")
+
+    if view == "Sales Ranking":
+        with st.spinner("Loading vendors..."):
+            vendor_ranking(wait_for("vw_vendor_performance"))
+        return
+
+    with st.spinner("Loading vendor trends..."):
+        vendor_trend = wait_for("vw_vendor_monthly")
+    loaded_at = vendor_trend.schema.metadata[b"loaded_at"]
+    st.plotly_chart(build_vendor_trend_chart(vendor_trend, loaded_at, year, VENDOR_TRENDS[view]),
+                    use_container_width=True)
 
 # =====================================================
 # ENTERPRISE 3x2 GRID (NO SCROLL)
@@ -553,32 +628,85 @@ fig_vendor_lead.update_layout(
 r1c1, r1c2, r1c3 = st.columns(3)
 r2c1, r2c2, r2c3 = st.columns(3)
 
-with r1c1:
-    st.markdown('<div class="section-title">📈 Monthly Sales Trend</div>', unsafe_allow_html=True)
-    st.markdown('<div class="section-divider"></div>', unsafe_allow_html=True)
-    st.plotly_chart(fig_trend, use_container_width=True)
+SECTIONS = {
+    "trend": (r1c1, "📈 Monthly Sales Trend"),
+    "category": (r1c2, "🗂 Category Distribution"),
+    "map": (r1c3, "🗺 State-wise Sales"),
+    "region": (r2c1, "🌍 Region Performance"),
+    "vendor": (r2c2, "🏢 Vendor Performance"),
+    "lead_time": (r2c3, "⏱ Average Vendor Lead Time"),
+}
+slots = {name: column.empty() for name, (column, _) in SECTIONS.items()}
 
-with r1c2:
-    st.markdown('<div class="section-title">🗂 Category Distribution</div>', unsafe_allow_html=True)
-    st.markdown('<div class="section-divider"></div>', unsafe_allow_html=True)
-    st.plotly_chart(fig_donut, use_container_width=True)
+def preview(name):
+    # A single block in the slot, so the section replacing it (a fragment,
+    # itself one block) leaves no stale elements behind
+    return slots[name].container().container()
 
-with r1c3:
-    st.markdown('<div class="section-title">🗺 State-wise Sales</div>', unsafe_allow_html=True)
-    st.markdown('<div class="section-divider"></div>', unsafe_allow_html=True)
-    st.plotly_chart(fig_map, use_container_width=True)
+if cold_start:
+    for name, (_, title) in SECTIONS.items():
+        with preview(name):
+            section_header(title)
+            st.caption("Loading...")
 
-with r2c1:
-    st.markdown('<div class="section-title">🌍 Region Performance</div>', unsafe_allow_html=True)
-    st.markdown('<div class="section-divider"></div>', unsafe_allow_html=True)
-    st.plotly_chart(fig_region, use_container_width=True)
+def render_cube_sections(filters):
+    selected_year, metric_choice, selected_region, selected_category = filters
+    metric_column = "total_sales" if metric_choice == "Sales" else "total_profit"
+    geo_metric = "total_sales" if metric_choice == "Sales" else "total_profit"
 
-with r2c2:
-    st.markdown('<div class="section-title">🏢 Vendor Sales Ranking</div>', unsafe_allow_html=True)
-    st.markdown('<div class="section-divider"></div>', unsafe_allow_html=True)
-    st.plotly_chart(fig_vendor_sales, use_container_width=True)
+    with slots["trend"].container():
+        chart_section("📈 Monthly Sales Trend", build_trend_chart,
+                      selected_year, selected_region, selected_category, metric_column)
 
-with r2c3:
-    st.markdown('<div class="section-title">⏱ Average Vendor Lead Time</div>', unsafe_allow_html=True)
-    st.markdown('<div class="section-divider"></div>', unsafe_allow_html=True)
-    st.plotly_chart(fig_vendor_lead, use_container_width=True)
\ No newline at end of file
+    with slots["category"].container():
+        chart_section("🗂 Category Distribution", build_category_chart,
+                      selected_year, selected_region, selected_category, metric_column)
+
+    with slots["map"].container():
+        chart_section("🗺 State-wise Sales", build_map_chart,
+                      selected_year, selected_region, geo_metric)
+
+    with slots["region"].container():
+        chart_section("🌍 Region Performance", build_region_chart,
+                      selected_year, selected_region, selected_category, metric_column, metric_choice)
+
+    with slots["lead_time"].container():
+        chart_section("⏱ Average Vendor Lead Time", build_lead_time_chart,
+                      selected_year, selected_region, selected_category)
+
+# =====================================================
+# PROGRESSIVE RENDERING
+# =====================================================
+# Sections are filled in the order their queries finish. Everything but
+# the vendor charts comes from the cube; the vendor ranking is drawn as
+# soon as its query is back and becomes the interactive vendor section
+# (which needs the selected year) once the cube has arrived.
+names = {future: name for name, future in futures.items()}
+cube = None
+filters = None
+
+for future in as_completed(futures.values()):
+    name = names[future]
+    result, load_timings[name] = future.result()
+
+    if name == "vw_sales_cube":
+        cube = result
+        filters = render_filter_bar(cube)
+        render_kpis(cube, filters[0], filters[2], filters[3])
+        render_cube_sections(filters)
+
+        with slots["vendor"].container():
+            vendor_section(filters[0])
+
+    elif name == "vw_vendor_performance" and cube is None:
+        with preview("vendor"):
+            section_header("🏢 Vendor Performance")
+            # Same chart the vendor section draws next, so its own element id
+            vendor_ranking(result, key="vendor_ranking_preview")
+
+# =====================================================
+# QUERY TIMINGS (cold start; cache hits show ~0 ms)
+# =====================================================
+st.caption("Query timings: " + " · ".join(
+    f"{name} {load_timings[name] * 1000:.0f} ms" for name in futures
+))
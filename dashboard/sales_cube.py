@@ -0,0 +1,128 @@
+"""
+Sales Cube
+----------
+Pre-aggregated, in-memory cube behind the dashboard.
+
+Built once per data refresh from the Arrow result of vw_sales_cube;
+dictionary-encoded columns are read as integer codes, never as one
+Python string per row. Every measure is a dense numpy array indexed by
+(year, month, region, category, state), so a filter selection is a basic
+slice (a view, no copy) and every KPI or chart is a sum over a few axes
+of that slice. No pandas filtering or groupby runs on a rerun.
+"""
+
+import time
+
+import numpy as np
+
+from src.utils.columnar import dictionary_codes
+
+DIMENSIONS = ("year", "month", "region", "category", "state")
+
+MEASURES = ("total_sales", "total_profit", "total_quantity", "total_lead_time", "order_lines")
+
+MONTHS = np.arange(1, 13)
+
+ALL = "All"
+
+
+class SalesCube:
+
+    def __init__(self, axes, values, version=None):
+        """
+        axes maps each dimension to its labels; values maps each measure
+        to an array of shape (len(axes[d]) for d in DIMENSIONS). version
+        identifies the data refresh the cube was built from.
+        """
+        self.axes = axes
+        self.values = values
+        self.version = version
+        self.index = {dim: {label: i for i, label in enumerate(labels)} for dim, labels in axes.items()}
+
+    @classmethod
+    def from_arrow(cls, table):
+        axes = {}
+        codes = []
+
+        for dim in DIMENSIONS:
+            column = table.column(dim)
+            if dim == "month":
+                # Always 12 months, so trends line up across years
+                labels = MONTHS
+                dim_codes = column.to_numpy().astype(np.intp) - 1
+            elif dim == "year":
+                labels, dim_codes = np.unique(column.to_numpy(), return_inverse=True)
+            else:
+                labels, dim_codes = dictionary_codes(column)
+            axes[dim] = labels
+            codes.append(dim_codes)
+
+        shape = tuple(len(axes[dim]) for dim in DIMENSIONS)
+        cells = np.ravel_multi_index(codes, shape)
+
+        values = {
+            measure: np.bincount(cells, weights=table.column(measure).to_numpy().astype(float),
+                                 minlength=int(np.prod(shape))).reshape(shape)
+            for measure in MEASURES
+        }
+
+        return cls(axes, values, version=time.time_ns())
+
+    def _selector(self, dim, label):
+        if label is None or label == ALL:
+            return slice(None)
+        i = self.index[dim].get(label)
+        if i is None:
+            return slice(0, 0)
+        return slice(i, i + 1)
+
+    def slice(self, **filters):
+        """
+        Sub-cube for {dimension: label} filters; None / "All" keeps the
+        whole axis. Dimensions are kept (length 1), and the arrays are views.
+        """
+        selectors = tuple(self._selector(dim, filters.get(dim)) for dim in DIMENSIONS)
+
+        axes = {dim: self.axes[dim][sel] for dim, sel in zip(DIMENSIONS, selectors)}
+        values = {measure: array[selectors] for measure, array in self.values.items()}
+        return SalesCube(axes, values, version=self.version)
+
+    def total(self, measure):
+        return float(self.values[measure].sum())
+
+    def by(self, dim, measure, drop_empty=True):
+        """
+        Rolls measure up to one value per label of dim.
+        Returns (labels, values); labels without any order lines are
+        dropped unless drop_empty is False.
+        """
+        axis = DIMENSIONS.index(dim)
+        others = tuple(i for i in range(len(DIMENSIONS)) if i != axis)
+
+        labels = self.axes[dim]
+        totals = self.values[measure].sum(axis=others)
+
+        if drop_empty:
+            present = self.values["order_lines"].sum(axis=others) > 0
+            labels, totals = labels[present], totals[present]
+
+        return labels, totals
+
+    def group_average(self, measure, groups, count="order_lines"):
+        """
+        Unweighted mean over groups (dimension names) of each group's
+        measure / count, ignoring empty groups.
+        """
+        others = tuple(i for i, dim in enumerate(DIMENSIONS) if dim not in groups)
+
+        sums = self.values[measure].sum(axis=others)
+        counts = self.values[count].sum(axis=others)
+
+        present = counts > 0
+        if not present.any():
+            return float("nan")
+        return float((sums[present] / counts[present]).mean())
+
+    @property
+    def years(self):
+        return self.axes["year"]
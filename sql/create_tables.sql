@@ -1,5 +1,5 @@
 -- Create dim_date
-CREATE TABLE IF NOT EXISTS `supply-chain-dw.supply_chain_dw.dim_date` (
+CREATE TABLE IF NOT EXISTS `{dataset}.dim_date` (
     date_key INT64,
     full_date DATE,
     year INT64,
@@ -9,24 +9,30 @@ CREATE TABLE IF NOT EXISTS `supply-chain-dw.supply_chain_dw.dim_date` (
 );
 
 -- Create dim_customer
-CREATE TABLE IF NOT EXISTS `supply-chain-dw.supply_chain_dw.dim_customer` (
+CREATE TABLE IF NOT EXISTS `{dataset}.dim_customer` (
     customer_key INT64,
     customer_id STRING,
     customer_name STRING,
-    segment STRING
+    segment STRING,
+    valid_from DATE,
+    valid_to DATE,
+    is_current BOOL
 );
 
 -- Create dim_location
-CREATE TABLE IF NOT EXISTS `supply-chain-dw.supply_chain_dw.dim_location` (
+CREATE TABLE IF NOT EXISTS `{dataset}.dim_location` (
     location_key INT64,
     country STRING,
     state STRING,
     city STRING,
-    region STRING
+    region STRING,
+    valid_from DATE,
+    valid_to DATE,
+    is_current BOOL
 );
 
 -- Create dim_product
-CREATE TABLE IF NOT EXISTS `supply-chain-dw.supply_chain_dw.dim_product` (
+CREATE TABLE IF NOT EXISTS `{dataset}.dim_product` (
     product_key INT64,
     product_id STRING,
     category STRING,
@@ -34,13 +40,17 @@ CREATE TABLE IF NOT EXISTS `supply-chain-dw.supply_chain_dw.dim_product` (
     product_name STRING,
     product_price FLOAT64,
     rating_rate FLOAT64,
-    rating_count INT64
+    rating_count INT64,
+    valid_from DATE,
+    valid_to DATE,
+    is_current BOOL
 );
 
 -- Create fact_orders
-CREATE TABLE IF NOT EXISTS `supply-chain-dw.supply_chain_dw.fact_orders` (
+CREATE TABLE IF NOT EXISTS `{dataset}.fact_orders` (
     order_key INT64,
     order_id STRING,
+    order_date DATE,
     date_key INT64,
     customer_key INT64,
     location_key INT64,
@@ -50,4 +60,139 @@ CREATE TABLE IF NOT EXISTS `supply-chain-dw.supply_chain_dw.fact_orders` (
     discount FLOAT64,
     profit FLOAT64,
     lead_time_days INT64
-);
\ No newline at end of file
+)
+PARTITION BY order_date
+CLUSTER BY product_key, customer_key;
+
+-- Create dim_vendor
+CREATE TABLE IF NOT EXISTS `{dataset}.dim_vendor` (
+    vendor_key INT64,
+    vendor_name STRING
+);
+
+-- Create bridge_product_vendor (type 2: a product may change vendor)
+CREATE TABLE IF NOT EXISTS `{dataset}.bridge_product_vendor` (
+    product_vendor_key INT64,
+    product_key INT64,
+    vendor_key INT64,
+    valid_from DATE,
+    valid_to DATE,
+    is_current BOOL
+);
+
+-- Create fact_inventory
+CREATE TABLE IF NOT EXISTS `{dataset}.fact_inventory` (
+    product_key INT64,
+    product_name STRING,
+    total_quantity INT64,
+    initial_stock INT64,
+    reorder_point FLOAT64,
+    order_quantity INT64,
+    current_stock INT64,
+    inventory_turnover FLOAT64,
+    days_inventory_outstanding FLOAT64,
+    stockout_probability FLOAT64,
+    fill_rate FLOAT64,
+    average_holding_level FLOAT64
+);
+
+-- Create fact_vendor_performance
+CREATE TABLE IF NOT EXISTS `{dataset}.fact_vendor_performance` (
+    vendor_key INT64,
+    vendor_name STRING,
+    total_orders INT64,
+    avg_lead_time FLOAT64,
+    total_sales FLOAT64
+);
+
+-- Create fact_vendor_monthly (src/marts/create_vendor_monthly.py)
+CREATE TABLE IF NOT EXISTS `{dataset}.fact_vendor_monthly` (
+    vendor_key INT64,
+    vendor_name STRING,
+    month_key INT64,
+    month_start DATE,
+    total_orders INT64,
+    total_sales FLOAT64,
+    total_lead_time INT64,
+    on_time_orders INT64,
+    avg_lead_time FLOAT64,
+    on_time_rate FLOAT64,
+    orders_3m INT64,
+    sales_3m FLOAT64,
+    avg_lead_time_3m FLOAT64,
+    on_time_rate_3m FLOAT64,
+    orders_6m INT64,
+    sales_6m FLOAT64,
+    avg_lead_time_6m FLOAT64,
+    on_time_rate_6m FLOAT64,
+    orders_12m INT64,
+    sales_12m FLOAT64,
+    avg_lead_time_12m FLOAT64,
+    on_time_rate_12m FLOAT64,
+    sla_days INT64
+)
+PARTITION BY month_start
+CLUSTER BY vendor_key;
+
+-- Create fact_inventory_daily (src/marts/create_inventory_simulation.py)
+CREATE TABLE IF NOT EXISTS `{dataset}.fact_inventory_daily` (
+    date_key INT64,
+    product_key INT64,
+    snapshot_date DATE,
+    demand_quantity INT64,
+    reorders INT64,
+    received_quantity INT64,
+    stock_on_hand INT64,
+    backordered_quantity INT64
+)
+PARTITION BY snapshot_date
+CLUSTER BY product_key;
+
+-- Materialized marts (src/warehouse/refresh_marts.py, sql/marts/).
+-- month_key = year * 100 + month is the refresh unit.
+
+-- Create mart_sales (behind vw_sales_mart and vw_lead_time_mart)
+CREATE TABLE IF NOT EXISTS `{dataset}.mart_sales` (
+    month_key INT64,
+    year INT64,
+    month INT64,
+    region STRING,
+    category STRING,
+    total_sales FLOAT64,
+    total_profit FLOAT64,
+    total_quantity INT64,
+    total_lead_time INT64,
+    order_lines INT64
+)
+CLUSTER BY month_key;
+
+-- Create mart_geo_sales (behind vw_geo_sales)
+CREATE TABLE IF NOT EXISTS `{dataset}.mart_geo_sales` (
+    month_key INT64,
+    year INT64,
+    month INT64,
+    country STRING,
+    region STRING,
+    state STRING,
+    city STRING,
+    total_sales FLOAT64,
+    total_profit FLOAT64,
+    total_quantity INT64
+)
+CLUSTER BY month_key;
+
+-- Create mart_sales_cube (behind vw_sales_cube)
+CREATE TABLE IF NOT EXISTS `{dataset}.mart_sales_cube` (
+    month_key INT64,
+    year INT64,
+    month INT64,
+    region STRING,
+    category STRING,
+    state STRING,
+    total_sales FLOAT64,
+    total_profit FLOAT64,
+    total_quantity INT64,
+    total_lead_time INT64,
+    order_lines INT64
+)
+CLUSTER BY month_key;
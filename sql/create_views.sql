@@ -0,0 +1,92 @@
+-- Analytical views queried by the dashboard.
+-- Written in SQL common to BigQuery and DuckDB, so both warehouse
+-- backends create them from this file. They read the materialized marts
+-- (sql/marts/, refreshed by src/warehouse/refresh_marts.py), so their
+-- cost does not grow with fact_orders.
+
+-- Create vw_sales_mart
+CREATE OR REPLACE VIEW `{dataset}.vw_sales_mart` AS
+SELECT
+    year,
+    month,
+    region,
+    category,
+    total_sales,
+    total_profit,
+    total_quantity
+FROM `{dataset}.mart_sales`;
+
+-- Create vw_geo_sales
+CREATE OR REPLACE VIEW `{dataset}.vw_geo_sales` AS
+SELECT
+    year,
+    month,
+    country,
+    region,
+    state,
+    city,
+    total_sales,
+    total_profit,
+    total_quantity
+FROM `{dataset}.mart_geo_sales`;
+
+-- Create vw_vendor_performance
+CREATE OR REPLACE VIEW `{dataset}.vw_vendor_performance` AS
+SELECT
+    vendor_key,
+    vendor_name,
+    total_orders,
+    avg_lead_time,
+    total_sales
+FROM `{dataset}.fact_vendor_performance`;
+
+-- Create vw_vendor_monthly (rolling 3/6/12-month vendor trends)
+CREATE OR REPLACE VIEW `{dataset}.vw_vendor_monthly` AS
+SELECT
+    vendor_key,
+    vendor_name,
+    month_start,
+    EXTRACT(YEAR FROM month_start) AS year,
+    total_orders,
+    total_sales,
+    avg_lead_time,
+    on_time_rate,
+    orders_3m,
+    sales_3m,
+    avg_lead_time_3m,
+    on_time_rate_3m,
+    orders_6m,
+    sales_6m,
+    avg_lead_time_6m,
+    on_time_rate_6m,
+    orders_12m,
+    sales_12m,
+    avg_lead_time_12m,
+    on_time_rate_12m,
+    sla_days
+FROM `{dataset}.fact_vendor_monthly`;
+
+-- Create vw_lead_time_mart
+CREATE OR REPLACE VIEW `{dataset}.vw_lead_time_mart` AS
+SELECT
+    year,
+    region,
+    category,
+    SUM(total_lead_time) / SUM(order_lines) AS avg_lead_time
+FROM `{dataset}.mart_sales`
+GROUP BY year, region, category;
+
+-- Create vw_sales_cube (dashboard cube grain; lead time kept additive)
+CREATE OR REPLACE VIEW `{dataset}.vw_sales_cube` AS
+SELECT
+    year,
+    month,
+    region,
+    category,
+    state,
+    total_sales,
+    total_profit,
+    total_quantity,
+    total_lead_time,
+    order_lines
+FROM `{dataset}.mart_sales_cube`;
@@ -0,0 +1,18 @@
+-- Sales at (year, month, state, city) grain, with country and region.
+-- The WHERE placeholder restricts a refresh to the affected months.
+SELECT
+    d.year * 100 + d.month AS month_key,
+    d.year,
+    d.month,
+    l.country,
+    l.region,
+    l.state,
+    l.city,
+    SUM(f.sales) AS total_sales,
+    SUM(f.profit) AS total_profit,
+    SUM(f.quantity) AS total_quantity
+FROM `{dataset}.fact_orders` f
+JOIN `{dataset}.dim_date` d ON f.date_key = d.date_key
+JOIN `{dataset}.dim_location` l ON f.location_key = l.location_key
+WHERE {scope}
+GROUP BY d.year, d.month, l.country, l.region, l.state, l.city
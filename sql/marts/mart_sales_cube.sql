@@ -0,0 +1,20 @@
+-- Dashboard cube at (year, month, region, category, state) grain.
+-- The WHERE placeholder restricts a refresh to the affected months.
+SELECT
+    d.year * 100 + d.month AS month_key,
+    d.year,
+    d.month,
+    l.region,
+    p.category,
+    l.state,
+    SUM(f.sales) AS total_sales,
+    SUM(f.profit) AS total_profit,
+    SUM(f.quantity) AS total_quantity,
+    SUM(f.lead_time_days) AS total_lead_time,
+    COUNT(*) AS order_lines
+FROM `{dataset}.fact_orders` f
+JOIN `{dataset}.dim_date` d ON f.date_key = d.date_key
+JOIN `{dataset}.dim_location` l ON f.location_key = l.location_key
+JOIN `{dataset}.dim_product` p ON f.product_key = p.product_key
+WHERE {scope}
+GROUP BY d.year, d.month, l.region, p.category, l.state
@@ -0,0 +1,143 @@
+"""
+Async API Client
+----------------
+Concurrent JSON ingestion client shared by the ingestion stages.
+
+- One aiohttp session (connection pool) is reused for every request.
+- Concurrency is capped per endpoint (and overall by the pool size), so
+  several suppliers / pages can be fetched at once without flooding one.
+- Timeouts, connection errors, 429 and 5xx responses are retried with
+  exponential backoff and jitter; other non-200 responses fail fast.
+- With a ResponseCache, requests are sent conditionally (ETag /
+  Last-Modified) and a 304 reuses the stored payload.
+"""
+
+import asyncio
+import json
+import random
+from urllib.parse import urlsplit
+
+import aiohttp
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class ApiError(Exception):
+    def __init__(self, url, status, message=""):
+        super().__init__(f"API request to {url} failed with status {status} {message}".strip())
+        self.url = url
+        self.status = status
+
+
+class ApiClient:
+
+    def __init__(self, max_connections=20, endpoint_limits=None, default_limit=4,
+                 retries=3, backoff=0.5, timeout=30, cache=None):
+        """
+        endpoint_limits maps an endpoint name (or URL host+path) to the
+        maximum number of requests in flight for it; anything else uses
+        default_limit. cache is an optional ResponseCache.
+        """
+        self.max_connections = max_connections
+        self.endpoint_limits = endpoint_limits or {}
+        self.default_limit = default_limit
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.cache = cache
+
+        self._session = None
+        self._semaphores = {}
+
+    async def __aenter__(self):
+        connector = aiohttp.TCPConnector(limit=self.max_connections)
+        self._session = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+        return self
+
+    async def __aexit__(self, *exc):
+        await self._session.close()
+        self._session = None
+
+    def _semaphore(self, endpoint):
+        if endpoint not in self._semaphores:
+            limit = self.endpoint_limits.get(endpoint, self.default_limit)
+            self._semaphores[endpoint] = asyncio.Semaphore(limit)
+        return self._semaphores[endpoint]
+
+    async def _sleep_before_retry(self, attempt):
+        # Exponential backoff with jitter: backoff * 2^attempt * [0.5, 1.5)
+        await asyncio.sleep(self.backoff * (2 ** attempt) * (0.5 + random.random()))
+
+    async def get_json(self, url, params=None, endpoint=None):
+        payload, _ = await self.get_json_conditional(url, params, endpoint)
+        return payload
+
+    async def get_json_conditional(self, url, params=None, endpoint=None):
+        """
+        Returns (payload, changed). changed is False when the server answered
+        304 Not Modified and the payload came from the response cache.
+        """
+        if self._session is None:
+            raise RuntimeError("ApiClient must be used as 'async with ApiClient() as client'")
+
+        if endpoint is None:
+            parts = urlsplit(url)
+            endpoint = parts.netloc + parts.path
+
+        headers = self.cache.conditional_headers(url, params) if self.cache else {}
+
+        async with self._semaphore(endpoint):
+            for attempt in range(self.retries + 1):
+                last_attempt = attempt == self.retries
+                try:
+                    async with self._session.get(url, params=params, headers=headers) as response:
+                        if response.status == 304 and headers:
+                            _, body = self.cache.get(url, params)
+                            return json.loads(body), False
+
+                        if response.status == 200:
+                            body = await response.read()
+                            if self.cache:
+                                self.cache.store(url, params, response.headers, body)
+                            return json.loads(body), True
+
+                        if response.status not in RETRY_STATUSES or last_attempt:
+                            raise ApiError(url, response.status, await response.text())
+
+                except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                    if last_attempt:
+                        raise ApiError(url, None, repr(e)) from e
+
+                print(f"Retrying {url} (attempt {attempt + 2} of {self.retries + 1})")
+                await self._sleep_before_retry(attempt)
+
+    async def get_many(self, requests):
+        """
+        Fetches several endpoints concurrently.
+        `requests` maps a name to a URL or to a dict of get_json keyword arguments.
+        Returns {name: payload}; the first failure is raised.
+        """
+        names = list(requests)
+        calls = [
+            self.get_json(**spec) if isinstance(spec, dict) else self.get_json(spec)
+            for spec in requests.values()
+        ]
+        results = await asyncio.gather(*calls)
+        return dict(zip(names, results))
+
+    async def get_pages(self, url, pages, page_param="page", params=None, endpoint=None):
+        # Page requests share the endpoint's concurrency limit
+        calls = [
+            self.get_json(url, params={**(params or {}), page_param: page}, endpoint=endpoint)
+            for page in pages
+        ]
+        return await asyncio.gather(*calls)
+
+
+def fetch_all(requests, **client_options):
+    """Synchronous entry point: fetch a {name: url} mapping concurrently."""
+    async def run():
+        async with ApiClient(**client_options) as client:
+            return await client.get_many(requests)
+
+    return asyncio.run(run())
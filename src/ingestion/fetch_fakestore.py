@@ -1,30 +1,50 @@
-import requests
-import pandas as pd
+import asyncio
+import json
 import os
 
-API_URL = "https://fakestoreapi.com/products"
+from src.ingestion.api_client import ApiClient
+from src.ingestion.http_cache import ResponseCache
 
-RAW_SAVE_PATH = "data/raw/fakestore_products_raw.csv"
+# Overridable so the pipeline can run against the local stub server
+API_URL = os.getenv("FAKESTORE_API_URL", "https://fakestoreapi.com/products")
 
-def fetch_products():
-    response = requests.get(API_URL)
+# Raw API responses are landed as JSON Lines (one product per line),
+# keeping the nested rating object as real JSON
+RAW_SAVE_PATH = "data/raw/fakestore_products_raw.jsonl"
 
-    if response.status_code != 200:
-        raise Exception(f"API failed with status {response.status_code}")
 
-    data = response.json()
-    df = pd.DataFrame(data)
+async def fetch_products_async(client, url=API_URL):
+    # Returns (products, changed); changed is False on a 304 from the cache
+    return await client.get_json_conditional(url, endpoint="fakestore/products")
 
-    return df
 
+def fetch_products(url=API_URL, cache=None, **client_options):
+    if cache is None:
+        cache = ResponseCache()
 
-def save_raw_data(df):
+    async def run():
+        async with ApiClient(cache=cache, **client_options) as client:
+            return await fetch_products_async(client, url)
+
+    return asyncio.run(run())
+
+
+def save_raw_data(products):
     os.makedirs("data/raw", exist_ok=True)
-    df.to_csv(RAW_SAVE_PATH, index=False)
+    with open(RAW_SAVE_PATH, "w", encoding="utf-8") as f:
+        for product in products:
+            f.write(json.dumps(product, ensure_ascii=False) + "\n")
     print(f"Raw API data saved to {RAW_SAVE_PATH}")
 
 
 if __name__ == "__main__":
-    df_products = fetch_products()
-    save_raw_data(df_products)
-    print(df_products.head())
\ No newline at end of file
+    products, changed = fetch_products()
+
+    # An unchanged catalogue leaves the raw file untouched, so the pipeline
+    # runner sees identical input hashes and skips transform_fakestore and
+    # create_dim_product
+    if not changed and os.path.exists(RAW_SAVE_PATH):
+        print(f"Catalogue unchanged (304), keeping {RAW_SAVE_PATH}")
+    else:
+        save_raw_data(products)
+        print(f"{len(products)} products fetched")
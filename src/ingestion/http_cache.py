@@ -0,0 +1,75 @@
+"""
+HTTP Response Cache
+-------------------
+On-disk cache of API responses keyed by URL + query parameters.
+
+For each cached response the validators (ETag / Last-Modified) are kept
+next to the raw body, so the next request can be sent conditionally and a
+304 Not Modified reuses the stored payload instead of downloading it again.
+"""
+
+import hashlib
+import json
+import os
+from datetime import datetime, timezone
+
+CACHE_DIR = "data/raw/.http_cache"
+
+
+class ResponseCache:
+
+    def __init__(self, cache_dir=CACHE_DIR):
+        self.cache_dir = cache_dir
+
+    def _key(self, url, params=None):
+        query = json.dumps(sorted((params or {}).items()), default=str)
+        return hashlib.sha256(f"{url}?{query}".encode()).hexdigest()
+
+    def _paths(self, url, params=None):
+        key = self._key(url, params)
+        base = os.path.join(self.cache_dir, key)
+        return base + ".json", base + ".body"
+
+    def get(self, url, params=None):
+        """Returns (metadata, body bytes) for a cached response, or None."""
+        meta_path, body_path = self._paths(url, params)
+        if not (os.path.exists(meta_path) and os.path.exists(body_path)):
+            return None
+
+        with open(meta_path) as f:
+            metadata = json.load(f)
+        with open(body_path, "rb") as f:
+            body = f.read()
+
+        return metadata, body
+
+    def conditional_headers(self, url, params=None):
+        cached = self.get(url, params)
+        if cached is None:
+            return {}
+
+        metadata, _ = cached
+        headers = {}
+        if metadata.get("etag"):
+            headers["If-None-Match"] = metadata["etag"]
+        if metadata.get("last_modified"):
+            headers["If-Modified-Since"] = metadata["last_modified"]
+        return headers
+
+    def store(self, url, params, headers, body):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        meta_path, body_path = self._paths(url, params)
+
+        metadata = {
+            "url": url,
+            "params": params or {},
+            "etag": headers.get("ETag"),
+            "last_modified": headers.get("Last-Modified"),
+            "fetched_at": datetime.now(timezone.utc).isoformat()
+        }
+
+        # Body first, so metadata never points at a missing payload
+        with open(body_path, "wb") as f:
+            f.write(body)
+        with open(meta_path, "w") as f:
+            json.dump(metadata, f, indent=2)
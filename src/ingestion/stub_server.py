@@ -0,0 +1,167 @@
+"""
+Local Stub API Server
+---------------------
+Serves the landed Fakestore snapshot over HTTP so the ingestion client can
+be exercised without network access.
+
+Routes:
+    GET /products                 all products (?page=&limit= to paginate)
+    GET /products/<id>            a single product
+
+Responses carry ETag / Last-Modified validators and matching conditional
+requests get 304 Not Modified. fail_first makes the first N requests to
+each path fail with fail_status (503 by default) and delay adds latency,
+for exercising retries and concurrency; max_in_flight records the most
+requests served at once.
+
+Usage:
+    python -m src.ingestion.stub_server [--port 8000]
+    FAKESTORE_API_URL=http://127.0.0.1:8000/products python -m src.ingestion.fetch_fakestore
+"""
+
+import argparse
+import hashlib
+import json
+import threading
+import time
+from collections import Counter
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+FIXTURE_PATH = "data/raw/fakestore_products_raw.jsonl"
+
+
+def load_fixture(path=FIXTURE_PATH):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+class StubServer:
+
+    def __init__(self, products=None, host="127.0.0.1", port=0, fail_first=0, delay=0.0,
+                 fail_status=503):
+        self.products = products if products is not None else load_fixture()
+        self.fail_first = fail_first
+        self.fail_status = fail_status
+        self.delay = delay
+        self.request_counts = Counter()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.last_modified = formatdate(time.time(), usegmt=True)
+        self._lock = threading.Lock()
+
+        self.httpd = ThreadingHTTPServer((host, port), self._handler())
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+
+            def do_GET(self):
+                parts = urlsplit(self.path)
+                with server._lock:
+                    server.request_counts[parts.path] += 1
+                    count = server.request_counts[parts.path]
+                    server.in_flight += 1
+                    server.max_in_flight = max(server.max_in_flight, server.in_flight)
+
+                if server.delay:
+                    time.sleep(server.delay)
+
+                # Left before the response goes out, so a client reusing the
+                # connection right away is never counted twice
+                with server._lock:
+                    server.in_flight -= 1
+
+                if count <= server.fail_first:
+                    return self._send(server.fail_status, {"error": "temporarily unavailable"})
+
+                status, body = server.route(parts.path, parse_qs(parts.query))
+                self._send(status, body, conditional=(status == 200))
+
+            def _send(self, status, body, conditional=False):
+                payload = json.dumps(body).encode()
+                etag = '"' + hashlib.sha256(payload).hexdigest()[:32] + '"'
+
+                if conditional and (
+                    self.headers.get("If-None-Match") == etag
+                    or (self.headers.get("If-None-Match") is None
+                        and self.headers.get("If-Modified-Since") == server.last_modified)
+                ):
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.end_headers()
+                    return
+
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                if conditional:
+                    self.send_header("ETag", etag)
+                    self.send_header("Last-Modified", server.last_modified)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def route(self, path, query):
+        segments = [s for s in path.split("/") if s]
+
+        if segments == ["products"]:
+            products = self.products
+            if "page" in query:
+                page = int(query["page"][0])
+                limit = int(query.get("limit", ["10"])[0])
+                products = products[(page - 1) * limit: page * limit]
+            return 200, products
+
+        if len(segments) == 2 and segments[0] == "products" and segments[1].isdigit():
+            product_id = int(segments[1])
+            for product in self.products:
+                if product.get("id") == product_id:
+                    return 200, product
+
+        return 404, {"error": "not found"}
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve the Fakestore snapshot locally")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--fail-first", type=int, default=0)
+    parser.add_argument("--fail-status", type=int, default=503)
+    parser.add_argument("--delay", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = StubServer(port=args.port, fail_first=args.fail_first, delay=args.delay,
+                        fail_status=args.fail_status)
+    print(f"Stub API serving {len(server.products)} products at {server.url}/products")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
@@ -1,64 +1,237 @@
 """
 Inventory Simulation Module
 ---------------------------
-Simulates inventory levels and calculates turnover metrics.
+Rolls daily stock per product over every calendar day spanned by the
+date dimension and derives turnover metrics from it.
+
+Demand is a dense (product x day) matrix built from fact_orders. Stock is
+rolled with whole-array operations, not a loop per product per day, by
+the same engine as the Monte Carlo policy simulation
+(src/marts/simulate_reorder_policy.py):
+
+- D[p, t]  cumulative quantity ordered up to day t
+- stock starts one lot Q above the reorder point, and a lot is ordered
+  whenever the inventory position (on hand + on order) falls below the
+  reorder point: ceil(D[p, t] / Q) - 1 lots ordered by day t
+- a lot ordered on day t arrives after the empirical lead time of that
+  day's order lines (their mean lead_time_days, one day at least)
+- demand that cannot be served from stock on hand is backordered
+
+Each product's reorder point and order quantity are chosen by the Monte
+Carlo policy simulation, starting from a lot sized on its average daily
+demand. Outputs a daily snapshot fact (fact_inventory_daily), replaying
+history under the chosen policy, and the per-product summary
+(fact_inventory) computed from it together with the simulated stockout
+probability, fill rate and holding level.
 """
 
 import pandas as pd
 import numpy as np
-import os
 
-FACT_PATH = "data/processed/fact_orders.csv"
-PRODUCT_PATH = "data/processed/product_dim.csv"
-OUTPUT_PATH = "data/processed/fact_inventory.csv"
+from src.marts.simulate_reorder_policy import replenishments, simulate_reorder_policies
+from src.utils.storage import read_table, write_table
+
+FACT_PATH = "data/processed/fact_orders"
+PRODUCT_PATH = "data/processed/product_dim.parquet"
+DATE_PATH = "data/processed/date_dim.parquet"
+OUTPUT_PATH = "data/processed/fact_inventory.parquet"
+DAILY_OUTPUT_PATH = "data/processed/fact_inventory_daily.parquet"
+
+# Reorder point and order lot, in days of each product's average demand.
+# The lot is the base of the simulated policy grid; both are kept for
+# products without orders.
+REORDER_COVER_DAYS = 14
+ORDER_COVER_DAYS = 30
+
+
+def inventory_policy(total_demand, period_days):
+    """
+    Reorder point and order quantity per product, sized from its average
+    daily demand.
+    """
+    daily_demand = np.asarray(total_demand, dtype=float) / period_days
+
+    reorder_point = np.ceil(daily_demand * REORDER_COVER_DAYS).astype("int64")
+    order_quantity = np.maximum(np.ceil(daily_demand * ORDER_COVER_DAYS), 1).astype("int64")
+
+    return reorder_point, order_quantity
+
+
+def daily_calendar(dates):
+    """
+    Every calendar day from the first to the last date, with its
+    yyyymmdd date_key. Lead times are counted in these days, so days
+    without orders must not be skipped.
+    """
+    days = pd.date_range(dates.min(), dates.max(), freq="D")
+    date_keys = (days.year * 10000 + days.month * 100 + days.day).to_numpy(dtype="int64")
+    return date_keys, days
+
+
+def key_positions(keys, values):
+    """
+    Position of each value in the sorted keys array, -1 when the value is
+    missing (<NA>) or not one of the keys.
+    """
+    values = pd.array(values, dtype="Int64")
+    present = ~np.asarray(values.isna())
+    values = values.to_numpy(dtype="int64", na_value=0)
+    if len(keys) == 0:
+        return np.full(len(values), -1)
+
+    positions = np.minimum(np.searchsorted(keys, values), len(keys) - 1)
+    found = present & (keys[positions] == values)
+    return np.where(found, positions, -1)
+
+
+def known_facts(df_fact, product_keys, date_keys):
+    """
+    Fact rows whose product and date keys are in the dimensions. Keys left
+    unmatched (<NA>) by fact_orders, or missing from a dimension, are
+    dropped and counted.
+    """
+    rows = key_positions(product_keys, df_fact["product_key"])
+    cols = key_positions(date_keys, df_fact["date_key"])
+
+    print(f"Unmatched product keys: {int((rows < 0).sum())}")
+    print(f"Unmatched date keys: {int((cols < 0).sum())}")
+
+    return df_fact[(rows >= 0) & (cols >= 0)]
+
+
+def demand_matrix(df_fact, product_keys, date_keys, column="quantity"):
+    """
+    Sum of an integer fact column (quantity by default) per (product, day)
+    as a dense int64 array of shape (len(product_keys), len(date_keys)); both key
+    arrays must be sorted. Fact rows with a key that is not in them are
+    left out.
+    """
+    rows = key_positions(product_keys, df_fact["product_key"])
+    cols = key_positions(date_keys, df_fact["date_key"])
+    matched = (rows >= 0) & (cols >= 0)
+
+    cells = np.ravel_multi_index((rows[matched], cols[matched]), (len(product_keys), len(date_keys)))
+    totals = np.bincount(
+        cells,
+        weights=df_fact[column].to_numpy(dtype=float)[matched],
+        minlength=len(product_keys) * len(date_keys)
+    )
+    return totals.round().astype("int64").reshape(len(product_keys), len(date_keys))
+
+
+def lead_time_matrix(df_fact, product_keys, date_keys):
+    """
+    Mean lead time (whole days) of the order lines per (product, day),
+    0 on days without orders.
+    """
+    df_lines = df_fact.assign(lines=1)
+    lead_time = demand_matrix(df_lines, product_keys, date_keys, "lead_time_days")
+    lines = demand_matrix(df_lines, product_keys, date_keys, "lines")
+    return np.round(lead_time / np.maximum(lines, 1)).astype("int64")
+
+
+def roll_inventory(demand, lead_times, reorder_point, order_quantity):
+    """
+    Lots ordered, units received and end-of-day stock (negative when
+    backordered) for every (product, day). lead_times holds the lead time
+    of a lot ordered on each (product, day); the policy arrays hold one
+    value per product (row of demand).
+    """
+    reorder_point = np.asarray(reorder_point, dtype="int64")
+    order_quantity = np.asarray(order_quantity, dtype="int64")
+
+    cumulative_demand = demand.cumsum(axis=1)
+
+    # Lots are only ordered on days with demand
+    product, day = np.nonzero(demand)
+    placed, arrived = replenishments(
+        cumulative_demand, product, day, lead_times[product, day], order_quantity
+    )
 
+    reorders = np.zeros(demand.shape, dtype="int64")
+    reorders[product, day] = placed
+    received = arrived * order_quantity[:, None]
 
-def create_inventory_simulation():
+    stock = (reorder_point + order_quantity)[:, None] - cumulative_demand + received.cumsum(axis=1)
+    return reorders, received, stock
 
-    df_fact = pd.read_csv(FACT_PATH)
-    df_product = pd.read_csv(PRODUCT_PATH)
 
-    # Aggregate yearly sales per product
-    product_sales = df_fact.groupby("product_key").agg(
-        total_quantity=("quantity", "sum")
-    ).reset_index()
+def create_inventory_simulation():
 
-    # Merge with product dimension
-    df_inventory = df_product[["product_key", "product_name"]].merge(
-        product_sales,
-        on="product_key",
-        how="left"
-    )
+    # Only the columns needed are read from the partitioned fact
+    df_fact = read_table(FACT_PATH, columns=["product_key", "date_key", "quantity", "lead_time_days"])
+    df_product = read_table(PRODUCT_PATH, columns=["product_key", "product_name"])
+    df_date = read_table(DATE_PATH, columns=["full_date"])
 
-    df_inventory["total_quantity"] = df_inventory["total_quantity"].fillna(0)
+    df_product = df_product.sort_values("product_key").reset_index(drop=True)
+    product_keys = df_product["product_key"].to_numpy()
 
-    # Simulate initial stock
-    np.random.seed(42)
-    df_inventory["initial_stock"] = np.random.randint(500, 2000, size=len(df_inventory))
+    # date_dim only holds order dates; stock is rolled over every day between them
+    date_keys, dates = daily_calendar(pd.to_datetime(df_date["full_date"]))
+    period_days = len(dates)
 
-    # Simulate reorder point
-    df_inventory["reorder_point"] = df_inventory["initial_stock"] * 0.25
+    # Demand of rows without a known product or day cannot be booked
+    df_fact = known_facts(df_fact, product_keys, date_keys)
 
-    # Current stock
-    df_inventory["current_stock"] = (
-        df_inventory["initial_stock"] - df_inventory["total_quantity"]
-    ).clip(lower=0)
+    demand = demand_matrix(df_fact, product_keys, date_keys)
+    total_quantity = demand.sum(axis=1)
 
-    # Inventory turnover ratio
-    df_inventory["inventory_turnover"] = (
-        df_inventory["total_quantity"] / df_inventory["initial_stock"]
-    )
+    reorder_point, order_quantity = inventory_policy(total_quantity, period_days)
 
-    # Days Inventory Outstanding (DIO)
+    # Policy reaching the target fill rate at the lowest holding level
+    policies = simulate_reorder_policies(
+        df_fact, dict(zip(product_keys, order_quantity)), period_days
+    )
+    policies = df_product[["product_key"]].merge(policies, on="product_key", how="left")
+    simulated = policies["reorder_point"].notna().to_numpy()
+
+    reorder_point = np.where(simulated, policies["reorder_point"], reorder_point).astype("int64")
+    order_quantity = np.where(simulated, policies["order_quantity"], order_quantity).astype("int64")
+    # Replay of history under the chosen policy, with the empirical lead times
+    reorders, received, stock = roll_inventory(
+        demand, lead_time_matrix(df_fact, product_keys, date_keys), reorder_point, order_quantity
+    )
+    on_hand = np.maximum(stock, 0)
+
+    # Daily snapshot: one row per product per calendar day
+    n_products, n_days = demand.shape
+    df_daily = pd.DataFrame({
+        "date_key": np.tile(date_keys, n_products),
+        "product_key": np.repeat(product_keys, n_days),
+        "snapshot_date": np.tile(dates.to_numpy(), n_products),
+        "demand_quantity": demand.ravel(),
+        "reorders": reorders.ravel(),
+        "received_quantity": received.ravel(),
+        "stock_on_hand": on_hand.ravel(),
+        "backordered_quantity": np.maximum(-stock, 0).ravel(),
+    })
+
+    df_inventory = df_product[["product_key", "product_name"]].copy()
+    df_inventory["total_quantity"] = total_quantity
+    # Stock starts one full lot above the reorder point
+    df_inventory["initial_stock"] = reorder_point + order_quantity
+    df_inventory["reorder_point"] = reorder_point
+    df_inventory["order_quantity"] = order_quantity
+    df_inventory["current_stock"] = on_hand[:, -1]
+
+    # Inventory turnover: units sold per unit of average stock held
+    average_stock = pd.Series(on_hand.mean(axis=1)).replace(0, np.nan).to_numpy()
+    df_inventory["inventory_turnover"] = total_quantity / average_stock
+
+    # Days Inventory Outstanding (DIO) over the simulated period
     df_inventory["days_inventory_outstanding"] = (
-        365 / df_inventory["inventory_turnover"].replace(0, np.nan)
+        period_days / df_inventory["inventory_turnover"].replace(0, np.nan)
     )
 
-    return df_inventory
+    # Simulated service of the chosen policy (empty without orders)
+    for column in ["stockout_probability", "fill_rate", "average_holding_level"]:
+        df_inventory[column] = policies[column].to_numpy()
+
+    return df_inventory, df_daily
 
 
 if __name__ == "__main__":
-    os.makedirs("data/processed", exist_ok=True)
-    df_inventory = create_inventory_simulation()
-    df_inventory.to_csv(OUTPUT_PATH, index=False)
-    print("Inventory simulation created successfully.")
\ No newline at end of file
+    df_inventory, df_daily = create_inventory_simulation()
+    write_table(df_inventory, OUTPUT_PATH)
+    write_table(df_daily, DAILY_OUTPUT_PATH)
+    print("Inventory simulation created successfully.")
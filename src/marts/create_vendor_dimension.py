@@ -1,29 +1,129 @@
-import pandas as pd
+"""
+Vendor Dimension
+----------------
+- dim_vendor: one row per vendor (vendor_key, vendor_name), plus the
+  Unknown member (vendor_key 0) for order lines without a vendor
+- bridge_product_vendor: which vendor supplies each product, as integer
+  keys only, versioned type 2 (valid_from / valid_to / is_current) so a
+  product can change vendor over time. The (simulated) vendor belongs to
+  the product_id, so every version of a product shares it
+
+Marts attribute fact rows to vendors with vendor_keys_of: array lookups
+on product_key and the order date, instead of joining vendor names onto
+every fact row.
+"""
+
 import numpy as np
-import os
+import pandas as pd
+
+from src.utils.scd import apply_scd2, read_existing_dimension
+from src.utils.storage import read_table, write_table
+
+PRODUCT_PATH = "data/processed/product_dim.parquet"
+OUTPUT_PATH = "data/processed/dim_vendor.parquet"
+BRIDGE_PATH = "data/processed/bridge_product_vendor.parquet"
+
+VENDORS = ["Vendor A", "Vendor B", "Vendor C", "Vendor D"]
+
+# Order lines whose product has no vendor (see vendor_keys_of)
+UNKNOWN_VENDOR_KEY = 0
+UNKNOWN_VENDOR_NAME = "Unknown"
 
-PRODUCT_PATH = "data/processed/product_dim.csv"
-OUTPUT_PATH = "data/processed/dim_vendor.csv"
 
 def create_vendor_dimension():
+    return pd.DataFrame({
+        "vendor_key": np.arange(0, len(VENDORS) + 1),
+        "vendor_name": [UNKNOWN_VENDOR_NAME] + VENDORS,
+    })
+
+
+def assign_vendors(df_product, existing=None):
+    """
+    Simulated vendor_key per product_key. The draw is keyed on product_id,
+    so a new SCD2 version of a product gets the same vendor; products
+    already in the bridge keep the vendor of their first version.
+    """
+    product_ids = df_product["product_id"].astype(str).str.strip()
+    ids = pd.Series(product_ids.unique())
+    draw = pd.util.hash_pandas_object(ids, index=False).to_numpy() % len(VENDORS) + 1
+    vendor_of_id = pd.Series(draw.astype("int64"), index=ids)
 
-    df_product = pd.read_csv(PRODUCT_PATH)
+    if existing is not None and len(existing):
+        current = existing.loc[existing["is_current"], ["product_key", "vendor_key"]]
+        carried = df_product[["product_key"]].assign(product_id=product_ids) \
+            .merge(current, on="product_key") \
+            .sort_values("product_key") \
+            .drop_duplicates("product_id")
+        vendor_of_id.loc[carried["product_id"].to_numpy()] = carried["vendor_key"].to_numpy()
 
-    np.random.seed(42)
+    return pd.DataFrame({
+        "product_key": df_product["product_key"].to_numpy(),
+        "vendor_key": product_ids.map(vendor_of_id).to_numpy(),
+    })
 
-    vendors = ["Vendor A", "Vendor B", "Vendor C", "Vendor D"]
 
-    df_product["vendor_name"] = np.random.choice(vendors, len(df_product))
+def create_product_vendor_bridge(existing=None, effective_date=None):
 
-    vendor_dim = df_product[["product_key", "vendor_name"]].copy()
+    df_product = read_table(PRODUCT_PATH, columns=["product_key", "product_id"]).sort_values("product_key")
+    assignment = assign_vendors(df_product, existing)
 
-    vendor_dim["vendor_key"] = vendor_dim["vendor_name"].astype("category").cat.codes + 1
+    # A product that changes vendor gets a new current version
+    return apply_scd2(
+        existing,
+        assignment,
+        surrogate_key="product_vendor_key",
+        natural_key=["product_key"],
+        tracked_columns=["vendor_key"],
+        effective_date=effective_date
+    )
 
-    return vendor_dim[["vendor_key", "vendor_name", "product_key"]]
+
+def vendor_keys_of(bridge, product_keys, dates=None):
+    """
+    vendor_key of each product_key (UNKNOWN_VENDOR_KEY when it has no
+    vendor, or the product_key is missing).
+
+    Without dates, the current assignment: a direct lookup in a dense
+    product_key -> vendor_key array. With dates, the version valid on each
+    date; dates before a product's first version use that version.
+    """
+    # Unmatched product keys (<NA>) become 0, which no product uses
+    product_keys = pd.array(product_keys, dtype="Int64").to_numpy(dtype="int64", na_value=0)
+    size = max(int(bridge["product_key"].max()), int(product_keys.max(initial=0))) + 1
+
+    if dates is None:
+        current = bridge[bridge["is_current"]]
+        lookup = np.full(size, UNKNOWN_VENDOR_KEY, dtype="int64")
+        lookup[current["product_key"].to_numpy()] = current["vendor_key"].to_numpy()
+        return lookup[product_keys]
+
+    versions = bridge.sort_values(["product_key", "valid_from"], na_position="first")
+    version_products = versions["product_key"].to_numpy()
+
+    # (product_key, day) packed into one sortable int64; a missing
+    # valid_from sorts first
+    def packed(keys, days):
+        return keys * (1 << 32) + np.clip(days, -(1 << 31), (1 << 31) - 1) + (1 << 31)
+
+    valid_from = pd.to_datetime(versions["valid_from"]).to_numpy("datetime64[D]")
+    version_days = np.where(np.isnat(valid_from), np.iinfo("int64").min, valid_from.astype("int64"))
+    days = pd.to_datetime(dates).to_numpy("datetime64[D]").astype("int64")
+
+    # Latest version starting on or before the date, else the first one
+    position = np.searchsorted(packed(version_products, version_days), packed(product_keys, days),
+                               side="right") - 1
+    first = np.full(size, -1, dtype="int64")
+    first[version_products[::-1]] = np.arange(len(versions))[::-1]
+    position = np.maximum(position, first[product_keys])
+
+    vendor_keys = versions["vendor_key"].to_numpy()
+    return np.where(first[product_keys] >= 0, vendor_keys[position], UNKNOWN_VENDOR_KEY)
 
 
 if __name__ == "__main__":
-    os.makedirs("data/processed", exist_ok=True)
     df_vendor = create_vendor_dimension()
-    df_vendor.to_csv(OUTPUT_PATH, index=False)
-    print("Vendor dimension created successfully.")
\ No newline at end of file
+    write_table(df_vendor, OUTPUT_PATH)
+
+    df_bridge = create_product_vendor_bridge(existing=read_existing_dimension(BRIDGE_PATH))
+    write_table(df_bridge, BRIDGE_PATH)
+    print("Vendor dimension created successfully.")
@@ -0,0 +1,188 @@
+"""
+Vendor Monthly Performance
+--------------------------
+Vendor x month fact with rolling 3/6/12-month order counts, sales, lead
+time and on-time rate against a configurable SLA (lead time in days).
+
+fact_orders is reduced in one vectorized pass: every order line is mapped
+to its vendor with an array lookup on product_key and order date
+(bridge_product_vendor), its sums per
+(vendor, month) are laid out on a dense (vendor x month) grid, and
+rolling windows are differences of the cumulative sums along the month
+axis. Every window comes from the same arrays instead of one groupby per
+window. Months without orders are kept, so windows always span calendar
+months.
+
+Only additive sums are stored next to the rolling ratios, so new months
+can be appended incrementally: the last month on disk (possibly partial)
+and everything after it are recomputed from their fact_orders partitions,
+with the earlier months' sums read back from the existing output.
+"""
+
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from src.marts.create_vendor_dimension import vendor_keys_of
+from src.utils.storage import read_table, write_table, table_exists
+
+FACT_PATH = "data/processed/fact_orders"
+VENDOR_PATH = "data/processed/dim_vendor.parquet"
+BRIDGE_PATH = "data/processed/bridge_product_vendor.parquet"
+OUTPUT_PATH = "data/processed/fact_vendor_monthly.parquet"
+
+# An order line is on time when its lead time is at most this many days
+SLA_DAYS = 4
+
+WINDOWS = (3, 6, 12)
+
+# Additive monthly sums everything else is derived from
+BASE_COLUMNS = ["total_orders", "total_sales", "total_lead_time", "on_time_orders"]
+
+
+def month_index(month_key):
+    # yyyymm -> months since year 0, so consecutive months differ by one
+    return (month_key // 100) * 12 + month_key % 100 - 1
+
+
+def month_key_of(index):
+    return (index // 12) * 100 + index % 12 + 1
+
+
+def monthly_totals(df_fact, df_bridge, sla_days=SLA_DAYS):
+    """
+    Additive sums per (vendor_key, month_key) with at least one order line.
+    """
+    order_date = pd.to_datetime(df_fact["order_date"])
+    keys = pd.DataFrame({
+        "vendor_key": vendor_keys_of(df_bridge, df_fact["product_key"], order_date),
+        "month_key": (order_date.dt.year * 100 + order_date.dt.month).to_numpy(),
+    })
+    lead_time = df_fact["lead_time_days"].to_numpy()
+
+    values = pd.DataFrame({
+        "total_orders": np.ones(len(df_fact), dtype="int64"),
+        "total_sales": df_fact["sales"].to_numpy(),
+        "total_lead_time": lead_time,
+        "on_time_orders": (lead_time <= sla_days).astype("int64"),
+    })
+
+    # A single sort-based reduction for all four sums
+    return values.groupby([keys["vendor_key"], keys["month_key"]]).sum().reset_index()
+
+
+def rolling_windows(totals, windows=WINDOWS):
+    """
+    Dense vendor x month frame from the monthly sums, with the monthly and
+    rolling metrics. Covers every month between the first and last one.
+    """
+    vendors, vendor_codes = np.unique(totals["vendor_key"].to_numpy(), return_inverse=True)
+    months = month_index(totals["month_key"].to_numpy())
+    first = months.min()
+    n_vendors, n_months = len(vendors), months.max() - first + 1
+
+    cells = vendor_codes * n_months + (months - first)
+    grid = {
+        column: np.bincount(cells, weights=totals[column].to_numpy(),
+                            minlength=n_vendors * n_months).reshape(n_vendors, n_months)
+        for column in BASE_COLUMNS
+    }
+
+    # Zero column first, so a window ending at month t is C[t + 1] - C[t + 1 - w]
+    cumulative = {
+        column: np.pad(values.cumsum(axis=1), ((0, 0), (1, 0)))
+        for column, values in grid.items()
+    }
+    end = np.arange(1, n_months + 1)
+
+    frame = {
+        "vendor_key": np.repeat(vendors, n_months),
+        "month_key": np.tile(month_key_of(first + np.arange(n_months)), n_vendors),
+        "total_orders": grid["total_orders"].astype("int64").ravel(),
+        "total_sales": grid["total_sales"].ravel(),
+        "total_lead_time": grid["total_lead_time"].astype("int64").ravel(),
+        "on_time_orders": grid["on_time_orders"].astype("int64").ravel(),
+    }
+
+    for window in (1,) + tuple(windows):
+        start = np.maximum(end - window, 0)
+        rolled = {column: values[:, end] - values[:, start] for column, values in cumulative.items()}
+
+        orders = rolled["total_orders"]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            avg_lead_time = np.where(orders > 0, rolled["total_lead_time"] / orders, np.nan)
+            on_time_rate = np.where(orders > 0, rolled["on_time_orders"] / orders, np.nan)
+
+        if window == 1:
+            frame["avg_lead_time"] = avg_lead_time.ravel()
+            frame["on_time_rate"] = on_time_rate.ravel()
+            continue
+
+        frame[f"orders_{window}m"] = orders.astype("int64").ravel()
+        frame[f"sales_{window}m"] = rolled["total_sales"].ravel()
+        frame[f"avg_lead_time_{window}m"] = avg_lead_time.ravel()
+        frame[f"on_time_rate_{window}m"] = on_time_rate.ravel()
+
+    df = pd.DataFrame(frame)
+    df.insert(2, "month_start", pd.to_datetime({
+        "year": df["month_key"] // 100, "month": df["month_key"] % 100, "day": 1
+    }))
+    return df
+
+
+def create_vendor_monthly(incremental=False, sla_days=SLA_DAYS, windows=WINDOWS):
+    df_vendor = read_table(VENDOR_PATH)
+    df_bridge = read_table(BRIDGE_PATH)
+    columns = ["product_key", "order_date", "lead_time_days", "sales"]
+
+    existing = read_table(OUTPUT_PATH) if incremental and table_exists(OUTPUT_PATH) else None
+
+    # History computed against another SLA cannot be extended
+    if existing is not None and (existing.empty or (existing["sla_days"] != sla_days).any()):
+        existing = None
+
+    if existing is None:
+        df_fact = read_table(FACT_PATH, columns=columns)
+        df = rolling_windows(monthly_totals(df_fact, df_bridge, sla_days), windows)
+    else:
+        # Recompute from the last stored month, which may have been partial
+        start = int(existing["month_key"].max())
+        year, month = divmod(start, 100)
+        df_fact = read_table(FACT_PATH, columns=columns, filters=[
+            [("year", ">", year)],
+            [("year", "==", year), ("month", ">=", month)],
+        ])
+
+        # Sums of the months before it feed the rolling windows
+        history = existing.loc[
+            (existing["month_key"] < start)
+            & (month_index(existing["month_key"]) >= month_index(start) - max(windows)),
+            ["vendor_key", "month_key"] + BASE_COLUMNS
+        ]
+        totals = pd.concat([history, monthly_totals(df_fact, df_bridge, sla_days)], ignore_index=True)
+
+        appended = rolling_windows(totals, windows)
+        appended = appended[appended["month_key"] >= start]
+        df = pd.concat([existing[existing["month_key"] < start], appended], ignore_index=True)
+
+    df["sla_days"] = sla_days
+
+    # Vendor names for reporting
+    df = df.drop(columns="vendor_name", errors="ignore").merge(df_vendor, on="vendor_key", how="left")
+    df.insert(1, "vendor_name", df.pop("vendor_name"))
+
+    return df.sort_values(["vendor_key", "month_key"]).reset_index(drop=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the vendor x month performance fact")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Recompute only the last stored month and the ones after it")
+    parser.add_argument("--sla-days", type=int, default=SLA_DAYS,
+                        help=f"Lead time (days) an order line must meet to be on time (default: {SLA_DAYS})")
+    args = parser.parse_args()
+
+    df_vendor_monthly = create_vendor_monthly(incremental=args.incremental, sla_days=args.sla_days)
+    write_table(df_vendor_monthly, OUTPUT_PATH)
+    print("Vendor monthly performance fact created successfully.")
@@ -1,28 +1,46 @@
+import numpy as np
 import pandas as pd
-import os
 
-FACT_PATH = "data/processed/fact_orders.csv"
-VENDOR_PATH = "data/processed/dim_vendor.csv"
-OUTPUT_PATH = "data/processed/fact_vendor_performance.csv"
+from src.marts.create_vendor_dimension import vendor_keys_of
+from src.utils.storage import read_table, write_table
+
+FACT_PATH = "data/processed/fact_orders"
+VENDOR_PATH = "data/processed/dim_vendor.parquet"
+BRIDGE_PATH = "data/processed/bridge_product_vendor.parquet"
+OUTPUT_PATH = "data/processed/fact_vendor_performance.parquet"
 
 def create_vendor_performance():
 
-    df_fact = pd.read_csv(FACT_PATH)
-    df_vendor = pd.read_csv(VENDOR_PATH)
+    # Only the columns needed are read from the partitioned fact
+    df_fact = read_table(
+        FACT_PATH,
+        columns=["product_key", "order_date", "lead_time_days", "sales"]
+    )
+    df_vendor = read_table(VENDOR_PATH)
+    df_bridge = read_table(BRIDGE_PATH)
+
+    # Vendor of every order line by array lookup, no join
+    vendor_key = vendor_keys_of(df_bridge, df_fact["product_key"], df_fact["order_date"])
 
-    df = df_fact.merge(df_vendor, on="product_key", how="left")
+    # Per-vendor sums indexed by vendor_key
+    size = int(max(vendor_key.max(), df_vendor["vendor_key"].max())) + 1
+    total_orders = np.bincount(vendor_key, minlength=size)
+    total_lead_time = np.bincount(vendor_key, weights=df_fact["lead_time_days"], minlength=size)
+    total_sales = np.bincount(vendor_key, weights=df_fact["sales"], minlength=size)
 
-    vendor_perf = df.groupby(["vendor_key", "vendor_name"]).agg(
-        total_orders=("order_id", "count"),
-        avg_lead_time=("lead_time_days", "mean"),
-        total_sales=("sales", "sum")
-    ).reset_index()
+    keys = df_vendor["vendor_key"].to_numpy()
+    # Vendors without orders would divide 0 / 0; they are dropped below
+    orders = pd.Series(total_orders[keys], index=df_vendor.index)
+    vendor_perf = df_vendor[["vendor_key", "vendor_name"]].assign(
+        total_orders=orders,
+        avg_lead_time=total_lead_time[keys] / orders.replace(0, np.nan),
+        total_sales=total_sales[keys]
+    )
 
-    return vendor_perf
+    return vendor_perf[vendor_perf["total_orders"] > 0].reset_index(drop=True)
 
 
 if __name__ == "__main__":
-    os.makedirs("data/processed", exist_ok=True)
     df_vendor_perf = create_vendor_performance()
-    df_vendor_perf.to_csv(OUTPUT_PATH, index=False)
-    print("Vendor performance fact created successfully.")
\ No newline at end of file
+    write_table(df_vendor_perf, OUTPUT_PATH)
+    print("Vendor performance fact created successfully.")
@@ -0,0 +1,124 @@
+"""
+Star Schema Build
+-----------------
+Builds every dimension and fact_orders from a single read of
+superstore_cleaned.csv. Dimensions are handed to the fact build
+in memory instead of being written and read back from disk.
+"""
+
+import pandas as pd
+import argparse
+import os
+
+from src.transformation.create_dim_customer import (
+    create_dim_customer, OUTPUT_PATH as CUSTOMER_OUTPUT_PATH
+)
+from src.transformation.create_dim_date import (
+    create_dim_date, OUTPUT_PATH as DATE_OUTPUT_PATH
+)
+from src.transformation.create_dim_location import (
+    create_dim_location, OUTPUT_PATH as LOCATION_OUTPUT_PATH
+)
+from src.transformation.create_dim_product import (
+    create_dim_product, API_PATH, OUTPUT_PATH as PRODUCT_OUTPUT_PATH
+)
+from src.utils.scd import read_existing_dimension
+from src.utils.storage import read_table, write_table
+from src.transformation.create_fact_orders import (
+    create_fact_orders, create_fact_orders_incremental, append_fact_orders,
+    save_fact_orders, compute_watermark, save_watermark,
+    SUPERSTORE_PATH, WATERMARK_PATH, OUTPUT_PATH as FACT_OUTPUT_PATH
+)
+
+
+def read_source():
+    # Parse the extract once, with an explicit date format
+    return pd.read_csv(
+        SUPERSTORE_PATH,
+        parse_dates=['Order Date'],
+        date_format='%Y-%m-%d'
+    )
+
+
+def build_star_schema(df=None, incremental=False):
+    if df is None:
+        df = read_source()
+    df_api = read_table(API_PATH, columns=['product_price', 'rating_rate', 'rating_count'])
+
+    # Customer, location and product are type 2: merge into what is on disk
+    dim_date = create_dim_date(df)
+    dim_customer = create_dim_customer(
+        df, existing=read_existing_dimension(CUSTOMER_OUTPUT_PATH)
+    )
+    dim_location = create_dim_location(
+        df, existing=read_existing_dimension(LOCATION_OUTPUT_PATH)
+    )
+    dim_product = create_dim_product(
+        df, df_api, existing=read_existing_dimension(PRODUCT_OUTPUT_PATH)
+    )
+
+    dims = {
+        'dim_date': dim_date,
+        'dim_customer': dim_customer,
+        'dim_location': dim_location,
+        'dim_product': dim_product
+    }
+
+    # Incremental mode only builds fact rows past the stored watermark
+    if incremental:
+        fact_orders, watermark = create_fact_orders_incremental(df, **dims)
+    else:
+        fact_orders = create_fact_orders(df, **dims)
+        watermark = compute_watermark(df, fact_orders)
+
+    tables = {
+        'date_dim': dim_date,
+        'customer_dim': dim_customer,
+        'location_dim': dim_location,
+        'product_dim': dim_product,
+        'fact_orders': fact_orders
+    }
+
+    return tables, watermark
+
+
+def save_star_schema(tables, watermark, incremental=False):
+    output_paths = {
+        'date_dim': DATE_OUTPUT_PATH,
+        'customer_dim': CUSTOMER_OUTPUT_PATH,
+        'location_dim': LOCATION_OUTPUT_PATH,
+        'product_dim': PRODUCT_OUTPUT_PATH,
+        'fact_orders': FACT_OUTPUT_PATH
+    }
+
+    for name, table in tables.items():
+        if name == 'fact_orders':
+            if incremental:
+                append_fact_orders(table)
+                print(f"{name} appended to {output_paths[name]} ({len(table)} new rows)")
+            else:
+                save_fact_orders(table)
+                print(f"{name} saved to {output_paths[name]} ({len(table)} rows)")
+            continue
+        write_table(table, output_paths[name])
+        print(f"{name} saved to {output_paths[name]} ({len(table)} rows)")
+
+    # Watermark is only advanced once the fact rows are on disk
+    save_watermark(watermark)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the star schema in one pass")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Append only fact rows past the stored watermark")
+    args = parser.parse_args()
+
+    incremental = (
+        args.incremental
+        and os.path.exists(FACT_OUTPUT_PATH)
+        and os.path.exists(WATERMARK_PATH)
+    )
+
+    tables, watermark = build_star_schema(incremental=incremental)
+    save_star_schema(tables, watermark, incremental=incremental)
+    print("Star schema built successfully")
@@ -0,0 +1,370 @@
+"""
+Pipeline Runner
+---------------
+Runs the ETL stages in dependency order on a process pool.
+
+Each stage is the `__main__` block of an existing module. Independent
+stages run concurrently, and a stage is skipped when the hash of its code
+(the module and every src.* module it imports, transitively) and input
+files matches the last successful run recorded in
+data/.pipeline_state.json.
+
+With --incremental, stages that support it (fact_orders, the vendor
+monthly fact) append to their existing outputs instead of rebuilding.
+
+Usage:
+    python -m src.pipeline.run_pipeline [--workers N] [--force] [--incremental]
+                                        [--exclude STAGE ...]
+"""
+
+import argparse
+import ast
+import hashlib
+import json
+import os
+import runpy
+import sys
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+STATE_PATH = "data/.pipeline_state.json"
+
+RAW_DIR = "data/raw"
+PROCESSED_DIR = "data/processed"
+
+# incremental_args: command line passed to the stage in incremental runs
+Stage = namedtuple("Stage", ["name", "module", "deps", "inputs", "outputs", "incremental_args"],
+                   defaults=[()])
+
+
+def _raw(name):
+    return f"{RAW_DIR}/{name}"
+
+
+def _processed(name):
+    return f"{PROCESSED_DIR}/{name}"
+
+
+STAGES = [
+    # Ingestion has no file inputs, so it always runs; downstream stages
+    # are still skipped when it leaves the raw file unchanged (HTTP 304).
+    Stage("fetch_fakestore", "src.ingestion.fetch_fakestore",
+          deps=[],
+          inputs=[],
+          outputs=[_raw("fakestore_products_raw.jsonl")]),
+    Stage("transform_fakestore", "src.transformation.transform_fakestore",
+          deps=["fetch_fakestore"],
+          inputs=[_raw("fakestore_products_raw.jsonl")],
+          outputs=[_processed("fakestore_products_cleaned.parquet")]),
+
+    Stage("clean_superstore", "src.transformation.clean_superstore",
+          deps=[],
+          inputs=[_raw("superstore_raw.csv")],
+          outputs=[_processed("superstore_cleaned.csv")]),
+
+    # Dimensions
+    Stage("create_dim_date", "src.transformation.create_dim_date",
+          deps=["clean_superstore"],
+          inputs=[_processed("superstore_cleaned.csv")],
+          outputs=[_processed("date_dim.parquet")]),
+    Stage("create_dim_customer", "src.transformation.create_dim_customer",
+          deps=["clean_superstore"],
+          inputs=[_processed("superstore_cleaned.csv")],
+          outputs=[_processed("customer_dim.parquet")]),
+    Stage("create_dim_location", "src.transformation.create_dim_location",
+          deps=["clean_superstore"],
+          inputs=[_processed("superstore_cleaned.csv")],
+          outputs=[_processed("location_dim.parquet")]),
+    Stage("create_dim_product", "src.transformation.create_dim_product",
+          deps=["clean_superstore", "transform_fakestore"],
+          inputs=[_processed("superstore_cleaned.csv"),
+                  _processed("fakestore_products_cleaned.parquet")],
+          outputs=[_processed("product_dim.parquet")]),
+
+    # Fact
+    Stage("create_fact_orders", "src.transformation.create_fact_orders",
+          deps=["create_dim_date", "create_dim_customer",
+                "create_dim_location", "create_dim_product"],
+          inputs=[_processed("superstore_cleaned.csv"),
+                  _processed("date_dim.parquet"),
+                  _processed("customer_dim.parquet"),
+                  _processed("location_dim.parquet"),
+                  _processed("product_dim.parquet")],
+          outputs=[_processed("fact_orders"),
+                   _processed("fact_orders_watermark.json")],
+          incremental_args=["--incremental"]),
+
+    # Marts
+    Stage("create_inventory_simulation", "src.marts.create_inventory_simulation",
+          deps=["create_fact_orders", "create_dim_product", "create_dim_date"],
+          inputs=[_processed("fact_orders"), _processed("product_dim.parquet"),
+                  _processed("date_dim.parquet")],
+          outputs=[_processed("fact_inventory.parquet"),
+                   _processed("fact_inventory_daily.parquet")]),
+    Stage("create_vendor_dimension", "src.marts.create_vendor_dimension",
+          deps=["create_dim_product"],
+          inputs=[_processed("product_dim.parquet")],
+          outputs=[_processed("dim_vendor.parquet"),
+                   _processed("bridge_product_vendor.parquet")]),
+    Stage("create_vendor_performance", "src.marts.create_vendor_performance",
+          deps=["create_fact_orders", "create_vendor_dimension"],
+          inputs=[_processed("fact_orders"), _processed("dim_vendor.parquet"),
+                  _processed("bridge_product_vendor.parquet")],
+          outputs=[_processed("fact_vendor_performance.parquet")]),
+    Stage("create_vendor_monthly", "src.marts.create_vendor_monthly",
+          deps=["create_fact_orders", "create_vendor_dimension"],
+          inputs=[_processed("fact_orders"), _processed("dim_vendor.parquet"),
+                  _processed("bridge_product_vendor.parquet")],
+          outputs=[_processed("fact_vendor_monthly.parquet")],
+          incremental_args=["--incremental"]),
+
+    # Warehouse
+    Stage("load_to_bigquery", "src.warehouse.load_to_bigquery",
+          deps=["create_fact_orders", "create_inventory_simulation",
+                "create_vendor_dimension", "create_vendor_performance",
+                "create_vendor_monthly"],
+          inputs=[_processed("date_dim.parquet"),
+                  _processed("customer_dim.parquet"),
+                  _processed("location_dim.parquet"),
+                  _processed("product_dim.parquet"),
+                  _processed("fact_inventory.parquet"),
+                  _processed("fact_inventory_daily.parquet"),
+                  _processed("dim_vendor.parquet"),
+                  _processed("bridge_product_vendor.parquet"),
+                  _processed("fact_vendor_performance.parquet"),
+                  _processed("fact_vendor_monthly.parquet"),
+                  _processed("fact_orders"),
+                  # Table, view and mart definitions
+                  "sql/create_tables.sql", "sql/create_views.sql", "sql/marts"],
+          outputs=[]),
+]
+
+
+# Only the project's own modules are hashed, not installed packages
+CODE_PACKAGE = "src"
+
+
+def module_path(module):
+    return module.replace(".", os.sep) + ".py"
+
+
+def source_path(module):
+    # Module file or package __init__, None for anything that is neither
+    for path in (module_path(module), os.path.join(module.replace(".", os.sep), "__init__.py")):
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def imported_modules(path):
+    # src.* modules imported by a file; `from src.x import y` may name a submodule
+    with open(path) as f:
+        tree = ast.parse(f.read(), filename=path)
+
+    modules = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            modules.update(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and node.level == 0:
+            modules.add(node.module)
+            modules.update(f"{node.module}.{alias.name}" for alias in node.names)
+
+    return {m for m in modules if m == CODE_PACKAGE or m.startswith(CODE_PACKAGE + ".")}
+
+
+def code_files(module):
+    """
+    Files of a stage's module and every src.* module it imports,
+    transitively, so edits to shared helpers invalidate the stage.
+    """
+    files = set()
+    pending = [module]
+
+    while pending:
+        path = source_path(pending.pop())
+        if path is None or path in files:
+            continue
+        files.add(path)
+        pending.extend(imported_modules(path))
+
+    return sorted(files)
+
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def path_hash(path):
+    # Partitioned datasets are directories: hash each partition's file
+    # contents, ignoring the generated file names
+    if not os.path.isdir(path):
+        return file_hash(path)
+
+    entries = []
+    for root, _, files in os.walk(path):
+        partition = os.path.relpath(root, path)
+        entries.extend(f"{partition}:{file_hash(os.path.join(root, name))}" for name in files)
+
+    return hashlib.sha256("\n".join(sorted(entries)).encode()).hexdigest()
+
+
+def stage_hash(stage):
+    # Hash the stage's code (with its src.* imports) plus the content of every input
+    digest = hashlib.sha256()
+
+    for path in code_files(stage.module) + list(stage.inputs):
+        digest.update(path.encode())
+        if not os.path.exists(path):
+            digest.update(b"<missing>")
+            continue
+        digest.update(path_hash(path).encode())
+
+    return digest.hexdigest()
+
+
+def load_state():
+    if not os.path.exists(STATE_PATH):
+        return {}
+    with open(STATE_PATH) as f:
+        return json.load(f)
+
+
+def save_state(state):
+    os.makedirs(os.path.dirname(STATE_PATH), exist_ok=True)
+    with open(STATE_PATH, "w") as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+
+
+def is_up_to_date(stage, state, current_hash):
+    # Stages without inputs (ingestion) cannot be proven fresh
+    if not stage.inputs:
+        return False
+    if state.get(stage.name) != current_hash:
+        return False
+    return all(os.path.exists(path) for path in stage.outputs)
+
+
+def run_stage(module, args=()):
+    # Executed in a worker process; stages see their own argv,
+    # not the runner's command line
+    start = time.perf_counter()
+    sys.argv = [module_path(module)] + list(args)
+    runpy.run_module(module, run_name="__main__", alter_sys=True)
+    return time.perf_counter() - start
+
+
+def validate_graph(stages):
+    names = {stage.name for stage in stages}
+    for stage in stages:
+        missing = [dep for dep in stage.deps if dep not in names]
+        if missing:
+            raise ValueError(f"Stage {stage.name} depends on unknown stages: {missing}")
+
+
+def run_pipeline(stages=STAGES, max_workers=None, force=False, exclude=(), incremental=False):
+    validate_graph(stages)
+
+    state = {} if force else load_state()
+    pending = {stage.name: stage for stage in stages}
+    done = set()
+    failed = {}
+    running = {}
+    summary = {}
+
+    # Excluded stages are treated as complete and their outputs reused
+    for name in exclude:
+        if name not in pending:
+            raise ValueError(f"Unknown stage: {name}")
+        pending.pop(name)
+        done.add(name)
+        summary[name] = "excluded"
+
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        while pending or running:
+
+            # Schedule everything whose dependencies have finished
+            progressed = False
+            for name in list(pending):
+                stage = pending[name]
+
+                if any(dep in failed for dep in stage.deps):
+                    pending.pop(name)
+                    progressed = True
+                    failed[name] = "upstream failure"
+                    summary[name] = "blocked"
+                    print(f"[blocked] {name}")
+                    continue
+
+                if not all(dep in done for dep in stage.deps):
+                    continue
+
+                pending.pop(name)
+                progressed = True
+                current_hash = stage_hash(stage)
+
+                if is_up_to_date(stage, state, current_hash):
+                    done.add(name)
+                    summary[name] = "skipped"
+                    print(f"[skipped] {name} (unchanged)")
+                    continue
+
+                print(f"[started] {name}")
+                args = stage.incremental_args if incremental else ()
+                future = pool.submit(run_stage, stage.module, args)
+                running[future] = (stage, current_hash)
+
+            if not running:
+                if not progressed:
+                    raise ValueError(f"Dependency cycle between stages: {sorted(pending)}")
+                # Skips may have unblocked further stages
+                continue
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+
+            for future in finished:
+                stage, current_hash = running.pop(future)
+                try:
+                    duration = future.result()
+                except BaseException as e:
+                    failed[stage.name] = repr(e)
+                    summary[stage.name] = "failed"
+                    print(f"[failed] {stage.name}: {e!r}")
+                    continue
+
+                done.add(stage.name)
+                summary[stage.name] = f"ran in {duration:.2f}s"
+                print(f"[done] {stage.name} ({duration:.2f}s)")
+
+                # Persist after every success so a later failure keeps progress
+                state[stage.name] = current_hash
+                save_state(state)
+
+    print("\nPipeline summary:")
+    for stage in stages:
+        print(f"  {stage.name:<30} {summary.get(stage.name, 'not run')}")
+
+    if failed:
+        raise RuntimeError(f"Pipeline failed: {failed}")
+
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the supply chain ETL pipeline")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Number of worker processes (default: CPU count)")
+    parser.add_argument("--force", action="store_true",
+                        help="Ignore saved hashes and rerun every stage")
+    parser.add_argument("--exclude", nargs="*", default=[],
+                        help="Stages to leave out, reusing their existing outputs")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Append to existing outputs in the stages that support it")
+    args = parser.parse_args()
+
+    run_pipeline(max_workers=args.workers, force=args.force, exclude=args.exclude,
+                 incremental=args.incremental)
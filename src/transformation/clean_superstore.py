@@ -0,0 +1,68 @@
+# Cleaning the raw Superstore extract
+
+import pandas as pd
+import argparse
+import os
+
+RAW_PATH = "data/raw/superstore_raw.csv"
+OUTPUT_PATH = "data/processed/superstore_cleaned.csv"
+
+# Raw extract dates are M/D/YYYY; parsing with an explicit format avoids
+# per-value format inference
+RAW_DATE_FORMAT = "%m/%d/%Y"
+RAW_ENCODING = "latin1"
+
+# Raw rows per chunk in streaming mode
+CHUNK_SIZE = 100_000
+
+
+def clean_superstore(df=None):
+    if df is None:
+        df = pd.read_csv(RAW_PATH, encoding=RAW_ENCODING)
+
+    df = df.copy()
+
+    # Convert dates into ISO datetimes
+    df['Order Date'] = pd.to_datetime(df['Order Date'], format=RAW_DATE_FORMAT)
+    df['Ship Date'] = pd.to_datetime(df['Ship Date'], format=RAW_DATE_FORMAT)
+
+    # KPI: Lead Time = ship date - order date, in days (vectorized)
+    df['Lead_Time'] = (df['Ship Date'] - df['Order Date']).dt.days
+
+    df['Discount'] = df['Discount'].astype(float)
+
+    return df
+
+
+def stream_clean_superstore(chunksize=CHUNK_SIZE):
+    # Cleans and writes the extract chunk by chunk, so memory follows chunksize
+    rows = 0
+    reader = pd.read_csv(RAW_PATH, encoding=RAW_ENCODING, chunksize=chunksize)
+
+    for i, chunk in enumerate(reader):
+        cleaned = clean_superstore(chunk)
+        cleaned.to_csv(OUTPUT_PATH, mode='w' if i == 0 else 'a', header=(i == 0), index=False)
+        rows += len(cleaned)
+        print(f"Chunk {i + 1}: {len(cleaned)} rows cleaned")
+
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Clean the raw Superstore extract")
+    parser.add_argument("--stream", action="store_true",
+                        help="Read and write the extract in chunks")
+    parser.add_argument("--chunksize", type=int, default=CHUNK_SIZE,
+                        help=f"Raw rows per chunk in streaming mode (default: {CHUNK_SIZE})")
+    args = parser.parse_args()
+
+    os.makedirs("data/processed", exist_ok=True)
+
+    if args.stream:
+        rows = stream_clean_superstore(args.chunksize)
+        print(f"superstore_cleaned streamed successfully ({rows} rows)")
+    else:
+        df_clean = clean_superstore()
+        df_clean.to_csv(OUTPUT_PATH, index=False)
+        print("superstore_cleaned created successfully")
+        print(df_clean.head())
@@ -1,33 +1,52 @@
 # Preparing Customer Dimension Table
 
 import pandas as pd
-import os
 
-INPUT_PATH = "data/processed/superstore_cleaned.csv"
-OUTPUT_PATH = "data/processed/customer_dim.csv"
-
-def create_dim_customer():
-    df = pd.read_csv(INPUT_PATH)
+from src.utils.scd import apply_scd2, first_seen, read_existing_dimension
+from src.utils.storage import write_table
 
-    customer_dim = df[['Customer ID', 'Customer Name', 'Segment']].drop_duplicates()
-
-    customer_dim = customer_dim.sort_values('Customer ID').reset_index(drop=True)
+INPUT_PATH = "data/processed/superstore_cleaned.csv"
+OUTPUT_PATH = "data/processed/customer_dim.parquet"
 
-    # Creating Surrogate keys
-    customer_dim.insert(0,'customer_key',range(1,len(customer_dim)+1))
+def create_dim_customer(df=None, existing=None, effective_date=None):
+    # Source frame can be handed in by the pipeline to avoid re-reading the CSV
+    if df is None:
+        df = pd.read_csv(INPUT_PATH)
 
-    customer_dim.rename(columns={
+    source = df[['Order Date', 'Customer ID', 'Customer Name', 'Segment']].rename(columns={
         'Customer ID': 'customer_id',
         'Customer Name': 'customer_name',
         'Segment': 'segment'
-    }, inplace= True)
+    })
+
+    # Latest state per customer (most recent order wins)
+    customer_dim = source \
+        .sort_values('Order Date', kind='stable') \
+        .drop_duplicates('customer_id', keep='last') \
+        .drop(columns='Order Date')
+
+    customer_dim = customer_dim.sort_values('customer_id').reset_index(drop=True)
+
+    # A new version starts with the first order showing its values
+    customer_dim['valid_from'] = first_seen(
+        source, customer_dim, ['customer_id'], ['customer_name', 'segment'], 'Order Date'
+    )
+
+    # Surrogate keys + SCD2 versioning against the existing dimension
+    customer_dim = apply_scd2(
+        existing,
+        customer_dim,
+        surrogate_key='customer_key',
+        natural_key=['customer_id'],
+        tracked_columns=['customer_name', 'segment'],
+        effective_date=effective_date
+    )
 
     return customer_dim
 
 
 if __name__ == "__main__":
-    os.makedirs("data/processed",exist_ok=True)
-    customer_dim = create_dim_customer()
-    customer_dim.to_csv(OUTPUT_PATH,index=False)
+    customer_dim = create_dim_customer(existing=read_existing_dimension(OUTPUT_PATH))
+    write_table(customer_dim, OUTPUT_PATH)
     print("customer_dim created successfully")
     print(customer_dim.head())
\ No newline at end of file
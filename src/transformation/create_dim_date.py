@@ -1,18 +1,19 @@
 # Preparing Date Dimension Table
 
 import pandas as pd
-import os
 
-INPUT_PATH = "data/processed/superstore_cleaned.csv"
-OUTPUT_PATH = "data/processed/date_dim.csv"
+from src.utils.storage import write_table
 
-def create_dim_date():
-    df = pd.read_csv(INPUT_PATH)
+INPUT_PATH = "data/processed/superstore_cleaned.csv"
+OUTPUT_PATH = "data/processed/date_dim.parquet"
 
-    df['Order Date'] = pd.to_datetime(df['Order Date'])
+def create_dim_date(df=None):
+    # Source frame can be handed in by the pipeline to avoid re-reading the CSV
+    if df is None:
+        df = pd.read_csv(INPUT_PATH)
 
-    # Get unique dates
-    date_dim = df[['Order Date']].drop_duplicates().copy()
+    # Get unique dates (parsed on a copy so a shared source frame is left untouched)
+    date_dim = pd.to_datetime(df['Order Date']).drop_duplicates().to_frame()
 
     # Adding attributes
     date_dim['year'] = date_dim['Order Date'].dt.year       # 'The .dt accessor is used when the column contains datetime values. It allows you to extract specific components (like year, month, day, weekday, etc.) from each timestamp.'
@@ -20,9 +21,10 @@ def create_dim_date():
     date_dim['month'] = date_dim['Order Date'].dt.month
     date_dim['day'] = date_dim['Order Date'].dt.day
 
-    # Creating Surrogate Keys
+    # Smart key yyyymmdd: stable across rebuilds, so late-arriving earlier
+    # dates do not shift the keys of fact rows already appended
     date_dim = date_dim.sort_values('Order Date').reset_index(drop=True)
-    date_dim.insert(0,'date_key',range(1,len(date_dim) + 1))
+    date_dim.insert(0,'date_key',(date_dim['year'] * 10000 + date_dim['month'] * 100 + date_dim['day']).astype('int64'))
 
     date_dim.rename(columns={'Order Date': 'full_date'}, inplace=True)
 
@@ -30,8 +32,7 @@ def create_dim_date():
 
 
 if __name__ == "__main__":
-    os.makedirs("data/processed", exist_ok=True)
     date_dim = create_dim_date()
-    date_dim.to_csv(OUTPUT_PATH,index=False)
+    write_table(date_dim, OUTPUT_PATH)
     print('date_dim created successfully')
     print(date_dim.head())
\ No newline at end of file
@@ -1,33 +1,53 @@
 # Preparing Location Dimension Table
 
 import pandas as pd
-import os
 
-INPUT_PATH = "data/processed/superstore_cleaned.csv"
-OUTPUT_PATH = "data/processed/location_dim.csv"
-
-def create_dim_location():
-    df = pd.read_csv(INPUT_PATH)
+from src.utils.scd import apply_scd2, first_seen, read_existing_dimension
+from src.utils.storage import write_table
 
-    location_dim = df[['Country', 'State', 'City', 'Region']].drop_duplicates()
-
-    location_dim = location_dim.sort_values(['Country', 'State', 'City']).reset_index(drop=True)
+INPUT_PATH = "data/processed/superstore_cleaned.csv"
+OUTPUT_PATH = "data/processed/location_dim.parquet"
 
-    location_dim.insert(0,'location_key',range(1,len(location_dim)+1))
+def create_dim_location(df=None, existing=None, effective_date=None):
+    # Source frame can be handed in by the pipeline to avoid re-reading the CSV
+    if df is None:
+        df = pd.read_csv(INPUT_PATH)
 
-    location_dim.rename(columns={
+    source = df[['Order Date', 'Country', 'State', 'City', 'Region']].rename(columns={
         'Country': 'country',
         'State':'state',
         'City' : 'city',
         'Region' : 'region'
-    },inplace=True)
+    })
+
+    # Latest region per city (most recent order wins)
+    location_dim = source \
+        .sort_values('Order Date', kind='stable') \
+        .drop_duplicates(['country', 'state', 'city'], keep='last') \
+        .drop(columns='Order Date')
+
+    location_dim = location_dim.sort_values(['country', 'state', 'city']).reset_index(drop=True)
+
+    # A new version starts with the first order showing its region
+    location_dim['valid_from'] = first_seen(
+        source, location_dim, ['country', 'state', 'city'], ['region'], 'Order Date'
+    )
+
+    # Surrogate keys + SCD2 versioning against the existing dimension
+    location_dim = apply_scd2(
+        existing,
+        location_dim,
+        surrogate_key='location_key',
+        natural_key=['country', 'state', 'city'],
+        tracked_columns=['region'],
+        effective_date=effective_date
+    )
 
     return location_dim
 
 
 if __name__ == "__main__":
-    os.makedirs("data/processed",exist_ok=True)
-    location_dim = create_dim_location()
-    location_dim.to_csv(OUTPUT_PATH, index=False)
+    location_dim = create_dim_location(existing=read_existing_dimension(OUTPUT_PATH))
+    write_table(location_dim, OUTPUT_PATH)
     print("location_dim created successfully")
     print(location_dim.head())
@@ -1,27 +1,27 @@
 # Preparing Product Dimension Table
 
 import pandas as pd
-import os
 
-import pandas as pd
-import os
+from src.utils.scd import apply_scd2, first_seen, read_existing_dimension
+from src.utils.storage import read_table, write_table
 
 SUPERSTORE_PATH = "data/processed/superstore_cleaned.csv"
-API_PATH = "data/processed/fakestore_products_cleaned.csv"
-OUTPUT_PATH = "data/processed/product_dim.csv"
-
-def create_dim_product():
-    df_super = pd.read_csv(SUPERSTORE_PATH)
-    df_api = pd.read_csv(API_PATH)
+API_PATH = "data/processed/fakestore_products_cleaned.parquet"
+OUTPUT_PATH = "data/processed/product_dim.parquet"
 
-    df_super['Product ID'] = df_super['Product ID'].astype(str).str.strip()
+def create_dim_product(df_super=None, df_api=None, existing=None, effective_date=None):
+    # Source frames can be handed in by the pipeline to avoid re-reading the CSVs
+    if df_super is None:
+        df_super = pd.read_csv(SUPERSTORE_PATH)
+    if df_api is None:
+        df_api = read_table(API_PATH, columns=['product_price', 'rating_rate', 'rating_count'])
 
     # Step 1: Extract unique products from Superstore
     product_dim = df_super[['Product ID', 'Category', 'Sub-Category', 'Product Name']] \
     .copy()
 
     # Clean keys
-    product_dim['Product ID'] = product_dim['Product ID'].str.strip()
+    product_dim['Product ID'] = product_dim['Product ID'].astype(str).str.strip()
 
     # Remove exact duplicates
     product_dim = product_dim.drop_duplicates()
@@ -40,6 +40,18 @@ def create_dim_product():
         'Product Name': 'product_name'
     }, inplace=True)
 
+    # A new version starts with the first order showing its values
+    source = df_super[['Order Date', 'Product ID', 'Category', 'Sub-Category', 'Product Name']].rename(columns={
+        'Product ID': 'product_id',
+        'Category': 'category',
+        'Sub-Category': 'sub_category',
+        'Product Name': 'product_name'
+    })
+    source['product_id'] = source['product_id'].astype(str).str.strip()
+    product_dim['valid_from'] = first_seen(
+        source, product_dim, ['product_id'], ['category', 'sub_category', 'product_name'], 'Order Date'
+    )
+
     # Simple enrichment logic (random mapping)
     df_api_sample = df_api[['product_price','rating_rate','rating_count']]
 
@@ -55,15 +67,22 @@ def create_dim_product():
     # Concatenating Safely
     product_dim = pd.concat([product_dim, df_api_repeat], axis=1)
 
-    # Adding Surrogate Key
-    product_dim.insert(0, 'product_key', range(1, len(product_dim) + 1))
+    # Surrogate keys + SCD2 versioning against the existing dimension
+    # (API enrichment is not tracked, unchanged products keep their values)
+    product_dim = apply_scd2(
+        existing,
+        product_dim,
+        surrogate_key='product_key',
+        natural_key=['product_id'],
+        tracked_columns=['category', 'sub_category', 'product_name'],
+        effective_date=effective_date
+    )
 
     return product_dim
 
 
 if __name__ == "__main__":
-    os.makedirs("data/processed", exist_ok=True)
-    product_dim = create_dim_product()
-    product_dim.to_csv(OUTPUT_PATH, index=False)
+    product_dim = create_dim_product(existing=read_existing_dimension(OUTPUT_PATH))
+    write_table(product_dim, OUTPUT_PATH)
     print("product_dim created successfully")
     print(product_dim.head())
\ No newline at end of file
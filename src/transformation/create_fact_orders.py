@@ -1,103 +1,293 @@
 # Preparing Fact Table: fact_orders
 
 import pandas as pd
+import argparse
+import json
 import os
+import shutil
+
+from src.utils.key_resolution import KeyResolver
+from src.utils.scd import effective_versions
+from src.utils.storage import read_table, write_table
 
 # Input files
 SUPERSTORE_PATH = "data/processed/superstore_cleaned.csv"
-DIM_DATE_PATH = "data/processed/date_dim.csv"
-DIM_CUSTOMER_PATH = "data/processed/customer_dim.csv"
-DIM_LOCATION_PATH = "data/processed/location_dim.csv"
-DIM_PRODUCT_PATH = "data/processed/product_dim.csv"
+DIM_DATE_PATH = "data/processed/date_dim.parquet"
+DIM_CUSTOMER_PATH = "data/processed/customer_dim.parquet"
+DIM_LOCATION_PATH = "data/processed/location_dim.parquet"
+DIM_PRODUCT_PATH = "data/processed/product_dim.parquet"
+
+# Partitioned Parquet dataset: fact_orders/year=YYYY/month=M/*.parquet
+OUTPUT_PATH = "data/processed/fact_orders"
+PARTITION_COLS = ['year', 'month']
+WATERMARK_PATH = "data/processed/fact_orders_watermark.json"
+
+# Source rows per chunk in streaming mode
+CHUNK_SIZE = 100_000
+
+
+def versioned(dim):
+    # Column the versions are ordered by, None for plain dimensions
+    return 'valid_from' if 'valid_from' in dim.columns else None
+
+
+def strip_ids(values):
+    return values.astype(str).str.strip()
+
 
-OUTPUT_PATH = "data/processed/fact_orders.csv"
+def build_key_resolver(dim_date, dim_customer, dim_location, dim_product):
+    resolver = KeyResolver()
+    resolver.add_dimension('date', dim_date, ['full_date'], 'date_key',
+                           normalizers={'full_date': pd.to_datetime})
+    resolver.add_dimension('customer', dim_customer, ['customer_id'], 'customer_key',
+                           valid_from=versioned(dim_customer))
+    resolver.add_dimension('location', dim_location, ['country', 'state', 'city'], 'location_key',
+                           valid_from=versioned(dim_location))
+    resolver.add_dimension('product', dim_product, ['product_id'], 'product_key',
+                           normalizers={'product_id': strip_ids},
+                           valid_from=versioned(dim_product))
+    return resolver
+
+
+def load_dimensions(dim_date=None, dim_customer=None, dim_location=None, dim_product=None):
+    # Anything not handed in by the pipeline is read from data/processed
+    if dim_date is None:
+        dim_date = read_table(DIM_DATE_PATH, columns=['date_key', 'full_date'])
+    if dim_customer is None:
+        dim_customer = read_table(DIM_CUSTOMER_PATH)
+    if dim_location is None:
+        dim_location = read_table(DIM_LOCATION_PATH)
+    if dim_product is None:
+        dim_product = read_table(DIM_PRODUCT_PATH)
+
+    # Type 2 dimensions keep every version: each fact row resolves to the
+    # one valid on its order date, so rebuilds do not re-bind history.
+    # Versions replaced by a correction from their first day never apply
+    return (dim_date, effective_versions(dim_customer), effective_versions(dim_location),
+            effective_versions(dim_product))
+
+
+def build_fact_rows(df, resolver, start_key=1):
+    # Select fact columns with resolved surrogate keys
+    fact_orders = pd.DataFrame({
+        'order_id': df['Order ID'].array,
+        'order_date': pd.to_datetime(df['Order Date']).to_numpy(),
+        'date_key': resolver.resolve('date', df, ['Order Date']),
+        'customer_key': resolver.resolve('customer', df, ['Customer ID'], as_of=df['Order Date']),
+        'location_key': resolver.resolve('location', df, ['Country', 'State', 'City'],
+                                         as_of=df['Order Date']),
+        'product_key': resolver.resolve('product', df, ['Product ID'], as_of=df['Order Date']),
+        'sales': df['Sales'].to_numpy(),
+        'quantity': df['Quantity'].to_numpy(),
+        'discount': df['Discount'].to_numpy(),
+        'profit': df['Profit'].to_numpy(),
+        'lead_time_days': df['Lead_Time'].to_numpy()
+    })
+
+    # Create surrogate order_key (start_key continues numbering across loads/chunks)
+    fact_orders.insert(0, 'order_key', range(start_key, start_key + len(fact_orders)))
+
+    return fact_orders
 
 
-def create_fact_orders():
-    df = pd.read_csv(SUPERSTORE_PATH)
+def create_fact_orders(df=None, dim_date=None, dim_customer=None,
+                       dim_location=None, dim_product=None, start_key=1):
+    # Source and dimension frames can be handed in by the pipeline,
+    # anything not supplied is read from data/processed
+    if df is None:
+        df = pd.read_csv(SUPERSTORE_PATH)
     print("Original Rows: ",len(df))
 
-    dim_date = pd.read_csv(DIM_DATE_PATH)
-    dim_customer = pd.read_csv(DIM_CUSTOMER_PATH)
-    dim_location = pd.read_csv(DIM_LOCATION_PATH)
-    dim_product = pd.read_csv(DIM_PRODUCT_PATH)
-
-    # Convert dates
-    df['Order Date'] = pd.to_datetime(df['Order Date'])
-    dim_date['full_date'] = pd.to_datetime(dim_date['full_date'])
-
-    # Merge date_key
-    df = df.merge(dim_date[['date_key', 'full_date']],
-                  left_on='Order Date',
-                  right_on='full_date',
-                  how='left')
-    print("After date merge:", len(df))
-
-    # Merge customer_key
-    df = df.merge(dim_customer[['customer_key', 'customer_id']],
-                  left_on='Customer ID',
-                  right_on='customer_id',
-                  how='left')
-    print("After customer merge:", len(df))
-
-    # Merge location_key
-    df = df.merge(dim_location[['location_key', 'country', 'state', 'city', 'region']],
-                  left_on=['Country', 'State', 'City', 'Region'],
-                  right_on=['country', 'state', 'city', 'region'],
-                  how='left')
-    print("After customer merge:", len(df))
-
-    # temp
-    print("Before product merge:", len(df))
-    print("dim_product rows:", len(dim_product))
-    print("dim_product unique product_id:", dim_product['product_id'].nunique())
-
-
-    df['Product ID'] = df['Product ID'].astype(str).str.strip()
-    dim_product['product_id'] = dim_product['product_id'].astype(str).str.strip()
-    # Merge product_key
-    df = df.merge(dim_product[['product_key', 'product_id']],
-                  left_on='Product ID',
-                  right_on='product_id',
-                  how='left')
-    print("After product merge:", len(df))
-
-    # Select fact columns
-    fact_orders = df[[
-        'Order ID',
-        'Order Date',
-        'date_key',
-        'customer_key',
-        'location_key',
-        'product_key',
-        'Sales',
-        'Quantity',
-        'Discount',
-        'Profit',
-        'Lead_Time'
-    ]].copy()
-
-    # Rename
-    fact_orders.rename(columns={
-        'Order ID': 'order_id',
-        'Order Date': 'order_date',
-        'Sales': 'sales',
-        'Quantity': 'quantity',
-        'Discount': 'discount',
-        'Profit': 'profit',
-        'Lead_Time' :'lead_time_days'
-    }, inplace=True)
-
-    # Create surrogate order_key
-    fact_orders = fact_orders.reset_index(drop=True)
-    fact_orders.insert(0, 'order_key', range(1, len(fact_orders) + 1))
+    # Hash index per dimension, built once (no frame merges)
+    resolver = build_key_resolver(
+        *load_dimensions(dim_date, dim_customer, dim_location, dim_product)
+    )
+
+    fact_orders = build_fact_rows(df, resolver, start_key)
+    resolver.report()
+    print("Fact rows:", len(fact_orders))
 
     return fact_orders
 
 
+def load_watermark():
+    if not os.path.exists(WATERMARK_PATH):
+        return None
+    with open(WATERMARK_PATH) as f:
+        return json.load(f)
+
+
+def save_watermark(watermark):
+    os.makedirs(os.path.dirname(WATERMARK_PATH), exist_ok=True)
+    with open(WATERMARK_PATH, "w") as f:
+        json.dump(watermark, f, indent=2)
+
+
+def compute_watermark(df, fact_orders, previous=None):
+    # Highest Order Date / Row ID / order_key loaded so far
+    watermark = dict(previous) if previous else {
+        'max_order_date': None,
+        'max_row_id': None,
+        'max_order_key': 0
+    }
+
+    if len(df) == 0:
+        return watermark
+
+    max_order_date = pd.to_datetime(df['Order Date']).max().strftime('%Y-%m-%d')
+    if watermark['max_order_date'] is None or max_order_date > watermark['max_order_date']:
+        watermark['max_order_date'] = max_order_date
+
+    if 'Row ID' in df.columns:
+        max_row_id = int(df['Row ID'].max())
+        if watermark['max_row_id'] is None or max_row_id > watermark['max_row_id']:
+            watermark['max_row_id'] = max_row_id
+
+    watermark['max_order_key'] = int(fact_orders['order_key'].max())
+
+    return watermark
+
+
+def filter_new_rows(df, watermark):
+    # A row is new if it is dated after the watermark or carries a Row ID
+    # beyond it (late-arriving rows for an already loaded date)
+    if watermark is None or watermark['max_order_date'] is None:
+        return df
+
+    is_new = pd.to_datetime(df['Order Date']) > pd.Timestamp(watermark['max_order_date'])
+
+    if watermark['max_row_id'] is not None and 'Row ID' in df.columns:
+        is_new |= df['Row ID'] > watermark['max_row_id']
+
+    return df[is_new]
+
+
+def create_fact_orders_incremental(df=None, dim_date=None, dim_customer=None,
+                                   dim_location=None, dim_product=None):
+    """
+    Builds fact rows only for source rows past the stored watermark.
+    New rows get order_keys after the last loaded one, existing keys are untouched.
+    Returns the new fact rows and the advanced watermark.
+    """
+    if df is None:
+        df = pd.read_csv(SUPERSTORE_PATH)
+
+    watermark = load_watermark()
+    df_new = filter_new_rows(df, watermark)
+    print("New source rows since watermark:", len(df_new))
+
+    start_key = watermark['max_order_key'] + 1 if watermark else 1
+
+    fact_orders = create_fact_orders(
+        df_new,
+        dim_date=dim_date,
+        dim_customer=dim_customer,
+        dim_location=dim_location,
+        dim_product=dim_product,
+        start_key=start_key
+    )
+
+    return fact_orders, compute_watermark(df_new, fact_orders, watermark)
+
+
+def with_partition_columns(fact_orders):
+    order_date = pd.to_datetime(fact_orders['order_date'])
+    return fact_orders.assign(year=order_date.dt.year, month=order_date.dt.month)
+
+
+def save_fact_orders(fact_orders):
+    write_table(with_partition_columns(fact_orders), OUTPUT_PATH,
+                partition_cols=PARTITION_COLS)
+
+
+def clear_fact_orders():
+    if os.path.exists(OUTPUT_PATH):
+        shutil.rmtree(OUTPUT_PATH)
+
+
+def append_fact_orders(fact_orders):
+    # Appending new files keeps the write cost proportional to the new rows
+    if len(fact_orders) == 0:
+        return
+    write_table(with_partition_columns(fact_orders), OUTPUT_PATH,
+                partition_cols=PARTITION_COLS, mode='append')
+
+
+def stream_fact_orders(chunksize=CHUNK_SIZE, incremental=False, source_path=SUPERSTORE_PATH,
+                       dim_date=None, dim_customer=None, dim_location=None, dim_product=None):
+    """
+    Builds fact_orders from the source in fixed-size chunks.
+    Only the dimensions stay resident; each chunk is resolved and written
+    before the next is read, so peak memory follows chunksize, not input size.
+    order_key numbering continues from chunk to chunk (and from the
+    watermark in incremental mode). Returns the advanced watermark.
+    """
+    resolver = build_key_resolver(
+        *load_dimensions(dim_date, dim_customer, dim_location, dim_product)
+    )
+
+    watermark = load_watermark() if incremental else None
+    next_key = watermark['max_order_key'] + 1 if watermark else 1
+    new_watermark = watermark
+    rows_written = 0
+
+    # Full builds start from an empty dataset, even if the source has no rows
+    if not incremental:
+        clear_fact_orders()
+
+    for i, chunk in enumerate(pd.read_csv(source_path, chunksize=chunksize)):
+        if incremental:
+            chunk = filter_new_rows(chunk, watermark)
+
+        fact_chunk = build_fact_rows(chunk, resolver, next_key)
+        append_fact_orders(fact_chunk)
+
+        new_watermark = compute_watermark(chunk, fact_chunk, new_watermark)
+        next_key += len(fact_chunk)
+        rows_written += len(fact_chunk)
+        print(f"Chunk {i + 1}: {len(fact_chunk)} rows written")
+
+    resolver.report()
+    print("Fact rows written:", rows_written)
+
+    if new_watermark is None:
+        new_watermark = compute_watermark(pd.DataFrame(), None)
+
+    return new_watermark
+
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build fact_orders")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only process source rows past the stored watermark")
+    parser.add_argument("--stream", action="store_true",
+                        help="Read the source in chunks to bound memory use")
+    parser.add_argument("--chunksize", type=int, default=CHUNK_SIZE,
+                        help=f"Source rows per chunk in streaming mode (default: {CHUNK_SIZE})")
+    args = parser.parse_args()
+
     os.makedirs("data/processed", exist_ok=True)
-    fact_orders = create_fact_orders()
-    fact_orders.to_csv(OUTPUT_PATH, index=False)
-    print("fact_orders created successfully")
-    print(fact_orders.head())
\ No newline at end of file
+
+    # Without an existing output and watermark there is nothing to append to
+    incremental = (
+        args.incremental
+        and os.path.exists(OUTPUT_PATH)
+        and os.path.exists(WATERMARK_PATH)
+    )
+
+    if args.stream:
+        watermark = stream_fact_orders(chunksize=args.chunksize, incremental=incremental)
+        print("fact_orders streamed successfully")
+    elif incremental:
+        fact_orders, watermark = create_fact_orders_incremental()
+        append_fact_orders(fact_orders)
+        print(f"fact_orders appended {len(fact_orders)} rows")
+    else:
+        df = pd.read_csv(SUPERSTORE_PATH)
+        fact_orders = create_fact_orders(df)
+        save_fact_orders(fact_orders)
+        watermark = compute_watermark(df, fact_orders)
+        print("fact_orders created successfully")
+
+    save_watermark(watermark)
+    print("Watermark:", watermark)
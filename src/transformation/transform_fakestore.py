@@ -1,37 +1,33 @@
-import pandas as pd
-import os
+import pyarrow.json as pa_json
 
-RAW_PATH = "data/raw/fakestore_products_raw.csv"
-PROCESSED_PATH = "data/processed/fakestore_products_cleaned.csv"
+from src.utils.storage import write_table
 
+RAW_PATH = "data/raw/fakestore_products_raw.jsonl"
+PROCESSED_PATH = "data/processed/fakestore_products_cleaned.parquet"
 
-def transform_products():
-    # Flattening of JSON string to python dictionary
-    df = pd.read_csv(RAW_PATH)
-
-    # Convert rating string to dictionary
-    df['rating'] = df['rating'].apply(eval)
 
-    # Extract nested values
-    df['rating_rate'] = df['rating'].apply(lambda x: x.get('rate'))
-    df['rating_count'] = df['rating'].apply(lambda x: x.get('count'))
+def transform_products():
+    # Parse JSON Lines straight into Arrow; the nested rating object
+    # becomes a struct column (no eval on API data)
+    table = pa_json.read_json(RAW_PATH)
 
-    # Drop original nested column
-    df.drop(columns=['rating'], inplace=True)
+    # Flatten struct columns in one pass: rating -> rating.rate, rating.count
+    df = table.flatten().to_pandas()
 
     # Rename columns to warehouse-friendly naming
     df.rename(columns={
         'id': 'api_product_id',
         'title': 'product_title',
-        'price': 'product_price'
+        'price': 'product_price',
+        'rating.rate': 'rating_rate',
+        'rating.count': 'rating_count'
     }, inplace=True)
 
     return df
 
 
 def save_cleaned_data(df):
-    os.makedirs("data/processed", exist_ok=True)
-    df.to_csv(PROCESSED_PATH, index=False)
+    write_table(df, PROCESSED_PATH)
     print(f"Processed API data saved to {PROCESSED_PATH}")
 
 
@@ -39,4 +35,3 @@ if __name__ == "__main__":
     df_clean = transform_products()
     save_cleaned_data(df_clean)
     print(df_clean.head())
-    
\ No newline at end of file
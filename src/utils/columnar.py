@@ -0,0 +1,86 @@
+"""
+Columnar Helpers
+----------------
+Compacts Arrow tables returned by the warehouse before they are cached.
+
+- Low-cardinality string columns (region, category, state, city, ...)
+  are dictionary-encoded: one small integer per row plus each distinct
+  string once, instead of a Python string object per row.
+- Integer columns (and zero-scale decimals, e.g. DuckDB SUM results) are
+  downcast to the smallest integer type that holds their range.
+- float64 columns become float32 only when that is lossless, so monetary
+  sums keep full precision.
+"""
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# Dictionary-encode strings when distinct values / rows is at most this
+MAX_DICTIONARY_RATIO = 0.5
+
+INTEGER_TYPES = [pa.int8(), pa.int16(), pa.int32(), pa.int64()]
+
+
+def smallest_integer_type(column):
+    bounds = pc.min_max(column)
+    low, high = bounds["min"].as_py(), bounds["max"].as_py()
+    if low is None:
+        return pa.int8()
+
+    for int_type in INTEGER_TYPES:
+        info = np.iinfo(int_type.to_pandas_dtype())
+        if info.min <= low and high <= info.max:
+            return int_type
+    return pa.int64()
+
+
+def compact_column(column, max_dictionary_ratio=MAX_DICTIONARY_RATIO):
+    column_type = column.type
+
+    if pa.types.is_string(column_type) or pa.types.is_large_string(column_type):
+        distinct = pc.count_distinct(column).as_py()
+        if len(column) and distinct <= max_dictionary_ratio * len(column):
+            # Smallest index type for the number of distinct values
+            index_type = smallest_integer_type(pa.array([distinct]))
+            return column.dictionary_encode().cast(pa.dictionary(index_type, column_type))
+        return column
+
+    if pa.types.is_decimal(column_type) and column_type.scale == 0:
+        column = column.cast(pa.int64())
+        column_type = column.type
+
+    if pa.types.is_integer(column_type):
+        return column.cast(smallest_integer_type(column))
+
+    if pa.types.is_float64(column_type):
+        narrowed = column.cast(pa.float32())
+        if pc.all(pc.equal(narrowed.cast(pa.float64()), column)).as_py() is not False:
+            return narrowed
+
+    return column
+
+
+def compact_table(table, max_dictionary_ratio=MAX_DICTIONARY_RATIO):
+    return pa.table({
+        name: compact_column(column, max_dictionary_ratio)
+        for name, column in zip(table.column_names, table.columns)
+    })
+
+
+def dictionary_codes(column):
+    """
+    Sorted labels and one int code per row for a (dictionary-encoded or
+    plain) column, without materializing Python strings per row.
+    """
+    if not pa.types.is_dictionary(column.type):
+        column = column.dictionary_encode()
+    column = column.unify_dictionaries().combine_chunks() if isinstance(column, pa.ChunkedArray) else column
+
+    dictionary = column.dictionary.to_numpy(zero_copy_only=False)
+    order = np.argsort(dictionary, kind="stable")
+    rank = np.empty(len(order), dtype=np.intp)
+    rank[order] = np.arange(len(order))
+
+    indices = column.indices.to_numpy(zero_copy_only=False)
+    return dictionary[order], rank[indices]
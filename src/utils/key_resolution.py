@@ -0,0 +1,183 @@
+"""
+Surrogate Key Resolution
+------------------------
+Maps natural keys in a source frame to dimension surrogate keys without
+merging frames.
+
+Each dimension is indexed once: every natural key column is turned into a
+dictionary (its distinct values) and rows become integer codes into those
+dictionaries, combined into one int64 code per row. Source columns are
+factorized the same way, so strings are hashed once per distinct value
+and the per-row work is integer array indexing. Unmatched keys come back
+as <NA>; the row count never changes.
+
+Type 2 dimensions hold several versions per natural key. Indexed with
+their valid_from column, each source row resolves to the version valid
+on its own date (as_of): the latest one starting on or before it, or the
+first version for dates before any of them.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def _factorize(values, normalize=None):
+    # Per-row integer codes plus the distinct values they point to
+    if isinstance(values, pd.Series) and isinstance(values.dtype, pd.CategoricalDtype):
+        codes = values.cat.codes.to_numpy()
+        uniques = pd.Index(values.cat.categories)
+    else:
+        codes, uniques = pd.factorize(values)
+        uniques = pd.Index(uniques)
+
+    # Normalization (strip, date parsing, ...) runs on distinct values only
+    if normalize is not None:
+        uniques = pd.Index(normalize(pd.Series(uniques)))
+
+    return codes, uniques
+
+
+def _days(dates):
+    # Days since epoch as int64 (NaT -> int64 min)
+    return pd.to_datetime(pd.Series(dates)).to_numpy("datetime64[D]").astype(np.int64)
+
+
+def _pack(groups, days):
+    # (group, day) as one sortable int64
+    return groups * (1 << 32) + np.clip(days, -(1 << 31), (1 << 31) - 1) + (1 << 31)
+
+
+class KeyIndex:
+    """
+    Hash index from a dimension's natural key to its surrogate key.
+    With valid_from, the dimension is type 2 and may hold several
+    versions of a natural key.
+    """
+
+    def __init__(self, dim, natural_key, surrogate_key, normalizers=None, valid_from=None):
+        self.natural_key = list(natural_key)
+        self.surrogate_key = surrogate_key
+        self.normalizers = normalizers or {}
+
+        self.dictionaries = []
+        composite = np.zeros(len(dim), dtype=np.int64)
+        missing = np.zeros(len(dim), dtype=bool)
+
+        for column in self.natural_key:
+            codes, uniques = _factorize(dim[column], self.normalizers.get(column))
+            # Normalization can fold distinct raw values together
+            dictionary = pd.Index(uniques.unique())
+            # Missing values (code -1) would wrap around to the last entry
+            missing |= codes < 0
+            codes = np.append(dictionary.get_indexer(uniques), 0)[codes]
+
+            composite = composite * len(dictionary) + codes
+            self.dictionaries.append(dictionary)
+
+        # Rows with a missing natural key part can never be matched, as in lookup
+        composite = composite[~missing]
+        self.keys = dim[surrogate_key].to_numpy(dtype=np.int64)[~missing]
+        self.versions = None
+
+        if valid_from is None:
+            self.index = pd.Index(composite)
+            assert self.index.is_unique, f"{surrogate_key}: natural key is not unique in dimension!"
+            return
+
+        # Versions sorted by (natural key, valid_from, surrogate key), so of
+        # versions starting the same day the latest wins; a missing
+        # valid_from sorts first
+        days = _days(dim[valid_from])[~missing]
+        order = np.lexsort((self.keys, days, composite))
+        composite, days, self.keys = composite[order], days[order], self.keys[order]
+
+        # One index entry per natural key, pointing at its group of versions
+        self.index = pd.Index(composite).unique()
+        groups = self.index.get_indexer(composite)
+        self.versions = _pack(groups, days)
+        self.first_version = np.searchsorted(groups, np.arange(len(self.index)))
+
+    def lookup(self, columns, as_of=None):
+        """
+        Returns the position in the dimension for each source row, -1 if unmatched.
+        `columns` holds one array-like per natural key column, in order;
+        as_of holds each row's date for type 2 dimensions (latest version
+        when omitted or missing).
+        """
+        composite = None
+        unmatched = None
+
+        for column, values, dictionary in zip(self.natural_key, columns, self.dictionaries):
+            codes, uniques = _factorize(values, self.normalizers.get(column))
+
+            # Map distinct source values to dictionary codes, then broadcast to rows
+            unique_codes = np.append(dictionary.get_indexer(uniques), -1)
+            row_codes = unique_codes[codes]
+
+            missing = row_codes < 0
+            unmatched = missing if unmatched is None else unmatched | missing
+
+            row_codes = np.where(missing, 0, row_codes).astype(np.int64)
+            composite = row_codes if composite is None else composite * len(dictionary) + row_codes
+
+        positions = self.index.get_indexer(composite)
+        positions[unmatched] = -1
+
+        if self.versions is None:
+            return positions
+
+        # Version of the natural key valid on each row's date
+        groups = positions
+        if as_of is None:
+            days = np.full(len(groups), np.iinfo(np.int64).max)
+        else:
+            codes, uniques = _factorize(as_of, pd.to_datetime)
+            unique_days = np.append(_days(uniques), np.iinfo(np.int64).min)
+            days = unique_days[codes]
+            days = np.where(days == np.iinfo(np.int64).min, np.iinfo(np.int64).max, days)
+
+        matched = groups >= 0
+        safe_groups = np.where(matched, groups, 0)
+        positions = np.searchsorted(self.versions, _pack(safe_groups, days), side="right") - 1
+        positions = np.maximum(positions, self.first_version[safe_groups])
+        return np.where(matched, positions, -1)
+
+    def resolve(self, columns, as_of=None):
+        positions = self.lookup(columns, as_of)
+        matched = positions >= 0
+
+        if matched.all():
+            return self.keys[positions], 0
+
+        keys = pd.array(self.keys[np.where(matched, positions, 0)], dtype="Int64")
+        keys[~matched] = pd.NA
+        return keys, int((~matched).sum())
+
+
+class KeyResolver:
+    """
+    Holds one KeyIndex per dimension and records unmatched keys per dimension.
+    Build it once and reuse it for every batch of source rows.
+    """
+
+    def __init__(self):
+        self.indexes = {}
+        self.unmatched = {}
+
+    def add_dimension(self, name, dim, natural_key, surrogate_key, normalizers=None,
+                      valid_from=None):
+        self.indexes[name] = KeyIndex(dim, natural_key, surrogate_key, normalizers, valid_from)
+        self.unmatched[name] = 0
+        return self
+
+    def resolve(self, name, df, source_columns, as_of=None):
+        keys, unmatched = self.indexes[name].resolve(
+            [df[column] for column in source_columns], as_of
+        )
+        self.unmatched[name] += unmatched
+        return keys
+
+    def report(self):
+        for name, count in self.unmatched.items():
+            print(f"Unmatched {name} keys: {count}")
+        return dict(self.unmatched)
@@ -0,0 +1,164 @@
+"""
+Slowly Changing Dimensions (Type 2)
+-----------------------------------
+Versions dimension rows with valid_from / valid_to / is_current columns.
+
+Change detection hashes the natural key and the tracked attributes of
+whole frames at once (pd.util.hash_pandas_object), so comparing the
+incoming snapshot against the current dimension is a single join on
+64-bit integers instead of a row-by-row comparison.
+
+Versions start on the date their attribute values first show up in the
+source (first_seen), so late-arriving and backfilled orders resolve to
+the version that was valid on their own order date.
+"""
+
+import os
+import pandas as pd
+
+from src.utils.storage import read_table
+
+
+def row_hash(df, columns):
+    # One uint64 per row over the given columns
+    return pd.util.hash_pandas_object(df[columns], index=False).to_numpy()
+
+
+def first_seen(source, incoming, natural_key, tracked_columns, date_column):
+    """
+    Earliest source date carrying each incoming row's tracked values for
+    its natural key, aligned with `incoming`. Rows whose values never
+    appear together in the source fall back to the key's earliest date.
+    """
+    dates = pd.to_datetime(source[date_column])
+    columns = natural_key + tracked_columns
+
+    seen = source[columns].assign(first_seen=dates) \
+        .groupby(columns, dropna=False, sort=False)['first_seen'].min().reset_index()
+    key_seen = source[natural_key].assign(key_seen=dates) \
+        .groupby(natural_key, dropna=False, sort=False)['key_seen'].min().reset_index()
+
+    starts = incoming[columns].merge(seen, on=columns, how='left') \
+        .merge(key_seen, on=natural_key, how='left')
+    return starts['first_seen'].fillna(starts['key_seen']).to_numpy()
+
+
+def effective_versions(dim):
+    """
+    Drops versions that never took effect: a correction can start on or
+    before the version it replaces, which is then closed with valid_to on
+    or before its own valid_from.
+    """
+    if 'valid_to' not in dim.columns:
+        return dim
+    superseded = pd.to_datetime(dim['valid_to']) <= pd.to_datetime(dim['valid_from'])
+    return dim[~superseded].reset_index(drop=True)
+
+
+def read_existing_dimension(path):
+    """
+    Reads a previously written dimension, or returns None on first load.
+    Dimensions written before SCD2 was introduced are adopted as-is, with
+    every row treated as the current version so their keys are kept.
+    """
+    if not os.path.exists(path):
+        return None
+
+    existing = read_table(path)
+
+    if 'is_current' not in existing.columns:
+        existing['valid_from'] = pd.NaT
+        existing['valid_to'] = pd.NaT
+        existing['is_current'] = True
+
+    existing['valid_from'] = pd.to_datetime(existing['valid_from'])
+    existing['valid_to'] = pd.to_datetime(existing['valid_to'])
+    existing['is_current'] = existing['is_current'].astype(bool)
+
+    return existing
+
+
+def apply_scd2(existing, incoming, surrogate_key, natural_key, tracked_columns,
+               effective_date=None):
+    """
+    Merges an incoming snapshot (one row per natural key) into a type 2 dimension.
+
+    - New natural keys are inserted as current rows with fresh surrogate keys.
+    - Keys whose tracked columns changed get their current row closed
+      (valid_to = start of the new version, is_current = False) and a new
+      current version with a fresh surrogate key.
+    - Unchanged keys, and keys missing from the snapshot, are left as they are.
+
+    Versions start on the incoming row's valid_from when the snapshot
+    carries one (see first_seen), otherwise on effective_date (today).
+    """
+    if effective_date is None:
+        effective_date = pd.Timestamp.today().normalize()
+    effective_date = pd.Timestamp(effective_date)
+
+    incoming = incoming.reset_index(drop=True)
+    assert not incoming.duplicated(natural_key).any(), "Incoming natural keys are not unique!"
+
+    if 'valid_from' in incoming.columns:
+        starts = pd.to_datetime(incoming.pop('valid_from')).fillna(effective_date)
+    else:
+        starts = pd.Series(effective_date, index=incoming.index)
+
+    # First load: every row becomes the current version
+    if existing is None or len(existing) == 0:
+        dim = incoming.copy()
+        dim.insert(0, surrogate_key, range(1, len(dim) + 1))
+        dim['valid_from'] = starts.to_numpy()
+        dim['valid_to'] = pd.NaT
+        dim['is_current'] = True
+        return dim
+
+    existing = existing.reset_index(drop=True)
+    current = existing[existing['is_current']]
+
+    # Hash natural keys and tracked attributes for both sides in one pass each
+    current_keys = pd.DataFrame({
+        'key_hash': row_hash(current, natural_key),
+        'attr_hash': row_hash(current, tracked_columns),
+        'existing_row': current.index
+    })
+    incoming_keys = pd.DataFrame({
+        'key_hash': row_hash(incoming, natural_key),
+        'attr_hash': row_hash(incoming, tracked_columns),
+        'incoming_row': incoming.index
+    })
+
+    compared = incoming_keys.merge(
+        current_keys,
+        on='key_hash',
+        how='left',
+        suffixes=('', '_current')
+    )
+
+    is_new = compared['existing_row'].isna()
+    is_changed = ~is_new & (compared['attr_hash'] != compared['attr_hash_current'])
+
+    print(f"SCD2 {surrogate_key}: {int(is_new.sum())} new, "
+          f"{int(is_changed.sum())} changed, "
+          f"{int((~is_new & ~is_changed).sum())} unchanged")
+
+    # Close the current versions of changed keys where the new ones start
+    expired_rows = compared.loc[is_changed, 'existing_row'].astype(int).to_numpy()
+    changed_rows = compared.loc[is_changed, 'incoming_row'].to_numpy()
+    dim = existing.copy()
+    dim.loc[expired_rows, 'valid_to'] = starts.loc[changed_rows].to_numpy()
+    dim.loc[expired_rows, 'is_current'] = False
+
+    # Insert new keys and new versions of changed keys
+    inserted_rows = compared.loc[is_new | is_changed, 'incoming_row'].to_numpy()
+    inserts = incoming.loc[inserted_rows].copy()
+
+    next_key = int(existing[surrogate_key].max()) + 1
+    inserts.insert(0, surrogate_key, range(next_key, next_key + len(inserts)))
+    inserts['valid_from'] = starts.loc[inserted_rows].to_numpy()
+    inserts['valid_to'] = pd.NaT
+    inserts['is_current'] = True
+
+    dim = pd.concat([dim, inserts[dim.columns]], ignore_index=True)
+
+    return dim
@@ -0,0 +1,67 @@
+"""
+Processed Layer Storage
+-----------------------
+Reads and writes the typed Parquet files under data/processed.
+
+Single tables are stored as one Parquet file. Large facts are stored as
+hive-partitioned datasets (e.g. fact_orders/year=2016/month=11/...), so
+readers can load only the columns and partitions they need.
+"""
+
+import os
+import shutil
+import uuid
+
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+def write_table(df, path, partition_cols=None, mode="overwrite"):
+    """
+    Writes a frame as Parquet.
+
+    mode="overwrite" replaces the file/dataset, mode="append" adds new
+    files to a partitioned dataset without touching existing ones.
+    """
+    table = pa.Table.from_pandas(df, preserve_index=False)
+
+    if not partition_cols:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        pq.write_table(table, path, compression="snappy")
+        return
+
+    if mode == "overwrite" and os.path.exists(path):
+        shutil.rmtree(path)
+    os.makedirs(path, exist_ok=True)
+
+    # Unique file names so appended files never overwrite earlier ones
+    pq.write_to_dataset(
+        table,
+        path,
+        partition_cols=partition_cols,
+        basename_template=f"part-{uuid.uuid4().hex}-{{i}}.parquet",
+        existing_data_behavior="overwrite_or_ignore",
+        compression="snappy"
+    )
+
+
+def _to_expression(filters):
+    # Accepts a pyarrow expression or pandas-style [(column, op, value), ...]
+    if filters is None or isinstance(filters, ds.Expression):
+        return filters
+    return pq.filters_to_expression(filters)
+
+
+def read_table(path, columns=None, filters=None):
+    """
+    Reads a Parquet file or partitioned dataset into pandas.
+    Only the requested columns are decoded, and filters on partition
+    columns prune whole directories before any data is read.
+    """
+    dataset = ds.dataset(path, format="parquet", partitioning="hive")
+    table = dataset.to_table(columns=columns, filter=_to_expression(filters))
+    return table.to_pandas()
+
+
+def table_exists(path):
+    return os.path.exists(path)
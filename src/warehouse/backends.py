@@ -0,0 +1,161 @@
+"""
+Warehouse Backends
+------------------
+One interface over the warehouse for the loader and the dashboard:
+
+- BigQueryBackend: the GCP project / dataset configured in .env
+- DuckDBBackend: an embedded local database file (data/warehouse.duckdb),
+  no network round trips or credentials
+
+SQL is written once with `{dataset}.table` references (sql/, dashboard
+queries) and rendered for the selected backend. Query parameters use
+BigQuery's @name syntax on both.
+
+The backend is selected with WAREHOUSE_BACKEND (bigquery | duckdb).
+"""
+
+import datetime
+import os
+
+from dotenv import load_dotenv
+
+from src.warehouse.schema import DDL_PATH, duckdb_ddl
+
+load_dotenv()
+
+DEFAULT_BACKEND = "bigquery"
+
+VIEWS_PATH = "sql/create_views.sql"
+
+LOCAL_DATABASE = "data/warehouse.duckdb"
+
+
+class WarehouseBackend:
+
+    name = None
+
+    def __init__(self, dataset):
+        self.dataset = dataset
+        self._client = None
+
+    @property
+    def client(self):
+        # Load client used by load_to_bigquery, created on first use
+        if self._client is None:
+            self._client = self._create_client()
+        return self._client
+
+    def _create_client(self):
+        raise NotImplementedError
+
+    def render(self, sql):
+        return sql.replace("{dataset}", self.dataset)
+
+    def execute(self, sql):
+        # Runs a (multi-statement) script, e.g. DDL
+        self.client.query(self.render(sql)).result()
+
+    def query(self, sql, params=None):
+        """Runs a SELECT with optional {name: value} parameters; returns a DataFrame."""
+        return self.query_arrow(sql, params).to_pandas()
+
+    def query_arrow(self, sql, params=None):
+        """Same as query, but returns a pyarrow.Table (no pandas conversion)."""
+        raise NotImplementedError
+
+    def create_tables(self):
+        raise NotImplementedError
+
+    def create_views(self, path=VIEWS_PATH):
+        with open(path) as f:
+            self.execute(f.read())
+
+
+class BigQueryBackend(WarehouseBackend):
+
+    name = "bigquery"
+
+    def __init__(self, project=None, dataset=None):
+        self.project = project or os.getenv("GCP_PROJECT_ID")
+        super().__init__(f"{self.project}.{dataset or os.getenv('BQ_DATASET')}")
+
+    def _create_client(self):
+        from google.cloud import bigquery
+        return bigquery.Client(project=self.project)
+
+    def create_tables(self, path=DDL_PATH):
+        with open(path) as f:
+            self.execute(f.read())
+
+    def _run(self, sql, params):
+        from google.cloud import bigquery
+
+        job_config = None
+        if params:
+            job_config = bigquery.QueryJobConfig(
+                query_parameters=[query_parameter(name, value) for name, value in params.items()]
+            )
+
+        return self.client.query(self.render(sql), job_config=job_config)
+
+    def query(self, sql, params=None):
+        return self._run(sql, params).to_dataframe()
+
+    def query_arrow(self, sql, params=None):
+        return self._run(sql, params).to_arrow()
+
+
+def parameter_type(value):
+    # bool before int: True is an int in Python
+    if isinstance(value, bool):
+        return "BOOL"
+    if isinstance(value, int):
+        return "INT64"
+    if isinstance(value, float):
+        return "FLOAT64"
+    if isinstance(value, datetime.date):
+        return "DATE"
+    return "STRING"
+
+
+def query_parameter(name, value):
+    from google.cloud import bigquery
+
+    if isinstance(value, (list, tuple)):
+        element_type = parameter_type(value[0]) if value else "STRING"
+        return bigquery.ArrayQueryParameter(name, element_type, list(value))
+
+    return bigquery.ScalarQueryParameter(name, parameter_type(value), value)
+
+
+class DuckDBBackend(WarehouseBackend):
+
+    name = "duckdb"
+
+    def __init__(self, database=None):
+        # Table references are mapped to local names, the dataset is cosmetic
+        super().__init__("local")
+        self.database = database or os.getenv("DUCKDB_PATH", LOCAL_DATABASE)
+
+    def _create_client(self):
+        from src.warehouse.duckdb_client import DuckDBClient
+        return DuckDBClient(self.database)
+
+    def create_tables(self):
+        self.execute(duckdb_ddl())
+
+    def query_arrow(self, sql, params=None):
+        return self.client.query(self.render(sql), params=params).to_arrow()
+
+
+BACKENDS = {
+    BigQueryBackend.name: BigQueryBackend,
+    DuckDBBackend.name: DuckDBBackend,
+}
+
+
+def get_backend(name=None, **options):
+    name = name or os.getenv("WAREHOUSE_BACKEND", DEFAULT_BACKEND)
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown warehouse backend {name!r}, expected one of {sorted(BACKENDS)}")
+    return BACKENDS[name](**options)
@@ -0,0 +1,138 @@
+"""
+DuckDB Warehouse Client
+-----------------------
+Embedded local warehouse with the subset of the google.cloud.bigquery
+Client surface used by the loader and the dashboard: Parquet/DataFrame
+loads, SQL queries and DML. BigQuery-style `project.dataset.table`
+references are mapped to local table names, so the same SQL runs on both.
+
+The database lives in memory or in a single file
+(data/warehouse.duckdb by default for the local backend).
+"""
+
+import os
+import re
+import tempfile
+import threading
+
+import duckdb
+import pyarrow.parquet as pq
+
+# `project.dataset.table` -> "table"
+_TABLE_ID_PATTERN = re.compile(r"`(?:[\w\-{}]+\.)*(\w+)`")
+
+# BigQuery @name query parameters -> DuckDB $name
+_PARAMETER_PATTERN = re.compile(r"@(\w+)")
+
+
+def table_name_of(table_id):
+    return table_id.split(".")[-1]
+
+
+def to_local_sql(sql):
+    return _PARAMETER_PATTERN.sub(r"$\1", _TABLE_ID_PATTERN.sub(r'"\1"', sql))
+
+
+class LocalLoadJob:
+
+    def __init__(self, table_id, rows):
+        self.table_id = table_id
+        self.state = "DONE"
+        self.errors = None
+        self.output_rows = rows
+
+    def result(self):
+        return self
+
+
+class LocalQueryJob:
+
+    def __init__(self, table=None, affected_rows=None):
+        self.state = "DONE"
+        self.errors = None
+        self.num_dml_affected_rows = affected_rows
+        self._table = table
+
+    def result(self):
+        return self
+
+    def to_arrow(self):
+        return self._table
+
+    def to_dataframe(self):
+        return None if self._table is None else self._table.to_pandas()
+
+
+class DuckDBClient:
+
+    def __init__(self, database=":memory:", project=None):
+        self.project = project
+        self.database = database
+        self.job_configs = {}
+        self.queries = []
+
+        if database != ":memory:":
+            os.makedirs(os.path.dirname(database) or ".", exist_ok=True)
+        self.con = duckdb.connect(database)
+
+        # Merge-load snapshots must describe this database
+        if database == ":memory:":
+            self.load_state_dir = tempfile.mkdtemp(prefix="duckdb_warehouse_")
+        else:
+            self.load_state_dir = os.path.splitext(database)[0] + "_load_state"
+
+        self._table_ids = {}
+        self._lock = threading.Lock()
+
+    @property
+    def tables(self):
+        # {table_id: DataFrame} of everything loaded through this client
+        with self._lock:
+            return {
+                table_id: self.con.execute(f'SELECT * FROM "{name}"').df()
+                for name, table_id in self._table_ids.items()
+            }
+
+    def _write(self, data, table_id, job_config):
+        table_name = table_name_of(table_id)
+        append = getattr(job_config, "write_disposition", None) == "WRITE_APPEND"
+
+        with self._lock:
+            self.con.register("_incoming", data)
+            if append and self._exists(table_name):
+                self.con.execute(f'INSERT INTO "{table_name}" SELECT * FROM _incoming')
+            else:
+                self.con.execute(f'CREATE OR REPLACE TABLE "{table_name}" AS SELECT * FROM _incoming')
+            self.con.unregister("_incoming")
+            self._table_ids[table_name] = table_id
+            self.job_configs[table_id] = job_config
+
+    def _exists(self, table_name):
+        return bool(self.con.execute(
+            "SELECT count(*) FROM information_schema.tables WHERE table_name = ?",
+            [table_name]
+        ).fetchone()[0])
+
+    def load_table_from_dataframe(self, df, table_id, job_config=None):
+        self._write(df, table_id, job_config)
+        return LocalLoadJob(table_id, len(df))
+
+    def load_table_from_file(self, file_obj, table_id, job_config=None):
+        # Only Parquet uploads are used by the loader; DuckDB reads Arrow directly
+        return self.load_table_from_dataframe(pq.read_table(file_obj), table_id, job_config)
+
+    def query(self, sql, job_config=None, params=None):
+        with self._lock:
+            self.queries.append(sql)
+            cursor = self.con.execute(to_local_sql(sql), params or None)
+            table = None
+            if cursor.description:
+                fetch = getattr(cursor, "to_arrow_table", None) or cursor.fetch_arrow_table
+                table = fetch()
+
+        # DML statements return a single "Count" column
+        affected_rows = None
+        if table is not None and table.column_names == ["Count"] and table.num_rows == 1:
+            affected_rows = table.column(0)[0].as_py()
+
+        return LocalQueryJob(table, affected_rows)
@@ -0,0 +1,62 @@
+"""
+Fake BigQuery Client
+--------------------
+In-process stand-in for google.cloud.bigquery.Client covering the load
+and query calls used by load_to_bigquery. Tables are kept in an in-memory
+DuckDB database (see duckdb_client), so loads and MERGE statements can be
+exercised offline and without credentials; per-job latency and failures
+can be simulated on top.
+"""
+
+import time
+
+from src.warehouse.duckdb_client import DuckDBClient, table_name_of
+
+
+class FakeLoadJob:
+
+    def __init__(self, table_id, df, latency=0.0, error=None):
+        self.table_id = table_id
+        self.state = "RUNNING"
+        self.output_rows = None
+        self.errors = None
+        self._df = df
+        self._latency = latency
+        self._error = error
+
+    def result(self):
+        if self.state == "DONE":
+            return self
+
+        time.sleep(self._latency)
+        self.state = "DONE"
+
+        if self._error:
+            self.errors = [{"message": self._error}]
+            raise RuntimeError(self._error)
+
+        self.output_rows = len(self._df)
+        return self
+
+
+class FakeBigQueryClient(DuckDBClient):
+
+    def __init__(self, project=None, latency=0.0, fail_tables=()):
+        """
+        latency simulates per-job wait time; loads into any table named in
+        fail_tables fail when their result is awaited.
+        """
+        super().__init__(project=project)
+        self.latency = latency
+        self.fail_tables = set(fail_tables)
+
+    def load_table_from_dataframe(self, df, table_id, job_config=None):
+        table_name = table_name_of(table_id)
+        error = f"Simulated failure loading {table_name}" if table_name in self.fail_tables else None
+
+        if error is None:
+            self._write(df, table_id, job_config)
+        else:
+            self.job_configs[table_id] = job_config
+
+        return FakeLoadJob(table_id, df, latency=self.latency, error=error)
@@ -1,115 +1,353 @@
 from google.cloud import bigquery
 from dotenv import load_dotenv
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import pyarrow as pa
+import pyarrow.parquet as pq
+import argparse
+import io
 import os
+import time
+
+from src.utils.storage import read_table
+from src.warehouse.backends import BACKENDS, get_backend
+from src.warehouse.refresh_marts import changed_partitions, refresh_marts
+from src.warehouse.schema import parse_ddl, column_names, arrow_schema, bigquery_schema
+from src.warehouse.merge import (
+    LOAD_STATE_DIR, STAGING_SUFFIX, load_snapshot, save_snapshot, clear_snapshot,
+    save_last_load, build_snapshot, plan_merge, prefer_full_load, merge_statement
+)
 
 load_dotenv()
 
 PROJECT_ID = os.getenv("GCP_PROJECT_ID")
 DATASET_ID = os.getenv("BQ_DATASET")
 
-client = bigquery.Client(project=PROJECT_ID)
+BASE_PATH = "data/processed/"
 
-print("PROJECT_ID:", PROJECT_ID)
-print("Dataset used:", DATASET_ID)
+# Load jobs allowed in flight at once
+MAX_IN_FLIGHT = 4
 
-def load_dimension(csv_path, table_name):
-    table_id = f"{PROJECT_ID}.{DATASET_ID}.{table_name}"
+PARQUET_COMPRESSION = "zstd"
 
-    job_config = bigquery.LoadJobConfig(
-        source_format=bigquery.SourceFormat.CSV,
-        skip_leading_rows=1,
-        autodetect=True,
+# truncate rewrites whole tables, merge upserts changed rows only
+LOAD_MODES = ("truncate", "merge")
+
+# MERGE keys per table. Tables without keys are always rewritten, even in
+# merge mode: fact_inventory_daily is regenerated on every run and a new
+# order shifts every later stock level, so a MERGE would touch all of it.
+MERGE_KEYS = {
+    "dim_date": ["date_key"],
+    "dim_customer": ["customer_key"],
+    "dim_location": ["location_key"],
+    "dim_product": ["product_key"],
+    "dim_vendor": ["vendor_key"],
+    "bridge_product_vendor": ["product_vendor_key"],
+    "fact_inventory": ["product_key"],
+    "fact_vendor_performance": ["vendor_key"],
+    "fact_vendor_monthly": ["vendor_key", "month_key"],
+    "fact_orders": ["order_key"],
+}
+
+
+class LoadError(Exception):
+    def __init__(self, errors):
+        super().__init__(
+            f"{len(errors)} table load(s) failed: " +
+            "; ".join(f"{table}: {error}" for table, error in errors.items())
+        )
+        self.errors = errors
+
+
+def state_dir_of(client):
+    # Snapshots describe one warehouse; clients may keep their own
+    return getattr(client, "load_state_dir", LOAD_STATE_DIR)
+
+
+def get_client():
+    # Created on demand (not at import) so a fake client can be injected;
+    # WAREHOUSE_BACKEND picks BigQuery or the local DuckDB warehouse
+    return get_backend().client
+
+
+def finish_job(job, table_name, wait):
+    if wait and job is not None:
+        job.result()
+        print(f"{table_name} loaded successfully.")
+    return job
+
+
+def to_parquet_file(df, table_name, compression=PARQUET_COMPRESSION):
+    """
+    Serializes a frame to compressed Parquet in memory, cast to the
+    table's schema from sql/create_tables.sql, so BigQuery never has to
+    infer types.
+    """
+    schema = arrow_schema(table_name)
+    table = pa.Table.from_pandas(df[schema.names], preserve_index=False).cast(schema)
+
+    buffer = io.BytesIO()
+    pq.write_table(table, buffer, compression=compression)
+    buffer.seek(0)
+    return buffer
+
+
+def table_id_of(table_name):
+    return f"{PROJECT_ID}.{DATASET_ID}.{table_name}"
+
+
+def rows_written(job):
+    # Load jobs report output_rows, MERGE query jobs the affected rows
+    if hasattr(job, "num_dml_affected_rows"):
+        return job.num_dml_affected_rows
+    return job.output_rows
+
+
+def submit_load(client, df, table_name, job_config, destination=None):
+    """
+    Uploads df with table_name's schema into destination (default: the
+    table itself).
+    """
+    table_id = table_id_of(destination or table_name)
+    job_config.source_format = bigquery.SourceFormat.PARQUET
+    job_config.schema = bigquery_schema(table_name)
+
+    return client.load_table_from_file(
+        to_parquet_file(df, table_name),
+        table_id,
+        job_config=job_config
+    )
+
+
+def merge_load(client, df, table_name, job_config, partition_column=None):
+    """
+    Loads only the rows that changed since the last load into the staging
+    table and MERGEs them into table_name. The first merge-mode load of a
+    table is a full load that records its snapshot, and so is a load that
+    touches too many partitions (see prefer_full_load).
+    Waits for its jobs; returns the MERGE job, or None when nothing changed.
+    """
+    key_columns = MERGE_KEYS[table_name]
+    columns = column_names(table_name)
+
+    state_dir = state_dir_of(client)
+    previous = load_snapshot(table_name, state_dir)
+
+    if previous is None:
+        job = submit_load(client, df, table_name, job_config).result()
+        save_snapshot(build_snapshot(df, key_columns, columns, partition_column), table_name, state_dir)
+        save_last_load(table_name, None, state_dir)
+        return job
+
+    staging, partitions, snapshot = plan_merge(df, previous, key_columns, columns, partition_column)
+
+    if staging.empty and not partitions:
+        print(f"{table_name} is up to date, nothing to merge.")
+        save_last_load(table_name, [], state_dir)
+        return None
+
+    # Most of the table changed: one rewrite is cheaper than the MERGE
+    if prefer_full_load(partitions, snapshot, previous, partition_column):
+        print(f"{table_name}: {len(partitions)} partition(s) changed, rewriting the table.")
+        job = submit_load(client, df, table_name, job_config).result()
+        save_snapshot(snapshot, table_name, state_dir)
+        save_last_load(table_name, partitions, state_dir)
+        return job
+
+    staging_table = table_name + STAGING_SUFFIX
+    staging_config = bigquery.LoadJobConfig(
         write_disposition=bigquery.WriteDisposition.WRITE_TRUNCATE,
     )
+    submit_load(client, staging, table_name, staging_config, destination=staging_table).result()
 
-    with open(csv_path, "rb") as f:
-        job = client.load_table_from_file(f, table_id, job_config=job_config)
+    sql = merge_statement(
+        table_id_of(table_name),
+        table_id_of(staging_table),
+        key_columns,
+        columns,
+        partition_column=partition_column,
+        partitions=partitions
+    )
+    job = client.query(sql).result()
 
-    job.result()
-    print(f"{table_name} loaded successfully.")
-
-
-def load_fact(csv_path):
-    table_id = f"{PROJECT_ID}.{DATASET_ID}.fact_orders"
-
-    schema = [
-        bigquery.SchemaField("order_key", "INT64"),
-        bigquery.SchemaField("order_id", "STRING"),
-        bigquery.SchemaField("order_date", "DATE"),
-        bigquery.SchemaField("date_key", "INT64"),
-        bigquery.SchemaField("customer_key", "INT64"),
-        bigquery.SchemaField("location_key", "INT64"),
-        bigquery.SchemaField("product_key", "INT64"),
-        bigquery.SchemaField("sales", "FLOAT64"),
-        bigquery.SchemaField("quantity", "INT64"),
-        bigquery.SchemaField("discount", "FLOAT64"),
-        bigquery.SchemaField("profit", "FLOAT64"),
-        bigquery.SchemaField("lead_time_days", "INT64"),
-    ]
+    scope = f" across {len(partitions)} partition(s)" if partitions is not None else ""
+    print(f"{table_name}: merged {len(staging)} staged row(s){scope}.")
+
+    save_snapshot(snapshot, table_name, state_dir)
+    save_last_load(table_name, partitions, state_dir)
+    return job
+
+
+def submit(client, df, table_name, job_config, mode, partition_column=None):
+    if mode == "merge" and table_name in MERGE_KEYS:
+        return merge_load(client, df, table_name, job_config, partition_column)
+
+    # A full rewrite invalidates the merge snapshot until the next merge load
+    clear_snapshot(table_name, state_dir_of(client))
+    save_last_load(table_name, None, state_dir_of(client))
+    return submit_load(client, df, table_name, job_config)
+
+
+def load_dimension(path, table_name, client=None, wait=True, mode="truncate"):
+    client = client or get_client()
+
+    # Typed Parquet frame, no CSV re-parsing
+    df = read_table(path)
 
     job_config = bigquery.LoadJobConfig(
-    schema=schema,
-    source_format=bigquery.SourceFormat.CSV,
-    skip_leading_rows=1,
-    write_disposition=bigquery.WriteDisposition.WRITE_TRUNCATE,
-    create_disposition=bigquery.CreateDisposition.CREATE_IF_NEEDED,
-    # time_partitioning=bigquery.TimePartitioning(
-    #     type_=bigquery.TimePartitioningType.DAY,
-    #     field="order_date"
-    # ),
-    clustering_fields=["product_key", "customer_key"],
-)
+        write_disposition=bigquery.WriteDisposition.WRITE_TRUNCATE,
+    )
 
-    with open(csv_path, "rb") as f:
-        job = client.load_table_from_file(f, table_id, job_config=job_config)
+    job = submit(client, df, table_name, job_config, mode)
 
-    job.result()
+    return finish_job(job, table_name, wait)
 
-    print("Job State:", job.state)
-    print("Rows Loaded:", job.output_rows)
-    print("Errors:", job.errors)
 
-    # print("Rows loaded:", job.output_rows)
-    print("fact_orders loaded successfully.")
+def load_fact(path, table_name="fact_orders", client=None, wait=True, mode="truncate"):
+    client = client or get_client()
+    ddl = parse_ddl()[table_name]
 
+    # year/month are only partition directories in the processed layer
+    df = read_table(path, columns=column_names(table_name))
 
-def load_generic(csv_path, table_name):
+    # Date-partitioned and clustered as declared in the DDL
+    job_config = bigquery.LoadJobConfig(
+        write_disposition=bigquery.WriteDisposition.WRITE_TRUNCATE,
+        create_disposition=bigquery.CreateDisposition.CREATE_IF_NEEDED,
+        time_partitioning=bigquery.TimePartitioning(
+            type_=bigquery.TimePartitioningType.DAY,
+            field=ddl["partition_by"]
+        ),
+        clustering_fields=ddl["cluster_by"],
+    )
+
+    # Merge scope is the date partitions touched since the last load
+    job = submit(client, df, table_name, job_config, mode, partition_column=ddl["partition_by"])
+
+    if wait and job is not None:
+        job.result()
+        print("Job State:", job.state)
+        print("Rows Loaded:", rows_written(job))
+        print("Errors:", job.errors)
+
+    return finish_job(job, table_name, wait)
+
+
+def load_generic(path, table_name, client=None, wait=True, mode="truncate"):
     """
     Generic loader for non-partitioned tables.
     Used for inventory and vendor marts.
     """
-    table_id = f"{PROJECT_ID}.{DATASET_ID}.{table_name}"
+    client = client or get_client()
+
+    df = read_table(path)
 
     job_config = bigquery.LoadJobConfig(
-        source_format=bigquery.SourceFormat.CSV,
-        skip_leading_rows=1,
-        autodetect=True,
         write_disposition=bigquery.WriteDisposition.WRITE_TRUNCATE,
     )
 
-    with open(csv_path, "rb") as f:
-        job = client.load_table_from_file(f, table_id, job_config=job_config)
+    job = submit(client, df, table_name, job_config, mode)
+
+    return finish_job(job, table_name, wait)
 
+
+# (loader, file under BASE_PATH, target table); all loads are independent
+LOAD_JOBS = [
+    # Dimensions
+    (load_dimension, "date_dim.parquet", "dim_date"),
+    (load_dimension, "customer_dim.parquet", "dim_customer"),
+    (load_dimension, "location_dim.parquet", "dim_location"),
+    (load_dimension, "product_dim.parquet", "dim_product"),
+
+    # Inventory and Vendor
+    (load_generic, "fact_inventory.parquet", "fact_inventory"),
+    (load_generic, "dim_vendor.parquet", "dim_vendor"),
+    (load_dimension, "bridge_product_vendor.parquet", "bridge_product_vendor"),
+    (load_generic, "fact_vendor_performance.parquet", "fact_vendor_performance"),
+
+    # Main Fact, daily inventory and monthly vendor facts (date-partitioned)
+    (load_fact, "fact_orders", "fact_orders"),
+    (load_fact, "fact_inventory_daily.parquet", "fact_inventory_daily"),
+    (load_fact, "fact_vendor_monthly.parquet", "fact_vendor_monthly"),
+]
+
+
+def run_load(loader, path, table_name, client, mode="truncate"):
+    start = time.perf_counter()
+    job = loader(path, table_name, client=client, wait=False, mode=mode)
+    if job is None:
+        return None, time.perf_counter() - start
     job.result()
-    print(f"{table_name} loaded successfully.")
+    if job.errors:
+        raise RuntimeError(job.errors)
+    return job, time.perf_counter() - start
+
+
+def load_all(jobs=LOAD_JOBS, base_path=BASE_PATH, client=None, max_in_flight=MAX_IN_FLIGHT,
+             mode="truncate"):
+    """
+    Submits every table load concurrently, with at most max_in_flight
+    jobs running at once, and waits for all of them. Failures do not stop
+    the other loads; they are collected and raised together as LoadError.
+    mode is "truncate" (rewrite every table) or "merge" (upsert changes).
+    """
+    if mode not in LOAD_MODES:
+        raise ValueError(f"Unknown load mode {mode!r}, expected one of {LOAD_MODES}")
+
+    client = client or get_client()
+    errors = {}
+    results = {}
+
+    with ThreadPoolExecutor(max_workers=max_in_flight) as pool:
+        futures = {
+            pool.submit(run_load, loader, base_path + file_name, table_name, client, mode): table_name
+            for loader, file_name, table_name in jobs
+        }
+
+        for future in as_completed(futures):
+            table_name = futures[future]
+            try:
+                job, duration = future.result()
+            except Exception as e:
+                errors[table_name] = repr(e)
+                print(f"{table_name} failed: {e!r}")
+                continue
+
+            results[table_name] = job
+            if job is not None:
+                print(f"{table_name} loaded successfully ({rows_written(job)} rows, {duration:.2f}s).")
+
+    if errors:
+        raise LoadError(errors)
+
+    return results
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load processed tables into the warehouse")
+    parser.add_argument("--backend", choices=sorted(BACKENDS), default=None,
+                        help="Warehouse backend (default: WAREHOUSE_BACKEND or bigquery)")
+    parser.add_argument("--max-in-flight", type=int, default=MAX_IN_FLIGHT,
+                        help=f"Load jobs running at once (default: {MAX_IN_FLIGHT})")
+    parser.add_argument("--mode", choices=LOAD_MODES, default="truncate",
+                        help="truncate rewrites every table, merge upserts changed rows (default: truncate)")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Use the in-process fake client instead of BigQuery")
+    args = parser.parse_args()
 
-    base_path = "D:/REVATURE/Project-1_SCIS/data/processed/"
+    backend = get_backend(args.backend)
 
-    # Dimensions
-    load_dimension(base_path + "date_dim.csv", "dim_date")
-    load_dimension(base_path + "customer_dim.csv", "dim_customer")
-    load_dimension(base_path + "location_dim.csv", "dim_location")
-    load_dimension(base_path + "product_dim.csv", "dim_product")
-    
-    # Inventory and Vendor
-    load_generic(base_path + "fact_inventory.csv", "fact_inventory")
-    load_generic(base_path + "dim_vendor.csv", "dim_vendor")
-    load_generic(base_path + "fact_vendor_performance.csv", "fact_vendor_performance")
+    print("Backend:", backend.name)
+    print("Dataset used:", backend.dataset)
 
-    # Main Fact
-    load_fact(base_path + "fact_orders.csv")
+    if args.dry_run:
+        from src.warehouse.fake_bigquery import FakeBigQueryClient
+        client = FakeBigQueryClient(project=PROJECT_ID)
+        load_all(client=client, max_in_flight=args.max_in_flight, mode=args.mode)
+    else:
+        backend.create_tables()
+        load_all(client=backend.client, max_in_flight=args.max_in_flight, mode=args.mode)
+        # Re-aggregate only the months the fact load touched
+        refresh_marts(backend, changed_partitions(state_dir_of(backend.client)))
+        backend.create_views()
 
-    print("All tables loaded successfully.")
\ No newline at end of file
+    print("All tables loaded successfully.")
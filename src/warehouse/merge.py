@@ -0,0 +1,174 @@
+"""
+Merge Loads
+-----------
+Upserts only new or changed rows instead of rewriting whole tables.
+
+A snapshot of (key, row hash) is kept for every table after it is
+loaded. On the next load, rows whose key is new or whose hash changed are
+loaded into a `<table>__staging` table and applied with a keyed MERGE.
+
+For a partitioned table the staging table carries every row of each
+touched partition, and the MERGE is scoped to those partitions. Only they
+are scanned and rewritten, and rows deleted upstream are removed from
+them. Unpartitioned tables (the SCD2 dimensions) never delete rows, so
+only upserts are applied there.
+
+A MERGE only pays off while few partitions are touched: when a load
+touches more than MAX_MERGE_PARTITIONS of them, or more than
+MAX_MERGE_PARTITION_SHARE of the table's partitions, the table is
+rewritten with a plain load instead (this also caps the partition list
+in the MERGE scope).
+
+The partitions each load touched are recorded as well, so downstream
+aggregates (src/warehouse/refresh_marts.py) rebuild only those.
+"""
+
+import json
+import os
+
+import pandas as pd
+
+from src.utils.scd import row_hash
+
+LOAD_STATE_DIR = "data/.load_state"
+STAGING_SUFFIX = "__staging"
+
+# Beyond either limit a partitioned table is rewritten instead of merged
+MAX_MERGE_PARTITIONS = 200
+MAX_MERGE_PARTITION_SHARE = 0.5
+
+
+def snapshot_path(table_name, state_dir=LOAD_STATE_DIR):
+    return os.path.join(state_dir, f"{table_name}.parquet")
+
+
+def load_snapshot(table_name, state_dir=LOAD_STATE_DIR):
+    # None means the table has not been loaded in merge mode yet
+    path = snapshot_path(table_name, state_dir)
+    if not os.path.exists(path):
+        return None
+    return pd.read_parquet(path)
+
+
+def save_snapshot(snapshot, table_name, state_dir=LOAD_STATE_DIR):
+    os.makedirs(state_dir, exist_ok=True)
+    snapshot.to_parquet(snapshot_path(table_name, state_dir), index=False)
+
+
+def clear_snapshot(table_name, state_dir=LOAD_STATE_DIR):
+    path = snapshot_path(table_name, state_dir)
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def last_load_path(table_name, state_dir=LOAD_STATE_DIR):
+    return os.path.join(state_dir, f"{table_name}.last_load.json")
+
+
+def save_last_load(table_name, partitions, state_dir=LOAD_STATE_DIR):
+    """
+    Records the partitions the last load of table_name touched:
+    None for a full load, [] when nothing changed.
+    """
+    if partitions is not None:
+        partitions = [pd.Timestamp(p).date().isoformat() for p in partitions]
+
+    os.makedirs(state_dir, exist_ok=True)
+    with open(last_load_path(table_name, state_dir), "w") as f:
+        json.dump({"partitions": partitions}, f)
+
+
+def load_last_load(table_name, state_dir=LOAD_STATE_DIR):
+    # Unknown history is treated as a full load
+    path = last_load_path(table_name, state_dir)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)["partitions"]
+
+
+def build_snapshot(df, key_columns, columns, partition_column=None):
+    kept = key_columns + ([partition_column] if partition_column else [])
+    snapshot = df[kept].reset_index(drop=True)
+    snapshot['row_hash'] = row_hash(df, columns)
+    return snapshot
+
+
+def plan_merge(df, previous, key_columns, columns, partition_column=None):
+    """
+    Compares df with the previous snapshot.
+    Returns (staging rows, partitions in scope or None, new snapshot).
+    """
+    current = build_snapshot(df, key_columns, columns, partition_column)
+
+    compared = current.merge(
+        previous,
+        on=key_columns,
+        how='outer',
+        suffixes=('', '_previous'),
+        indicator=True
+    )
+
+    new = compared['_merge'] == 'left_only'
+    deleted = compared['_merge'] == 'right_only'
+    updated = (compared['_merge'] == 'both') & (compared['row_hash'] != compared['row_hash_previous'])
+    changed = new | updated
+
+    if partition_column is None:
+        staging = df.merge(compared.loc[changed, key_columns], on=key_columns)
+        return staging, None, current
+
+    # A row that moved partition touches both the old and the new one
+    touched = set(compared.loc[changed, partition_column])
+    touched |= set(compared.loc[updated | deleted, partition_column + '_previous'])
+    partitions = sorted(touched)
+
+    staging = df[df[partition_column].isin(partitions)]
+    return staging, partitions, current
+
+
+def prefer_full_load(partitions, current, previous, partition_column):
+    """
+    True when the partitions a merge would touch are too many for a
+    scoped MERGE to beat rewriting the table.
+    """
+    if not partitions:
+        return False
+
+    total = len(set(current[partition_column]) | set(previous[partition_column]))
+    return (
+        len(partitions) > MAX_MERGE_PARTITIONS
+        or len(partitions) > MAX_MERGE_PARTITION_SHARE * total
+    )
+
+
+def merge_statement(target, staging, key_columns, columns,
+                    partition_column=None, partitions=None):
+    """
+    Keyed MERGE of staging into target. With partitions, matching and
+    deletes are restricted to those DATE partitions of the target.
+    """
+    on = " AND ".join(f"T.{k} = S.{k}" for k in key_columns)
+    updates = ",\n    ".join(f"{c} = S.{c}" for c in columns if c not in key_columns)
+
+    scope = None
+    if partitions is not None:
+        literals = ", ".join(f"DATE '{pd.Timestamp(p).date().isoformat()}'" for p in partitions)
+        scope = f"T.{partition_column} IN ({literals})"
+        on += f" AND {scope}"
+
+    sql = (
+        f"MERGE INTO `{target}` AS T\n"
+        f"USING `{staging}` AS S\n"
+        f"ON {on}\n"
+        f"WHEN MATCHED THEN UPDATE SET\n"
+        f"    {updates}\n"
+        f"WHEN NOT MATCHED THEN\n"
+        f"    INSERT ({', '.join(columns)})\n"
+        f"    VALUES ({', '.join('S.' + c for c in columns)})"
+    )
+
+    if scope:
+        sql += f"\nWHEN NOT MATCHED BY SOURCE AND {scope} THEN DELETE"
+
+    return sql
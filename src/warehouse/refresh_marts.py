@@ -0,0 +1,136 @@
+"""
+Mart Refresh
+------------
+Rebuilds the materialized aggregate tables behind the vw_* views
+(mart_sales, mart_geo_sales, mart_sales_cube) from fact_orders.
+
+Each mart is defined by a SELECT in sql/marts/<mart>.sql and keyed by
+month_key (year * 100 + month). After a load only the months whose
+order_date partitions changed are deleted and re-aggregated, in one
+transaction per mart; a full rebuild happens when the fact was rewritten
+or a joined dimension changed. Dashboard queries then read a few
+thousand pre-aggregated rows, whatever the size of fact_orders.
+
+Runs on both warehouse backends (BigQuery and the local DuckDB file).
+"""
+
+import argparse
+import os
+
+import pandas as pd
+
+from src.warehouse.backends import BACKENDS, get_backend
+from src.warehouse.merge import LOAD_STATE_DIR, load_last_load
+from src.warehouse.schema import column_names
+
+MARTS_DIR = "sql/marts"
+
+MARTS = ("mart_sales", "mart_geo_sales", "mart_sales_cube")
+
+FACT_TABLE = "fact_orders"
+
+# Dimensions joined by the marts; any change to them rebuilds every month
+MART_DIMENSIONS = ("dim_date", "dim_location", "dim_product")
+
+
+def mart_select(mart, marts_dir=MARTS_DIR):
+    with open(os.path.join(marts_dir, f"{mart}.sql")) as f:
+        return f.read()
+
+
+def changed_partitions(state_dir=LOAD_STATE_DIR):
+    """
+    order_date partitions changed by the last load, from the load state:
+    None when everything must be rebuilt, [] when nothing changed.
+    """
+    for table_name in MART_DIMENSIONS:
+        if load_last_load(table_name, state_dir) != []:
+            return None
+    return load_last_load(FACT_TABLE, state_dir)
+
+
+def affected_months(partitions):
+    # None -> full refresh, otherwise sorted month keys of the partitions
+    if partitions is None:
+        return None
+    dates = pd.to_datetime(pd.Series(list(partitions), dtype=object))
+    return sorted(set(dates.dt.year * 100 + dates.dt.month))
+
+
+def month_bounds(months):
+    # First and last day covered by the month keys
+    first = pd.Timestamp(year=months[0] // 100, month=months[0] % 100, day=1)
+    last = pd.Timestamp(year=months[-1] // 100, month=months[-1] % 100, day=1) + pd.offsets.MonthEnd(0)
+    return first.date().isoformat(), last.date().isoformat()
+
+
+def scope_condition(months):
+    """
+    Fact filter for the months being rebuilt. The order_date range lets
+    the warehouse prune fact_orders partitions before the join.
+    """
+    if months is None:
+        return "TRUE"
+
+    first, last = month_bounds(months)
+    keys = ", ".join(str(m) for m in months)
+    return (
+        f"f.order_date BETWEEN DATE '{first}' AND DATE '{last}' "
+        f"AND d.year * 100 + d.month IN ({keys})"
+    )
+
+
+def refresh_script(mart, months, marts_dir=MARTS_DIR):
+    """
+    Delete-and-insert of the affected months (all months when months is
+    None) as a single transaction, so readers never see a half-built month.
+    """
+    select = mart_select(mart, marts_dir).replace("{scope}", scope_condition(months))
+    delete_scope = "TRUE" if months is None else f"month_key IN ({', '.join(str(m) for m in months)})"
+
+    return (
+        "BEGIN TRANSACTION;\n"
+        f"DELETE FROM `{{dataset}}.{mart}` WHERE {delete_scope};\n"
+        f"INSERT INTO `{{dataset}}.{mart}` ({', '.join(column_names(mart))})\n"
+        f"{select};\n"
+        "COMMIT TRANSACTION;"
+    )
+
+
+def refresh_marts(backend=None, partitions=None, marts=MARTS, marts_dir=MARTS_DIR):
+    """
+    Refreshes every mart for the given order_date partitions
+    (None = full refresh, [] = nothing to do).
+    """
+    backend = backend or get_backend()
+    months = affected_months(partitions)
+
+    if months == []:
+        print("Marts are up to date, nothing to refresh.")
+        return months
+
+    scope = "all months" if months is None else f"{len(months)} month(s)"
+    for mart in marts:
+        backend.execute(refresh_script(mart, months, marts_dir))
+        print(f"{mart} refreshed ({scope}).")
+
+    return months
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Refresh the materialized marts behind the dashboard views")
+    parser.add_argument("--backend", choices=sorted(BACKENDS), default=None,
+                        help="Warehouse backend (default: WAREHOUSE_BACKEND or bigquery)")
+    parser.add_argument("--full", action="store_true",
+                        help="Rebuild every month instead of the ones changed by the last load")
+    args = parser.parse_args()
+
+    backend = get_backend(args.backend)
+    backend.create_tables()
+
+    if args.full:
+        partitions = None
+    else:
+        partitions = changed_partitions(getattr(backend.client, "load_state_dir", LOAD_STATE_DIR))
+
+    refresh_marts(backend, partitions)
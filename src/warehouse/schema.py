@@ -0,0 +1,93 @@
+"""
+Warehouse Schemas
+-----------------
+Reads table definitions from sql/create_tables.sql so the DDL stays the
+single source of truth for column names and types, and converts them to
+BigQuery SchemaFields and Arrow schemas for typed uploads, and to DuckDB
+DDL for the local warehouse backend.
+
+Table references in sql/ are templated as `{dataset}.table`.
+"""
+
+import re
+
+import pyarrow as pa
+
+DDL_PATH = "sql/create_tables.sql"
+
+ARROW_TYPES = {
+    "INT64": pa.int64(),
+    "FLOAT64": pa.float64(),
+    "NUMERIC": pa.float64(),
+    "STRING": pa.string(),
+    "BOOL": pa.bool_(),
+    "DATE": pa.date32(),
+    "TIMESTAMP": pa.timestamp("us", tz="UTC"),
+}
+
+DUCKDB_TYPES = {
+    "INT64": "BIGINT",
+    "FLOAT64": "DOUBLE",
+    "NUMERIC": "DOUBLE",
+    "STRING": "VARCHAR",
+    "BOOL": "BOOLEAN",
+    "DATE": "DATE",
+    "TIMESTAMP": "TIMESTAMPTZ",
+}
+
+_TABLE_PATTERN = re.compile(
+    r"CREATE\s+TABLE\s+IF\s+NOT\s+EXISTS\s+`?[\w\-.{}]*?(\w+)`?\s*\((.*?)\)\s*"
+    r"(?:PARTITION\s+BY\s+(\w+)\s*)?(?:CLUSTER\s+BY\s+([\w,\s]+?)\s*)?;",
+    re.IGNORECASE | re.DOTALL,
+)
+
+
+def parse_ddl(path=DDL_PATH):
+    """
+    Returns {table_name: {"columns": [(name, type), ...],
+                          "partition_by": column or None,
+                          "cluster_by": [columns]}}
+    """
+    with open(path) as f:
+        ddl = re.sub(r"--[^\n]*", "", f.read())
+
+    tables = {}
+    for name, body, partition_by, cluster_by in _TABLE_PATTERN.findall(ddl):
+        columns = []
+        for line in body.split(","):
+            parts = line.split()
+            if len(parts) >= 2:
+                columns.append((parts[0], parts[1].upper()))
+
+        tables[name] = {
+            "columns": columns,
+            "partition_by": partition_by or None,
+            "cluster_by": [c.strip() for c in cluster_by.split(",")] if cluster_by else [],
+        }
+
+    return tables
+
+
+def column_names(table_name, path=DDL_PATH):
+    return [name for name, _ in parse_ddl(path)[table_name]["columns"]]
+
+
+def arrow_schema(table_name, path=DDL_PATH):
+    columns = parse_ddl(path)[table_name]["columns"]
+    return pa.schema([(name, ARROW_TYPES[col_type]) for name, col_type in columns])
+
+
+def bigquery_schema(table_name, path=DDL_PATH):
+    from google.cloud import bigquery
+
+    columns = parse_ddl(path)[table_name]["columns"]
+    return [bigquery.SchemaField(name, col_type) for name, col_type in columns]
+
+
+def duckdb_ddl(path=DDL_PATH):
+    # Same tables without BigQuery types, partitioning or clustering
+    statements = []
+    for name, table in parse_ddl(path).items():
+        columns = ",\n".join(f"    {col} {DUCKDB_TYPES[col_type]}" for col, col_type in table["columns"])
+        statements.append(f'CREATE TABLE IF NOT EXISTS "{name}" (\n{columns}\n);')
+    return "\n\n".join(statements)
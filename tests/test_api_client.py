@@ -0,0 +1,82 @@
+import asyncio
+
+import pytest
+
+from src.ingestion.api_client import ApiClient, ApiError
+from src.ingestion.stub_server import StubServer
+
+PRODUCTS = [{"id": i, "title": f"Product {i}", "price": float(i)} for i in range(1, 21)]
+
+
+def fetch(url, **client_options):
+    async def run():
+        async with ApiClient(backoff=0, **client_options) as client:
+            return await client.get_json(url)
+
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize("status", [429, 500, 503])
+def test_retries_transient_statuses(status):
+    with StubServer(PRODUCTS, fail_first=2, fail_status=status) as server:
+        payload = fetch(f"{server.url}/products", retries=3)
+
+        assert payload == PRODUCTS
+        assert server.request_counts["/products"] == 3
+
+
+def test_gives_up_after_the_last_retry():
+    with StubServer(PRODUCTS, fail_first=5, fail_status=429) as server:
+        with pytest.raises(ApiError) as error:
+            fetch(f"{server.url}/products", retries=2)
+
+        assert error.value.status == 429
+        assert server.request_counts["/products"] == 3
+
+
+def test_other_errors_fail_fast():
+    with StubServer(PRODUCTS) as server:
+        with pytest.raises(ApiError) as error:
+            fetch(f"{server.url}/products/999", retries=3)
+
+        assert error.value.status == 404
+        assert server.request_counts["/products/999"] == 1
+
+
+def test_backoff_grows_exponentially(monkeypatch):
+    delays = []
+
+    async def sleep(seconds):
+        delays.append(seconds)
+
+    monkeypatch.setattr("src.ingestion.api_client.asyncio.sleep", sleep)
+    monkeypatch.setattr("src.ingestion.api_client.random.random", lambda: 0.5)
+
+    async def run():
+        client = ApiClient(backoff=0.5)
+        for attempt in range(3):
+            await client._sleep_before_retry(attempt)
+
+    asyncio.run(run())
+    assert delays == [0.5, 1.0, 2.0]
+
+
+def test_concurrency_is_capped_per_endpoint():
+    with StubServer(PRODUCTS, delay=0.05) as server:
+        async def run():
+            async with ApiClient(default_limit=2, endpoint_limits={"products": 3}) as client:
+                default = await client.get_pages(f"{server.url}/products", range(1, 9),
+                                                 params={"limit": 2})
+                default_peak = server.max_in_flight
+
+                server.max_in_flight = 0
+                named = await client.get_pages(f"{server.url}/products", range(1, 9),
+                                               params={"limit": 2}, endpoint="products")
+                return default, default_peak, named
+
+        default, default_peak, named = asyncio.run(run())
+
+        assert default_peak == 2
+        assert server.max_in_flight == 3
+        assert [p["id"] for page in default for p in page] == list(range(1, 17))
+        assert named == default
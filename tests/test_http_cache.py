@@ -0,0 +1,55 @@
+import asyncio
+
+from src.ingestion.api_client import ApiClient
+from src.ingestion.http_cache import ResponseCache
+from src.ingestion.stub_server import StubServer
+
+PRODUCTS = [{"id": i, "title": f"Product {i}"} for i in range(1, 6)]
+
+
+def fetch(url, cache, params=None):
+    async def run():
+        async with ApiClient(backoff=0, cache=cache) as client:
+            return await client.get_json_conditional(url, params)
+
+    return asyncio.run(run())
+
+
+def test_not_modified_reuses_cached_payload(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+
+    with StubServer(PRODUCTS) as server:
+        url = f"{server.url}/products"
+
+        assert fetch(url, cache) == (PRODUCTS, True)
+        metadata, _ = cache.get(url)
+        assert cache.conditional_headers(url)["If-None-Match"] == metadata["etag"]
+
+        # Same ETag: the server answers 304 and the body comes from disk
+        assert fetch(url, cache) == (PRODUCTS, False)
+        assert server.request_counts["/products"] == 2
+
+        # A changed resource is downloaded and replaces the cached copy
+        server.products = PRODUCTS[:2]
+        assert fetch(url, cache) == (PRODUCTS[:2], True)
+        assert cache.get(url)[0]["etag"] != metadata["etag"]
+        assert fetch(url, cache) == (PRODUCTS[:2], False)
+
+
+def test_cache_is_keyed_by_query_parameters(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+
+    with StubServer(PRODUCTS) as server:
+        url = f"{server.url}/products"
+
+        assert fetch(url, cache, {"page": 1, "limit": 2}) == (PRODUCTS[:2], True)
+        assert fetch(url, cache, {"page": 2, "limit": 2}) == (PRODUCTS[2:4], True)
+        assert fetch(url, cache, {"limit": 2, "page": 1}) == (PRODUCTS[:2], False)
+
+
+def test_without_cache_every_response_is_downloaded():
+    with StubServer(PRODUCTS) as server:
+        url = f"{server.url}/products"
+
+        assert fetch(url, None) == (PRODUCTS, True)
+        assert fetch(url, None) == (PRODUCTS, True)
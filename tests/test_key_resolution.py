@@ -0,0 +1,143 @@
+import numpy as np
+import pandas as pd
+
+from src.transformation.create_fact_orders import strip_ids
+from src.utils.key_resolution import KeyIndex, KeyResolver
+
+
+def location_dim():
+    return pd.DataFrame({
+        "location_key": [10, 11, 12],
+        "country": ["US", "US", "US"],
+        "state": ["CA", "CA", "NY"],
+        "city": ["Fresno", "Oakland", "Albany"],
+    })
+
+
+def test_composite_key_lookup():
+    index = KeyIndex(location_dim(), ["country", "state", "city"], "location_key")
+
+    keys, unmatched = index.resolve([
+        pd.Series(["US", "US", "US", "US"]),
+        pd.Series(["NY", "CA", "CA", "NY"]),
+        pd.Series(["Albany", "Fresno", "Albany", "Oakland"]),
+    ])
+
+    # (CA, Albany) and (NY, Oakland) only exist column by column
+    assert unmatched == 2
+    assert keys[0] == 12 and keys[1] == 10
+    assert pd.isna(keys[2]) and pd.isna(keys[3])
+
+
+def test_all_matched_returns_plain_int64():
+    index = KeyIndex(location_dim(), ["country", "state", "city"], "location_key")
+
+    keys, unmatched = index.resolve([
+        pd.Series(["US", "US"]), pd.Series(["CA", "CA"]), pd.Series(["Oakland", "Fresno"]),
+    ])
+
+    assert unmatched == 0
+    assert keys.dtype == np.int64
+    assert keys.tolist() == [11, 10]
+
+
+def test_normalizers_apply_to_both_sides():
+    dim = pd.DataFrame({"product_key": [1, 2], "product_id": [" A-1", "B-2 "]})
+    index = KeyIndex(dim, ["product_id"], "product_key", normalizers={"product_id": strip_ids})
+
+    keys, unmatched = index.resolve([pd.Series(["B-2", "A-1 ", "C-3"])])
+
+    assert unmatched == 1
+    assert keys[:2].tolist() == [2, 1]
+
+
+def test_categorical_source_columns():
+    index = KeyIndex(location_dim(), ["country", "state", "city"], "location_key")
+
+    keys, unmatched = index.resolve([
+        pd.Series(["US", "US"], dtype="category"),
+        pd.Series(["NY", "CA"], dtype="category"),
+        pd.Series(["Albany", "Oakland"], dtype="category"),
+    ])
+
+    assert unmatched == 0
+    assert keys.tolist() == [12, 11]
+
+
+def test_versions_resolve_as_of_date():
+    dim = pd.DataFrame({
+        "customer_key": [1, 2, 3, 4],
+        "customer_id": ["C1", "C2", "C1", "C1"],
+        "valid_from": pd.to_datetime(["2020-01-01", "2020-01-01", "2021-06-01", "2022-01-01"]),
+    })
+    index = KeyIndex(dim, ["customer_id"], "customer_key", valid_from="valid_from")
+
+    keys, unmatched = index.resolve(
+        [pd.Series(["C1", "C1", "C1", "C1", "C2", "C3"])],
+        as_of=pd.Series(["2019-05-01", "2021-05-31", "2021-06-01", "2023-01-01", "2019-01-01", "2021-01-01"]),
+    )
+
+    # Dates before the first version resolve to it
+    assert unmatched == 1
+    assert keys[:5].tolist() == [1, 1, 3, 4, 2]
+
+
+def test_versions_starting_the_same_day_resolve_to_the_latest():
+    dim = pd.DataFrame({
+        "location_key": [7, 8],
+        "city": ["Loveland", "Loveland"],
+        "valid_from": pd.to_datetime(["2024-03-01", "2024-03-01"]),
+    })
+    index = KeyIndex(dim, ["city"], "location_key", valid_from="valid_from")
+
+    keys, _ = index.resolve([pd.Series(["Loveland", "Loveland"])],
+                            as_of=pd.Series(["2020-01-01", "2024-03-02"]))
+
+    # Earlier dates fall back to the first version
+    assert keys.tolist() == [7, 8]
+
+
+def test_versions_without_dates_resolve_to_the_latest():
+    dim = pd.DataFrame({
+        "product_key": [1, 2],
+        "product_id": ["P1", "P1"],
+        "valid_from": pd.to_datetime([None, "2022-01-01"]),
+    })
+    index = KeyIndex(dim, ["product_id"], "product_key", valid_from="valid_from")
+
+    keys, _ = index.resolve([pd.Series(["P1", "P1"])], as_of=pd.Series([None, "2021-01-01"]))
+    assert keys.tolist() == [2, 1]
+
+    keys, _ = index.resolve([pd.Series(["P1"])])
+    assert keys.tolist() == [2]
+
+
+def test_resolver_counts_unmatched_per_dimension():
+    resolver = KeyResolver().add_dimension(
+        "location", location_dim(), ["country", "state", "city"], "location_key"
+    )
+    df = pd.DataFrame({"Country": ["US", "US"], "State": ["CA", "TX"], "City": ["Fresno", "Austin"]})
+
+    resolver.resolve("location", df, ["Country", "State", "City"])
+    resolver.resolve("location", df, ["Country", "State", "City"])
+
+    assert resolver.report() == {"location": 2}
+
+
+def test_missing_natural_key_parts_never_match():
+    dim = pd.DataFrame({
+        "location_key": [10, 11, 12],
+        "country": ["US", "US", "US"],
+        "state": ["CA", None, "NY"],
+        "city": ["Fresno", "Oakland", "Albany"],
+    })
+    index = KeyIndex(dim, ["country", "state", "city"], "location_key")
+
+    keys, unmatched = index.resolve([
+        pd.Series(["US", "US", "US"]), pd.Series(["NY", "NY", None]), pd.Series(["Albany", "Oakland", "Oakland"]),
+    ])
+
+    # The missing state must not wrap around to "NY", the last state seen
+    assert unmatched == 2
+    assert keys[0] == 12
+    assert pd.isna(keys[1]) and pd.isna(keys[2])
@@ -0,0 +1,194 @@
+import pandas as pd
+import pytest
+from google.cloud import bigquery
+
+from src.warehouse import merge
+from src.warehouse.fake_bigquery import FakeBigQueryClient
+from src.warehouse.load_to_bigquery import merge_load, table_id_of
+from src.warehouse.merge import (
+    build_snapshot, load_last_load, merge_statement, plan_merge, prefer_full_load
+)
+from src.warehouse.schema import column_names
+
+FACT_COLUMNS = column_names("fact_orders")
+
+
+@pytest.fixture(autouse=True)
+def repo_root(monkeypatch, request):
+    # Table definitions are read from sql/ relative to the repository root
+    monkeypatch.chdir(request.config.rootpath)
+
+
+def fact_orders(rows):
+    """fact_orders frame from (order_key, order_date, sales) tuples."""
+    df = pd.DataFrame(rows, columns=["order_key", "order_date", "sales"])
+    df["order_date"] = pd.to_datetime(df["order_date"]).dt.date
+    df["order_id"] = "O-" + df["order_key"].astype(str)
+    df["date_key"] = pd.to_datetime(df["order_date"]).dt.strftime("%Y%m%d").astype("int64")
+    for column in ["customer_key", "location_key", "product_key", "quantity", "lead_time_days"]:
+        df[column] = 1
+    df["discount"] = 0.0
+    df["profit"] = df["sales"] / 10
+    return df[FACT_COLUMNS]
+
+
+# One row in each February day, never changed, so a few changed
+# partitions stay a small share of the table
+FEBRUARY = [(100 + day, f"2024-02-{day:02d}", 1.0) for day in range(1, 29)]
+
+BEFORE = fact_orders([
+    (1, "2024-01-01", 10.0),
+    (2, "2024-01-01", 20.0),
+    (3, "2024-01-02", 30.0),
+    (4, "2024-01-03", 40.0),
+    (5, "2024-01-04", 50.0),
+] + FEBRUARY)
+
+# 2 updated in place, 3 deleted, 4 moved to another day, 6 new
+AFTER = fact_orders([
+    (1, "2024-01-01", 10.0),
+    (2, "2024-01-01", 25.0),
+    (4, "2024-01-05", 40.0),
+    (5, "2024-01-04", 50.0),
+    (6, "2024-01-06", 60.0),
+] + FEBRUARY)
+
+
+def snapshot_of(df):
+    return build_snapshot(df, ["order_key"], FACT_COLUMNS, "order_date")
+
+
+def test_plan_merge_scopes_touched_partitions():
+    staging, partitions, _ = plan_merge(AFTER, snapshot_of(BEFORE), ["order_key"],
+                                        FACT_COLUMNS, "order_date")
+
+    dates = [pd.Timestamp(p).date().isoformat() for p in partitions]
+    # Update, delete, both sides of the move and the insert; 2024-01-04 is untouched
+    assert dates == ["2024-01-01", "2024-01-02", "2024-01-03", "2024-01-05", "2024-01-06"]
+    # Every current row of those partitions is staged
+    assert sorted(staging["order_key"]) == [1, 2, 4, 6]
+
+
+def test_plan_merge_without_changes():
+    staging, partitions, _ = plan_merge(BEFORE, snapshot_of(BEFORE), ["order_key"],
+                                        FACT_COLUMNS, "order_date")
+
+    assert staging.empty
+    assert partitions == []
+
+
+def test_plan_merge_unpartitioned_stages_changed_rows_only():
+    columns = ["product_key", "product_name"]
+    before = pd.DataFrame({"product_key": [1, 2, 3], "product_name": ["a", "b", "c"]})
+    after = pd.DataFrame({"product_key": [1, 2, 4], "product_name": ["a", "B", "d"]})
+
+    previous = build_snapshot(before, ["product_key"], columns)
+    staging, partitions, _ = plan_merge(after, previous, ["product_key"], columns)
+
+    # No deletes without partitions: 3 stays, 2 is updated, 4 inserted
+    assert partitions is None
+    assert sorted(staging["product_key"]) == [2, 4]
+
+
+def test_merge_statement_deletes_only_in_scope():
+    sql = merge_statement("p.d.fact_orders", "p.d.fact_orders__staging", ["order_key"],
+                          ["order_key", "sales"], partition_column="order_date",
+                          partitions=["2024-01-01", "2024-01-05"])
+
+    scope = "T.order_date IN (DATE '2024-01-01', DATE '2024-01-05')"
+    assert f"ON T.order_key = S.order_key AND {scope}" in sql
+    assert "sales = S.sales" in sql and "order_key = S.order_key," not in sql
+    assert sql.endswith(f"WHEN NOT MATCHED BY SOURCE AND {scope} THEN DELETE")
+
+
+def test_merge_statement_unpartitioned_never_deletes():
+    sql = merge_statement("p.d.dim_product", "p.d.dim_product__staging", ["product_key"],
+                          ["product_key", "product_name"])
+
+    assert "DELETE" not in sql
+
+
+def load_config():
+    return bigquery.LoadJobConfig(write_disposition=bigquery.WriteDisposition.WRITE_TRUNCATE)
+
+
+def warehouse_rows(client, table_name="fact_orders"):
+    df = client.query(f"SELECT * FROM `{table_id_of(table_name)}`").to_dataframe()
+    return df.sort_values("order_key").reset_index(drop=True)
+
+
+def expected_rows(df):
+    return df.sort_values("order_key").reset_index(drop=True)
+
+
+def test_merge_load_applies_updates_moves_and_deletes():
+    client = FakeBigQueryClient()
+
+    # First merge-mode load is a full load
+    merge_load(client, BEFORE, "fact_orders", load_config(), partition_column="order_date")
+    assert load_last_load("fact_orders", client.load_state_dir) is None
+
+    merge_load(client, AFTER, "fact_orders", load_config(), partition_column="order_date")
+
+    pd.testing.assert_frame_equal(warehouse_rows(client), expected_rows(AFTER), check_dtype=False)
+    assert load_last_load("fact_orders", client.load_state_dir) == [
+        "2024-01-01", "2024-01-02", "2024-01-03", "2024-01-05", "2024-01-06"
+    ]
+    assert any(q.startswith("MERGE INTO") for q in client.queries)
+
+
+def test_merge_load_leaves_other_partitions_untouched():
+    client = FakeBigQueryClient()
+    merge_load(client, BEFORE, "fact_orders", load_config(), partition_column="order_date")
+
+    # A row changed outside the warehouse in a partition the load does not touch
+    client.query(f"UPDATE `{table_id_of('fact_orders')}` SET sales = -1 WHERE order_key = 5")
+    merge_load(client, AFTER, "fact_orders", load_config(), partition_column="order_date")
+
+    rows = warehouse_rows(client)
+    assert rows.loc[rows["order_key"] == 5, "sales"].item() == -1
+
+
+def test_merge_load_without_changes_is_a_no_op():
+    client = FakeBigQueryClient()
+    merge_load(client, BEFORE, "fact_orders", load_config(), partition_column="order_date")
+    queries = len(client.queries)
+
+    assert merge_load(client, BEFORE, "fact_orders", load_config(), partition_column="order_date") is None
+    assert len(client.queries) == queries
+    assert load_last_load("fact_orders", client.load_state_dir) == []
+
+
+def test_prefer_full_load_thresholds(monkeypatch):
+    current, previous = snapshot_of(AFTER), snapshot_of(BEFORE)
+    partitions = sorted(set(AFTER["order_date"]))
+
+    assert not prefer_full_load([], current, previous, "order_date")
+    assert not prefer_full_load(partitions[:5], current, previous, "order_date")
+    # More than half of the table's partitions
+    assert prefer_full_load(partitions[:20], current, previous, "order_date")
+
+    monkeypatch.setattr(merge, "MAX_MERGE_PARTITIONS", 4)
+    assert prefer_full_load(partitions[:5], current, previous, "order_date")
+
+
+def test_merge_load_rewrites_when_most_partitions_changed():
+    client = FakeBigQueryClient()
+    merge_load(client, BEFORE, "fact_orders", load_config(), partition_column="order_date")
+
+    # Every February row changes
+    changed = AFTER.assign(sales=AFTER["sales"] + 1)
+    merge_load(client, changed, "fact_orders", load_config(), partition_column="order_date")
+
+    assert not any(q.startswith("MERGE INTO") for q in client.queries)
+    pd.testing.assert_frame_equal(warehouse_rows(client), expected_rows(changed), check_dtype=False)
+    # Downstream refreshes still see which partitions changed
+    assert len(load_last_load("fact_orders", client.load_state_dir)) == 34
+
+    # The snapshot was kept, so the next small change merges again
+    again = changed.assign(sales=changed["sales"].where(changed["order_key"] != 1, 0.0))
+    merge_load(client, again, "fact_orders", load_config(), partition_column="order_date")
+
+    assert any(q.startswith("MERGE INTO") for q in client.queries)
+    assert load_last_load("fact_orders", client.load_state_dir) == ["2024-01-01"]
+    pd.testing.assert_frame_equal(warehouse_rows(client), expected_rows(again), check_dtype=False)
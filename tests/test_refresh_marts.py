@@ -0,0 +1,154 @@
+import pandas as pd
+import pytest
+
+from src.warehouse.backends import DuckDBBackend
+from src.warehouse.refresh_marts import MARTS, refresh_marts
+
+
+@pytest.fixture(autouse=True)
+def repo_root(monkeypatch, request):
+    # Table and mart definitions are read from sql/ relative to the repository root
+    monkeypatch.chdir(request.config.rootpath)
+
+
+DAYS = pd.date_range("2024-01-01", "2024-03-31")
+
+DIM_DATE = pd.DataFrame({
+    "date_key": DAYS.strftime("%Y%m%d").astype("int64"),
+    "full_date": DAYS.date,
+    "year": DAYS.year,
+    "quarter": DAYS.quarter,
+    "month": DAYS.month,
+    "day": DAYS.day,
+})
+
+DIM_LOCATION = pd.DataFrame({
+    "location_key": [1, 2, 3],
+    "country": ["United States"] * 3,
+    "state": ["California", "California", "New York"],
+    "city": ["Fresno", "Oakland", "Albany"],
+    "region": ["West", "West", "East"],
+})
+
+DIM_PRODUCT = pd.DataFrame({
+    "product_key": [1, 2],
+    "product_id": ["P-1", "P-2"],
+    "category": ["Furniture", "Technology"],
+})
+
+
+def fact_orders(rows):
+    """fact_orders frame from (order_key, order_date, location_key, product_key, sales) tuples."""
+    df = pd.DataFrame(rows, columns=["order_key", "order_date", "location_key", "product_key", "sales"])
+    df["order_date"] = pd.to_datetime(df["order_date"]).dt.date
+    df["date_key"] = pd.to_datetime(df["order_date"]).dt.strftime("%Y%m%d").astype("int64")
+    df["order_id"] = "O-" + df["order_key"].astype(str)
+    df["customer_key"] = 1
+    df["quantity"] = df["order_key"] % 3 + 1
+    df["discount"] = 0.0
+    df["profit"] = df["sales"] / 4
+    df["lead_time_days"] = df["order_key"] % 5
+    return df
+
+
+FACT = fact_orders([
+    (1, "2024-01-03", 1, 1, 100.0),
+    (2, "2024-01-17", 2, 2, 40.0),
+    (3, "2024-01-31", 3, 1, 25.0),
+    (4, "2024-02-01", 1, 2, 60.0),
+    (5, "2024-02-10", 1, 2, 15.0),
+    (6, "2024-02-29", 3, 2, 80.0),
+    (7, "2024-03-05", 2, 1, 10.0),
+    (8, "2024-03-05", 3, 2, 90.0),
+])
+
+# Mart grain per mart, beyond month_key
+GRAIN = {
+    "mart_sales": ["region", "category"],
+    "mart_geo_sales": ["country", "region", "state", "city"],
+    "mart_sales_cube": ["region", "category", "state"],
+}
+
+
+def load(backend, table_name, df):
+    backend.client.load_table_from_dataframe(df, f"{backend.dataset}.{table_name}")
+
+
+@pytest.fixture
+def backend(tmp_path):
+    backend = DuckDBBackend(str(tmp_path / "warehouse.duckdb"))
+    backend.create_tables()
+    load(backend, "dim_date", DIM_DATE)
+    load(backend, "dim_location", DIM_LOCATION)
+    load(backend, "dim_product", DIM_PRODUCT)
+    load(backend, "fact_orders", FACT)
+    return backend
+
+
+def mart_rows(backend, mart, months=None):
+    df = backend.query(f"SELECT * FROM `{{dataset}}.{mart}`")
+    if months is not None:
+        df = df[df["month_key"].isin(months)]
+    columns = ["month_key"] + GRAIN[mart]
+    return df.sort_values(columns).reset_index(drop=True)
+
+
+def expected_rows(fact, mart, months=None):
+    # The same aggregation in pandas, straight from the fact rows
+    df = fact.merge(DIM_LOCATION, on="location_key").merge(DIM_PRODUCT, on="product_key")
+    df["month_key"] = pd.to_datetime(df["order_date"]).dt.strftime("%Y%m").astype("int64")
+    if months is not None:
+        df = df[df["month_key"].isin(months)]
+
+    columns = ["month_key"] + GRAIN[mart]
+    return df.groupby(columns).agg(
+        total_sales=("sales", "sum"),
+        total_profit=("profit", "sum"),
+        total_quantity=("quantity", "sum"),
+        total_lead_time=("lead_time_days", "sum"),
+        order_lines=("order_key", "size"),
+    ).reset_index()
+
+
+def assert_totals_match(backend, fact, months=None):
+    for mart in MARTS:
+        rows = mart_rows(backend, mart, months)
+        expected = expected_rows(fact, mart, months)
+        measures = [c for c in expected.columns if c in rows.columns]
+        pd.testing.assert_frame_equal(rows[measures], expected[measures], check_dtype=False)
+
+
+def test_full_build_matches_fact(backend):
+    assert refresh_marts(backend, None) is None
+
+    assert_totals_match(backend, FACT)
+    assert set(mart_rows(backend, "mart_sales")["month_key"]) == {202401, 202402, 202403}
+
+
+def test_refresh_rebuilds_only_changed_months(backend):
+    refresh_marts(backend, None)
+    # Marks rows a rebuild of their month would overwrite
+    for mart in MARTS:
+        backend.execute(f"UPDATE `{{dataset}}.{mart}` SET total_sales = -1 WHERE month_key = 202403")
+    before = {mart: mart_rows(backend, mart, [202401, 202403]) for mart in MARTS}
+
+    # February: one order updated, one deleted, one added in a new state/category
+    changed = FACT[FACT["order_key"] != 6].copy()
+    changed.loc[changed["order_key"] == 5, "sales"] = 500.0
+    changed = pd.concat([changed, fact_orders([(9, "2024-02-20", 3, 1, 70.0)])], ignore_index=True)
+    load(backend, "fact_orders", changed)
+
+    months = refresh_marts(backend, ["2024-02-10", "2024-02-29", "2024-02-20"])
+    assert months == [202402]
+
+    for mart in MARTS:
+        pd.testing.assert_frame_equal(mart_rows(backend, mart, [202401, 202403]), before[mart])
+    assert_totals_match(backend, changed, [202402])
+
+
+def test_refresh_without_changes_does_nothing(backend):
+    refresh_marts(backend, None)
+    queries = len(backend.client.queries)
+
+    assert refresh_marts(backend, []) == []
+    assert len(backend.client.queries) == queries
@@ -0,0 +1,71 @@
+import pandas as pd
+
+from src.transformation.create_dim_customer import create_dim_customer
+from src.utils.key_resolution import KeyIndex
+from src.utils.scd import effective_versions
+
+
+def orders(rows):
+    """Superstore rows from (order_date, customer_id, segment) tuples."""
+    df = pd.DataFrame(rows, columns=["Order Date", "Customer ID", "Segment"])
+    df["Customer Name"] = "Name of " + df["Customer ID"]
+    return df
+
+
+def resolve(dim, customer_ids, order_dates):
+    index = KeyIndex(effective_versions(dim), ["customer_id"], "customer_key", valid_from="valid_from")
+    keys, _ = index.resolve([pd.Series(customer_ids)], as_of=pd.Series(order_dates))
+    return keys.tolist()
+
+
+FIRST_LOAD = orders([
+    ("2020-01-10", "C1", "Consumer"),
+    ("2020-03-01", "C2", "Corporate"),
+    ("2021-02-01", "C1", "Consumer"),
+])
+
+
+def test_first_load_starts_at_first_order():
+    dim = create_dim_customer(FIRST_LOAD)
+
+    assert dim["valid_from"].dt.strftime("%Y-%m-%d").tolist() == ["2020-01-10", "2020-03-01"]
+
+
+def test_changed_attribute_starts_at_its_first_order():
+    first = create_dim_customer(FIRST_LOAD, effective_date="2021-03-01")
+
+    # C1 moves to Corporate from an order of 2021-06-01; a backfilled order
+    # of 2021-08-01 arrives with the same batch, run later
+    source = pd.concat([FIRST_LOAD, orders([
+        ("2021-06-01", "C1", "Corporate"),
+        ("2021-08-01", "C1", "Corporate"),
+    ])], ignore_index=True)
+    dim = create_dim_customer(source, existing=first, effective_date="2022-01-01")
+
+    c1 = dim[dim["customer_id"] == "C1"].sort_values("customer_key")
+    assert c1["segment"].tolist() == ["Consumer", "Corporate"]
+    assert c1["valid_from"].dt.strftime("%Y-%m-%d").tolist() == ["2020-01-10", "2021-06-01"]
+    assert c1["valid_to"].iloc[0] == pd.Timestamp("2021-06-01")
+
+    old, new = c1["customer_key"].tolist()
+    keys = resolve(dim, ["C1"] * 4, ["2020-01-10", "2021-02-01", "2021-06-01", "2021-08-01"])
+    assert keys == [old, old, new, new]
+
+
+def test_correction_of_all_history_replaces_the_old_version():
+    first = create_dim_customer(FIRST_LOAD, effective_date="2021-03-01")
+
+    # C2's segment corrected on every row, plus a backfilled older order
+    source = FIRST_LOAD.assign(
+        Segment=FIRST_LOAD["Segment"].where(FIRST_LOAD["Customer ID"] != "C2", "Home Office")
+    )
+    source = pd.concat([source, orders([("2019-11-01", "C2", "Home Office")])], ignore_index=True)
+    dim = create_dim_customer(source, existing=first, effective_date="2022-01-01")
+
+    c2 = dim[dim["customer_id"] == "C2"].sort_values("customer_key")
+    new = c2["customer_key"].iloc[-1]
+    assert c2["valid_from"].iloc[-1] == pd.Timestamp("2019-11-01")
+
+    # The old version never applies, not even to orders before it started
+    assert resolve(dim, ["C2"] * 3, ["2019-11-01", "2020-03-01", "2024-01-01"]) == [new] * 3
+    assert len(effective_versions(dim)) == len(dim) - 1
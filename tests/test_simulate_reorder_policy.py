@@ -0,0 +1,142 @@
+import numpy as np
+import pandas as pd
+
+from src.marts.create_inventory_simulation import (
+    daily_calendar, demand_matrix, lead_time_matrix, roll_inventory
+)
+from src.marts.simulate_reorder_policy import choose_policy, evaluate_policies
+
+
+def reference_policy(demand, lead_times, reorder_point, order_quantity):
+    """
+    Day-by-day roll of one policy: stock starts one lot above the reorder
+    point, a lot is ordered whenever the inventory position falls below
+    it, lots arrive lead time days later (the next day at the earliest)
+    and short demand is backordered.
+    """
+    scenarios, horizon = demand.shape
+    r, q = reorder_point, order_quantity
+    lead_times = iter(lead_times)
+
+    served_total, short_scenarios, holding = 0, 0, 0
+    for s in range(scenarios):
+        on_hand = position = r + q
+        arrivals = np.zeros(horizon + 1, dtype=int)
+        short = False
+
+        for t in range(horizon):
+            on_hand += arrivals[t] * q
+            d = demand[s, t]
+            if d:
+                served = min(d, max(on_hand, 0))
+                served_total += served
+                short |= served < d
+                on_hand -= d
+                position -= d
+
+                lots = 0
+                while position < r:
+                    position += q
+                    lots += 1
+                arrivals[min(t + max(next(lead_times), 1), horizon)] += lots
+
+            holding += max(on_hand, 0)
+
+        short_scenarios += short
+
+    return {
+        "stockout_probability": short_scenarios / scenarios,
+        "fill_rate": served_total / demand.sum(),
+        "average_holding_level": holding / demand.size,
+    }
+
+
+def random_paths(seed, scenarios=20, horizon=60):
+    rng = np.random.default_rng(seed)
+    demand = np.where(rng.random((scenarios, horizon)) < 0.3, rng.integers(1, 6, (scenarios, horizon)), 0)
+    lead_times = rng.integers(0, 10, size=np.count_nonzero(demand))
+    return demand, lead_times
+
+
+def test_evaluate_policies_matches_daily_roll():
+    demand, lead_times = random_paths(seed=7)
+    reorder_points = [0, 0, 3, 3, 8, 8, 12]
+    order_quantities = [1, 5, 1, 5, 5, 10, 10]
+
+    results = evaluate_policies(demand, lead_times, reorder_points, order_quantities)
+
+    for row in results.itertuples():
+        expected = reference_policy(demand, lead_times, row.reorder_point, row.order_quantity)
+        for metric, value in expected.items():
+            assert np.isclose(getattr(row, metric), value), (row.reorder_point, row.order_quantity, metric)
+
+
+def test_higher_reorder_points_serve_more():
+    demand, lead_times = random_paths(seed=3)
+    results = evaluate_policies(demand, lead_times, np.arange(0, 15), np.full(15, 4))
+
+    assert results["fill_rate"].is_monotonic_increasing
+    assert results["average_holding_level"].is_monotonic_increasing
+    assert results["stockout_probability"].is_monotonic_decreasing
+
+
+def test_choose_policy_prefers_lowest_holding_above_target():
+    results = pd.DataFrame({
+        "reorder_point": [1, 2, 3],
+        "order_quantity": [5, 5, 5],
+        "stockout_probability": [0.5, 0.2, 0.1],
+        "fill_rate": [0.90, 0.96, 0.99],
+        "average_holding_level": [1.0, 2.0, 3.0],
+    })
+
+    assert choose_policy(results, 0.95)["reorder_point"] == 2
+    # Without a feasible policy, the best fill rate wins
+    assert choose_policy(results, 0.995)["reorder_point"] == 3
+
+
+def test_daily_replay_uses_the_simulation_roll():
+    demand, lead_times = random_paths(seed=11, scenarios=5)
+    lead_matrix = np.zeros(demand.shape, dtype="int64")
+    lead_matrix[np.nonzero(demand)] = lead_times
+
+    # Products as rows, each with its own policy
+    reorder_point = np.array([0, 2, 4, 6, 8])
+    order_quantity = np.array([1, 3, 5, 7, 9])
+    reorders, received, stock = roll_inventory(demand, lead_matrix, reorder_point, order_quantity)
+
+    assert (reorders.sum(axis=1) * order_quantity >= received.sum(axis=1)).all()
+    for p in range(len(demand)):
+        expected = reference_policy(demand[[p]], lead_times[np.nonzero(demand)[0] == p],
+                                    reorder_point[p], order_quantity[p])
+        assert np.isclose(np.maximum(stock[p], 0).mean(), expected["average_holding_level"])
+
+
+def test_lead_times_count_calendar_days_across_gaps():
+    # Orders on 09-01 and 09-04 only; 09-02 and 09-03 are missing from date_dim
+    order_dates = pd.to_datetime(["2017-09-01", "2017-09-04", "2017-09-10"])
+    date_keys, days = daily_calendar(order_dates)
+    assert len(days) == 10
+    assert date_keys[:4].tolist() == [20170901, 20170902, 20170903, 20170904]
+
+    df_fact = pd.DataFrame({
+        "product_key": [1, 1, 1],
+        "date_key": [20170901, 20170904, 20170910],
+        "quantity": [2, 2, 1],
+        "lead_time_days": [5, 2, 1],
+    })
+    product_keys = np.array([1])
+    demand = demand_matrix(df_fact, product_keys, date_keys)
+    lead_times = lead_time_matrix(df_fact, product_keys, date_keys)
+
+    # One unit lots, no reorder point, one unit in stock: every unit sold
+    # past the first is reordered that day
+    reorders, received, stock = roll_inventory(demand, lead_times, [0], [1])
+
+    ordered = days[reorders[0] > 0]
+    arrived = days[received[0] > 0]
+    assert [d.date().isoformat() for d in ordered] == ["2017-09-01", "2017-09-04", "2017-09-10"]
+    # 09-01 + 5 days and 09-04 + 2 days are both 09-06 in calendar days;
+    # the lot of 09-10 arrives after the last day
+    assert [d.date().isoformat() for d in arrived] == ["2017-09-06"]
+    assert received[0][days.get_loc(pd.Timestamp("2017-09-06"))] == 3
+    assert stock[0].tolist() == [-1, -1, -1, -3, -3, 0, 0, 0, 0, -1]
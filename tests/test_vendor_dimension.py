@@ -0,0 +1,44 @@
+import pandas as pd
+
+from src.marts.create_vendor_dimension import (
+    UNKNOWN_VENDOR_KEY, assign_vendors, create_vendor_dimension, vendor_keys_of
+)
+
+# P-1 has two SCD2 versions (keys 1 and 3)
+PRODUCTS = pd.DataFrame({
+    "product_key": [1, 2, 3, 4],
+    "product_id": ["P-1", "P-2", "P-1", "P-3"],
+})
+
+
+def vendors_by_key(assignment):
+    return dict(zip(assignment["product_key"], assignment["vendor_key"]))
+
+
+def test_versions_of_a_product_share_its_vendor():
+    vendors = vendors_by_key(assign_vendors(PRODUCTS))
+
+    assert vendors[1] == vendors[3]
+    # Reproducible, and independent of the other products in the batch
+    assert vendors_by_key(assign_vendors(PRODUCTS.iloc[[2, 3]])) == {3: vendors[3], 4: vendors[4]}
+
+
+def test_new_versions_carry_the_existing_vendor():
+    existing = pd.DataFrame({
+        "product_vendor_key": [1, 2],
+        "product_key": [1, 2],
+        "vendor_key": [4, 4],
+        "is_current": [True, True],
+    })
+    vendors = vendors_by_key(assign_vendors(PRODUCTS, existing))
+
+    assert vendors[1] == vendors[3] == 4
+    assert vendors[2] == 4
+
+
+def test_unknown_vendor_is_a_member():
+    df_vendor = create_vendor_dimension()
+    bridge = pd.DataFrame({"product_key": [1], "vendor_key": [2], "is_current": [True]})
+
+    assert df_vendor.set_index("vendor_key").loc[UNKNOWN_VENDOR_KEY, "vendor_name"] == "Unknown"
+    assert vendor_keys_of(bridge, pd.array([1, 5, None], dtype="Int64")).tolist() == [2, 0, 0]